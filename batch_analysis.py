@@ -0,0 +1,180 @@
+import numpy as np
+import pandas as pd
+import logging
+from setup_Components import fixed_capital_cost
+
+logger = logging.getLogger('debug_logger')  # Use the new debug logger
+
+# Per-combination scalars gathered by stack_network_results (0 when the component is absent)
+_SCALARS = ("solar_capacity", "solar_capital_cost", "solar_marginal_cost",
+            "wind_capacity", "wind_capital_cost", "wind_marginal_cost",
+            "ess_capacity", "ess_capital_cost", "ess_marginal_cost", "objective")
+
+# Per-combination time series gathered by stack_network_results (zeros when the component is absent)
+_SERIES = ("demand", "weightings", "solar_pu", "solar_allocation", "wind_pu", "wind_allocation",
+           "ess_discharge", "ess_charge", "soc", "unmet")
+
+
+def stack_network_results(networks=None):
+    """
+    Stack the solved dispatch of many combinations into 2-D arrays (combination x snapshot).
+
+    Absent components (no wind, no battery) are padded with zeros, which leaves every metric computed
+    by annual_summary_batch unchanged.
+
+    Parameters:
+    - networks (dict): Combination key -> solved pypsa.Network, all with the same number of snapshots.
+
+    Returns:
+    - dict: "keys" (list), "snapshots" (pd.Index), one (n_combinations,) array per scalar in _SCALARS
+      and one (n_combinations, n_snapshots) array per series in _SERIES.
+    """
+    keys = list(networks)
+    snapshots = networks[keys[0]].snapshots
+    n_comb, n_snap = len(keys), len(snapshots)
+    stacked = {"keys": keys, "snapshots": snapshots}
+    stacked.update({name: np.zeros(n_comb) for name in _SCALARS})
+    stacked.update({name: np.zeros((n_comb, n_snap)) for name in _SERIES})
+
+    for i, key in enumerate(keys):
+        network = networks[key]
+        if len(network.snapshots) != n_snap:
+            raise ValueError(f"{key} has {len(network.snapshots)} snapshots, expected {n_snap}.")
+        generators = network.generators
+        p_max_pu = network.get_switchable_as_dense("Generator", "p_max_pu")
+        stacked["demand"][i] = network.loads_t.p_set.sum(axis=1).to_numpy()
+        stacked["weightings"][i] = network.snapshot_weightings.objective.to_numpy()
+        stacked["unmet"][i] = network.generators_t.p["Unmet_Demand"].to_numpy()
+        stacked["objective"][i] = network.objective + fixed_capital_cost(network)
+        for tech, prefix in (("Solar", "solar"), ("Wind", "wind")):
+            if tech in generators.index:
+                stacked[f"{prefix}_pu"][i] = p_max_pu[tech].to_numpy()
+                stacked[f"{prefix}_allocation"][i] = network.generators_t.p[tech].to_numpy()
+                stacked[f"{prefix}_capacity"][i] = generators.at[tech, "p_nom_opt"]
+                stacked[f"{prefix}_capital_cost"][i] = generators.at[tech, "capital_cost"]
+                stacked[f"{prefix}_marginal_cost"][i] = generators.at[tech, "marginal_cost"]
+        if "Battery" in network.storage_units.index:
+            stacked["ess_discharge"][i] = network.storage_units_t.p_dispatch["Battery"].to_numpy()
+            stacked["ess_charge"][i] = network.storage_units_t.p_store["Battery"].to_numpy()
+            stacked["soc"][i] = network.storage_units_t.state_of_charge["Battery"].to_numpy()
+            stacked["ess_capacity"][i] = network.storage_units.at["Battery", "p_nom_opt"]
+            stacked["ess_capital_cost"][i] = network.storage_units.at["Battery", "capital_cost"]
+            stacked["ess_marginal_cost"][i] = network.storage_units.at["Battery", "marginal_cost"]
+    return stacked
+
+
+def annual_summary_batch(stacked=None, sell_curtailment_percentage=None, curtailment_selling_price=None, OA_cost=None):
+    """
+    Compute the annual summary of every stacked combination in one vectorized pass.
+
+    analyze_network_results calls it with a single combination. The hourly dispatch is reduced to annual
+    totals (battery discharge below 1e-5 MW zeroed, curtailment clipped at 0 per snapshot) and the
+    metrics come from annual_metrics, which the greedy dispatch simulator shares.
+
+    Parameters:
+    - stacked (dict): Output of stack_network_results.
+    - sell_curtailment_percentage, curtailment_selling_price, OA_cost (float): As in analyze_network_results.
+
+    Returns:
+    - tuple: (pd.DataFrame of annual metrics indexed by combination key, sorted like the results_dict
+      columns, dict of (n_combinations, n_snapshots) hourly arrays "ESS Discharge" (below 1e-5 MW
+      zeroed), "Generation", "Curtailment", "Total Demand met by allocation" and "Demand met")
+    """
+    s = stacked
+    col = lambda name: s[name][:, None]  # per-combination scalar as a column for broadcasting
+    w = s["weightings"]
+    annual = lambda hourly_values: (hourly_values * w).sum(axis=1)  # MW per snapshot -> annual MWh
+
+    solar_generation = s["solar_pu"] * col("solar_capacity")
+    wind_generation = s["wind_pu"] * col("wind_capacity")
+    ess_discharge = np.where(np.abs(s["ess_discharge"]) < 1e-5, 0, s["ess_discharge"])
+    gross_energy_generation = solar_generation + wind_generation
+    solar_wind_allocation = s["solar_allocation"] + s["wind_allocation"]
+    gross_energy_allocation = solar_wind_allocation + (ess_discharge - s["ess_charge"])
+    gross_curtailment = np.maximum(gross_energy_generation - solar_wind_allocation, 0)
+
+    totals = {name: s[name] for name in _SCALARS if name != "objective"}
+    totals.update(
+        solar_allocation=annual(s["solar_allocation"]),
+        wind_allocation=annual(s["wind_allocation"]),
+        solar_curtailment=annual(np.maximum(solar_generation - s["solar_allocation"], 0)),
+        wind_curtailment=annual(np.maximum(wind_generation - s["wind_allocation"], 0)),
+        ess_discharge=annual(ess_discharge),
+        ess_charge=annual(s["ess_charge"]),
+        curtailment=annual(gross_curtailment),
+        generation=annual(gross_energy_generation),
+        demand=annual(s["demand"]),
+        unmet=annual(s["unmet"]),
+    )
+    summary = pd.DataFrame(annual_metrics(totals, sell_curtailment_percentage, curtailment_selling_price, OA_cost),
+                           index=pd.Index(s["keys"], name="Combination"))
+    summary["Objective Aggregate Cost"] = s["objective"]
+
+    hourly = {
+        "ESS Discharge": ess_discharge,
+        "Generation": gross_energy_generation,
+        "Curtailment": gross_curtailment,
+        "Total Demand met by allocation": gross_energy_allocation,
+        "Demand met": np.where(s["unmet"] > 0, "No", "Yes"),
+    }
+    return summary, hourly
+
+
+def annual_metrics(totals=None, sell_curtailment_percentage=None, curtailment_selling_price=None, OA_cost=None):
+    """
+    Annual costs and KPIs from annual energy totals; the metric formulas shared by every dispatch engine
+    (annual_summary_batch for solved networks, simulate_dispatch for the greedy screening dispatch).
+
+    Parameters:
+    - totals (dict): Arrays of length n_combinations: capacities and costs as in _SCALARS (objective
+      excluded) and annual MWh "solar_allocation", "wind_allocation", "solar_curtailment",
+      "wind_curtailment", "ess_discharge", "ess_charge", "curtailment" (gross), "generation",
+      "demand" and "unmet".
+    - sell_curtailment_percentage, curtailment_selling_price, OA_cost (float): As in analyze_network_results.
+
+    Returns:
+    - dict: Arrays keyed like the results_dict entries of analyze_network_results ("Per Unit Cost", ...).
+    """
+    t = totals
+    total_solar_cost = t["solar_capacity"] * t["solar_capital_cost"] + t["solar_allocation"] * t["solar_marginal_cost"]
+    total_wind_cost = t["wind_capacity"] * t["wind_capital_cost"] + t["wind_allocation"] * t["wind_marginal_cost"]
+    total_ess_cost = t["ess_capacity"] * t["ess_capital_cost"] + (t["ess_discharge"] + t["ess_charge"]) * t["ess_marginal_cost"]
+    total_curtailment_cost = (t["solar_curtailment"] * t["solar_marginal_cost"] + t["wind_curtailment"] * t["wind_marginal_cost"]
+                              - sell_curtailment_percentage * (t["solar_curtailment"] + t["wind_curtailment"]) * curtailment_selling_price)
+    total_cost = total_solar_cost + total_wind_cost + total_curtailment_cost + total_ess_cost
+    annual_demand_met = t["solar_allocation"] + t["wind_allocation"] + t["ess_discharge"] - t["ess_charge"]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        per_unit_cost = np.where(annual_demand_met > 0, total_cost / annual_demand_met, np.inf)
+        annual_demand_offset = 100 - (t["unmet"] / t["demand"]) * 100
+        excess_percentage = (t["curtailment"] / t["generation"]) * 100
+
+    return {
+        "Optimal Solar Capacity (MW)": t["solar_capacity"],
+        "Optimal Wind Capacity (MW)": t["wind_capacity"],
+        "Optimal Battery Capacity (MW)": t["ess_capacity"],
+        "Per Unit Cost": per_unit_cost,
+        "Final Cost": OA_cost + per_unit_cost,
+        "Total Cost": total_cost,
+        "Annual Demand Offset": annual_demand_offset,
+        "Annual Demand Met": annual_demand_met,
+        "Annual Curtailment": excess_percentage,
+        "Annual Generation": t["generation"],
+        "Annual Demand": t["demand"],
+    }
+
+
+def analyze_networks_batch(networks=None, sell_curtailment_percentage=None, curtailment_selling_price=None, OA_cost=None):
+    """
+    Annual summary of many solved networks, ranked by per-unit cost like optimization_model.
+
+    Parameters:
+    - networks (dict): Combination key -> solved pypsa.Network.
+    - sell_curtailment_percentage, curtailment_selling_price, OA_cost (float): As in analyze_network_results.
+
+    Returns:
+    - pd.DataFrame: One row per combination, sorted by Per Unit Cost.
+    """
+    summary, _ = annual_summary_batch(stack_network_results(networks), sell_curtailment_percentage,
+                                      curtailment_selling_price, OA_cost)
+    return summary.sort_values(by="Per Unit Cost")
@@ -0,0 +1,299 @@
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from run_Optimizer import analyze_network_results, combination_key
+from rolling_horizon import FixedCapacityModel, assign_dispatch, policy_budgets, quiet_solve_kwargs
+
+logger = logging.getLogger('debug_logger')  # Use the new debug logger
+
+# Capacity axes of a surrogate, in the order of its arrays
+CAPACITY_AXES = ("Solar", "Wind", "Battery")
+
+# results_dict entries stored at every grid point and interpolated by queries
+SURROGATE_METRICS = ("Per Unit Cost", "Final Cost", "Total Cost", "Annual Demand Offset", "Annual Demand Met",
+                     "Annual Curtailment", "Annual Generation")
+
+
+def _pairs_max(values, dim):
+    """Maximum over the two ends of every grid cell along dim (unchanged for a single-point axis)."""
+    n = values.shape[dim]
+    if n == 1:
+        return values
+    return np.maximum(values.take(range(n - 1), axis=dim), values.take(range(1, n), axis=dim))
+
+
+def interpolation_bounds(axes=None, values=None):
+    """
+    Estimated worst-case error of multilinear interpolation in every grid cell: per axis, h/4 times the
+    change of slope between the neighbouring cells, summed over the axes.
+
+    Parameters:
+    - axes (list): Grid points of every capacity axis (sorted 1-D arrays).
+    - values (np.ndarray): Metrics at the grid points (metric x axis 1 x axis 2 ...).
+
+    Returns:
+    - np.ndarray: Error bound per metric and cell (metric x cells per axis, one cell for a single-point
+      axis); NaN where it cannot be estimated.
+    """
+    # Infinite metrics (per-unit cost with no demand met) have no slope, like points without a dispatch
+    values = np.where(np.isinf(values), np.nan, values)
+    cells = (values.shape[0],) + tuple(max(len(axis) - 1, 1) for axis in axes)
+    bounds = np.zeros(cells)
+    for a, axis in enumerate(axes):
+        dim, n = a + 1, len(axis)
+        if n == 1:
+            continue
+        shape = [1] * values.ndim
+        shape[dim] = -1
+        h = np.diff(axis).reshape(shape)
+        slopes = np.diff(values, axis=dim) / h
+        end = np.full_like(slopes.take([0], axis=dim), np.nan)
+        previous = np.concatenate([end, slopes.take(range(n - 2), axis=dim)], axis=dim)
+        following = np.concatenate([slopes.take(range(1, n - 1), axis=dim), end], axis=dim)
+        # Slope change from the previous to the following cell; with one of them unknown, twice the
+        # change to the known one (mirrored)
+        change = np.abs(following - previous)
+        change = np.where(np.isnan(change), 2 * np.abs(following - slopes), change)
+        change = np.where(np.isnan(change), 2 * np.abs(slopes - previous), change)
+        term = h / 4 * change
+        for other in range(1, values.ndim):
+            if other != dim:
+                term = _pairs_max(term, other)
+        bounds += term
+    return bounds
+
+
+def cross_validated_error(axes=None, values=None):
+    """
+    Leave-one-out interpolation error on the grid: every interior point of an axis is predicted from its
+    two neighbours along that axis and compared with its solved value.
+
+    Returns:
+    - tuple: (maximum and mean absolute error per metric as arrays, NaN where no point can be left out)
+    """
+    # Points without a dispatch (NaN) or without demand met (infinite per-unit cost) give no error
+    values = np.where(np.isinf(values), np.nan, values)
+    errors = []
+    for a, axis in enumerate(axes):
+        dim, n = a + 1, len(axis)
+        if n < 3:
+            continue
+        shape = [1] * values.ndim
+        shape[dim] = -1
+        weight = ((axis[1:-1] - axis[:-2]) / (axis[2:] - axis[:-2])).reshape(shape)
+        left, middle, right = (values.take(range(start, start + n - 2), axis=dim) for start in (0, 1, 2))
+        errors.append(np.abs(left + weight * (right - left) - middle).reshape(values.shape[0], -1))
+    if not errors:
+        nan = np.full(values.shape[0], np.nan)
+        return nan, nan
+    errors = np.concatenate(errors, axis=1)
+    known = np.isfinite(errors).any(axis=1)
+    with np.errstate(invalid='ignore'):
+        worst = np.where(known, np.nanmax(np.where(np.isfinite(errors), errors, -np.inf), axis=1), np.nan)
+        mean = np.where(known, np.nansum(errors, axis=1) / np.maximum(np.isfinite(errors).sum(axis=1), 1), np.nan)
+    return worst, mean
+
+
+class CapacitySurrogate:
+    """
+    Metrics of one combination on a capacity grid, interpolated for arbitrary capacity queries.
+    values holds SURROGATE_METRICS at every grid point (metric x Solar x Wind x Battery) and bounds
+    the estimated interpolation error of every grid cell.
+    """
+
+    def __init__(self, key=None, axes=None, values=None, bounds=None, limits=None, build_kwargs=None, model=None):
+        self.key = key
+        self.axes = axes
+        self.values = values
+        self.bounds = bounds
+        self.limits = limits
+        self.build_kwargs = build_kwargs
+        self._model = model
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_model"] = None
+        return state
+
+    def diagnostics(self):
+        """
+        Coverage and accuracy of the grid.
+
+        Returns:
+        - dict: "Grid Points", "Solved Points", "Coverage (%)", "Cells Without Bound (%)" and, per metric,
+          "Cross-Validated Max Error" and "Cross-Validated Mean Error".
+        """
+        solved = ~np.isnan(self.values[0])
+        worst, mean = cross_validated_error(self.axes, self.values)
+        return {
+            "Grid Points": int(solved.size),
+            "Solved Points": int(solved.sum()),
+            "Coverage (%)": 100 * float(solved.mean()),
+            "Cells Without Bound (%)": 100 * float(np.isnan(self.bounds[0]).mean()),
+            "Cross-Validated Max Error": dict(zip(SURROGATE_METRICS, worst.tolist())),
+            "Cross-Validated Mean Error": dict(zip(SURROGATE_METRICS, mean.tolist())),
+        }
+
+    def _cell(self, capacities):
+        """Cell index and fraction of the way through the cell along every axis."""
+        cell, fractions = [], []
+        for name, axis in zip(CAPACITY_AXES, self.axes):
+            value = float(capacities.get(name) or 0.0)
+            if not axis[0] - 1e-9 <= value <= axis[-1] + 1e-9:
+                raise ValueError(f"{name} capacity {value} MW is outside the grid ({axis[0]} - {axis[-1]} MW).")
+            if len(axis) == 1:
+                cell.append(0)
+                fractions.append(None)
+                continue
+            i = min(max(int(np.searchsorted(axis, value, side="right")) - 1, 0), len(axis) - 2)
+            cell.append(i)
+            fractions.append((value - axis[i]) / (axis[i + 1] - axis[i]))
+        return cell, fractions
+
+    def query(self, solar=None, wind=None, battery=None):
+        """
+        Interpolated metrics at a capacity point, with their estimated error bounds.
+
+        Parameters:
+        - solar, wind, battery (float, optional): Capacities in MW (None: 0), within the grid.
+
+        Returns:
+        - dict: SURROGATE_METRICS values, "Error Bound" (metric -> bound, NaN if unknown), and with DO
+          or curtailment limits "Feasible" and "Near Limit" (within the error bound of a limit).
+        """
+        cell, fractions = self._cell({"Solar": solar, "Wind": wind, "Battery": battery})
+        corners = self.values[(slice(None),) + tuple(slice(i, i + (2 if f is not None else 1))
+                                                     for i, f in zip(cell, fractions))]
+        # Contract the last axis first: each step leaves one axis fewer
+        for fraction in reversed(fractions):
+            corners = corners[..., 0] if fraction is None else corners @ np.array([1 - fraction, fraction])
+        bounds = self.bounds[(slice(None),) + tuple(cell)]
+        result = dict(zip(SURROGATE_METRICS, corners.tolist()))
+        result["Error Bound"] = dict(zip(SURROGATE_METRICS, bounds.tolist()))
+
+        margins = []
+        if self.limits.get("DO") is not None:
+            margins.append(("Annual Demand Offset", result["Annual Demand Offset"] - self.limits["DO"] * 100))
+        if self.limits.get("annual_curtailment_limit") is not None:
+            margins.append(("Annual Curtailment",
+                            self.limits["annual_curtailment_limit"] * 100 - result["Annual Curtailment"]))
+        if margins:
+            result["Feasible"] = all(margin >= 0 for _, margin in margins)
+            result["Near Limit"] = any(not abs(margin) > result["Error Bound"][name] for name, margin in margins)
+        return result
+
+    def refine(self, solar=None, wind=None, battery=None):
+        """
+        Solve a capacity point exactly (dispatch only, capacities fixed) and compare it with the interpolation.
+
+        Parameters:
+        - solar, wind, battery (float, optional): Capacities in MW (None: 0), within the grid.
+
+        Returns:
+        - dict or None: results_dict entry of analyze_network_results at the point, plus "Interpolated"
+          (query result) and "Interpolation Error" (interpolated - exact per metric); None if the
+          solve failed.
+        """
+        estimate = self.query(solar, wind, battery)
+        if self._model is None:
+            self._model = _grid_model(self.axes, **self.build_kwargs)
+        start = time.perf_counter()
+        capacities = {"Solar": solar or 0.0, "Wind": wind or 0.0, "Battery": battery or 0.0}
+        result = _solve_point(self._model, capacities, self.key, **self.build_kwargs)
+        if result is None:
+            return None
+        result["Solve Time (s)"] = time.perf_counter() - start
+        result["Interpolated"] = estimate
+        result["Interpolation Error"] = {metric: estimate[metric] - result[metric] for metric in SURROGATE_METRICS}
+        return result
+
+    def to_frame(self):
+        """The grid points as a DataFrame: capacities and SURROGATE_METRICS, one row per point."""
+        grid = pd.MultiIndex.from_product(self.axes, names=[f"{name} Capacity (MW)" for name in CAPACITY_AXES])
+        return pd.DataFrame(self.values.reshape(len(SURROGATE_METRICS), -1).T, index=grid,
+                            columns=list(SURROGATE_METRICS))
+
+
+def _grid_model(axes=None, demand_data=None, profiles=None, network_kwargs=None, model_kwargs=None,
+                solve_kwargs=None, **kwargs):
+    """Fixed-capacity model of the full horizon, built at the largest grid capacities."""
+    capacities = {name: float(axis[-1]) for name, axis in zip(CAPACITY_AXES, axes)}
+    # A full-year basis is a poor start after a capacity step (up to 40x slower than presolving afresh
+    # on the golden case), so only the model build is shared between points
+    return FixedCapacityModel(demand_data, profiles, capacities, network_kwargs, model_kwargs, solve_kwargs,
+                              hot_start=False)
+
+
+def _solve_point(model=None, capacities=None, key=None, model_kwargs=None, analysis_kwargs=None, **kwargs):
+    """Dispatch-only solve of one capacity point; results_dict entry of analyze_network_results or None."""
+    model.set_capacities(capacities)
+    network = model.network
+    available = network.get_switchable_as_dense("Generator", "p_max_pu") * network.generators.p_nom
+    soc_initial = (network.storage_units.at["Battery", "state_of_charge_initial"]
+                   if "Battery" in network.storage_units.index else 0.0)
+    _, budgets = policy_budgets(network, model_kwargs)
+    condition, dispatch = model.solve(network.loads_t.p_set.sum(axis=1).to_numpy(), available, soc_initial, budgets)
+    if dispatch is None:
+        logger.debug(f"{key} - capacities {capacities} returned '{condition}'.")
+        return None
+    assign_dispatch(network, dispatch, model_kwargs)
+    results_dict = {}
+    analyze_network_results(network=network, results_dict=results_dict, solve=False, **analysis_kwargs)
+    return results_dict.get(key)
+
+
+def build_capacity_surrogate(demand_data=None, solar_profile=None, wind_profile=None, network_kwargs=None,
+                             model_kwargs=None, analysis_kwargs=None, ipp_name=None, solar_capacities=None,
+                             wind_capacities=None, battery_capacities=None, solve_kwargs=None):
+    """
+    Evaluate a capacity grid of one combination with dispatch-only solves and wrap it in a CapacitySurrogate.
+    The policy limits are soft, so points that miss them are still evaluated.
+
+    Parameters:
+    - demand_data, solar_profile, wind_profile (pd.Series): Inputs as in solve_combination.
+    - network_kwargs, model_kwargs, analysis_kwargs (dict): As in solve_combination.
+    - ipp_name (str): IPP of the combination.
+    - solar_capacities, wind_capacities, battery_capacities (iterable, optional): Grid axes (MW).
+      A missing axis is treated as a single zero capacity, as in evaluate_capacity_grid.
+    - solve_kwargs (dict, optional): linopy solve arguments (solver_name and options).
+
+    Returns:
+    - CapacitySurrogate: Grid metrics, error bounds and the model for refine; points that failed to
+      solve are NaN.
+    """
+    axes = [np.unique(np.atleast_1d(np.asarray(c if c is not None else [0.0], dtype=float)))
+            for c in (solar_capacities, wind_capacities, battery_capacities)]
+    key = combination_key(ipp_name=ipp_name, solar_name=network_kwargs.get("solar_name"),
+                          wind_name=network_kwargs.get("wind_name"), ess_name=network_kwargs.get("ess_name"))
+    profiles = {name: profile for name, profile in (("Solar", solar_profile), ("Wind", wind_profile))
+                if profile is not None}
+    build_kwargs = dict(
+        demand_data=demand_data, profiles=profiles, network_kwargs=network_kwargs, model_kwargs=model_kwargs,
+        solve_kwargs=quiet_solve_kwargs(solve_kwargs),
+        # Grid points are summarized, not exported, and have no duals of their own
+        analysis_kwargs=dict(analysis_kwargs, solar_profile=solar_profile, wind_profile=wind_profile,
+                             ipp_name=ipp_name, solar_name=network_kwargs.get("solar_name"),
+                             wind_name=network_kwargs.get("wind_name"), ess_name=network_kwargs.get("ess_name"),
+                             report_duals=False, export_excel=False),
+    )
+
+    start = time.perf_counter()
+    model = _grid_model(axes, **build_kwargs)
+    values = np.full((len(SURROGATE_METRICS),) + tuple(len(axis) for axis in axes), np.nan)
+    for index in np.ndindex(values.shape[1:]):
+        capacities = {name: axis[i] for name, axis, i in zip(CAPACITY_AXES, axes, index)}
+        result = _solve_point(model, capacities, key, **build_kwargs)
+        if result is not None:
+            values[(slice(None),) + index] = [result[metric] for metric in SURROGATE_METRICS]
+    logger.debug(f"{key} - evaluated {values[0].size} capacity points in {time.perf_counter() - start:.1f} s.")
+
+    limits = {"DO": model_kwargs.get("DO"), "annual_curtailment_limit": model_kwargs.get("annual_curtailment_limit")}
+    surrogate = CapacitySurrogate(key, axes, values, interpolation_bounds(axes, values), limits, build_kwargs, model)
+    diagnostics = surrogate.diagnostics()
+    logger.info(f"{key} - capacity grid: {diagnostics['Solved Points']}/{diagnostics['Grid Points']} points solved, "
+                f"{diagnostics['Cells Without Bound (%)']:.0f}% of cells without an error bound, cross-validated "
+                f"Per Unit Cost error up to {diagnostics['Cross-Validated Max Error']['Per Unit Cost']:.4g}.")
+    return surrogate
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger('debug_logger')  # Use the new debug logger
+
+
+def _encode(value):
+    """json.dumps default hook for the pandas/numpy objects found in a results_dict entry."""
+    if isinstance(value, pd.Series):
+        index = value.index
+        return {
+            "__series__": True,
+            "name": value.name,
+            "index_name": index.name,
+            "datetime_index": isinstance(index, pd.DatetimeIndex),
+            "index": [str(i) for i in index] if isinstance(index, pd.DatetimeIndex) else index.tolist(),
+            "values": value.tolist(),
+        }
+    if isinstance(value, np.ndarray):
+        return {"__ndarray__": True, "dtype": str(value.dtype), "values": value.tolist()}
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not journal serializable")
+
+
+def _decode(obj):
+    """json.loads object hook that restores Series and arrays written by _encode."""
+    if obj.get("__series__"):
+        index = pd.DatetimeIndex(pd.to_datetime(obj["index"])) if obj["datetime_index"] else pd.Index(obj["index"])
+        index.name = obj["index_name"]
+        return pd.Series(obj["values"], index=index, name=obj["name"])
+    if obj.get("__ndarray__"):
+        return np.array(obj["values"], dtype=obj["dtype"])
+    return obj
+
+
+def demand_hash(demand=None):
+    """Hex digest of a demand profile's values and index, stored in journal records next to the job signature."""
+    digest = hashlib.sha1(np.ascontiguousarray(np.asarray(demand, dtype=float).reshape(-1)).tobytes())
+    index = getattr(demand, "index", None)
+    if index is not None:
+        # The snapshot timestamps set the resolution and the peak hours
+        digest.update(pd.util.hash_pandas_object(index).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def append_journal(journal_path=None, key=None, result=None, signature=None, demand_digest=None):
+    """
+    Append one completed combination to the journal as a JSON line, fsync'ed before returning.
+
+    Parameters:
+    - journal_path (str or Path): Journal file (JSON lines), created if missing.
+    - key (str): Combination key, as produced by combination_key.
+    - result (dict): The results_dict entry of the combination.
+    - signature (str, optional): warm_start.job_signature of every input and mode option of the combination.
+    - demand_digest (str, optional): demand_hash of the demand profile it was solved for.
+    """
+    line = json.dumps({"key": key, "signature": signature, "demand": demand_digest, "result": result},
+                      default=_encode)
+    with open(journal_path, "a", encoding="utf-8") as journal:
+        journal.write(line + "\n")
+        journal.flush()
+        os.fsync(journal.fileno())
+
+
+def load_journal(journal_path=None, signatures=None, demand_digest=None):
+    """
+    Read the completed combinations from a journal, cutting off a torn last line.
+    With signatures given, records solved with other inputs are ignored.
+
+    Parameters:
+    - journal_path (str or Path): Journal file written by append_journal.
+    - signatures (dict, optional): Combination key -> expected signature; other keys are ignored.
+    - demand_digest (str, optional): Expected demand_hash, checked together with signatures.
+
+    Returns:
+    - dict: Combination key -> results_dict entry, empty if the journal does not exist.
+    """
+    completed = {}
+    journal_path = Path(journal_path)
+    if not journal_path.exists():
+        return completed
+    valid_bytes = 0
+    stale = set()
+    with open(journal_path, "rb") as journal:
+        for line_no, line in enumerate(journal, start=1):
+            if not line.endswith(b"\n"):
+                logger.debug(f"Dropping incomplete journal record at line {line_no} of {journal_path}")
+                break
+            valid_bytes += len(line)
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line.decode("utf-8"), object_hook=_decode)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                logger.debug(f"Ignoring corrupt journal record at line {line_no} of {journal_path}")
+                continue
+            key = record["key"]
+            if signatures is not None and (record.get("signature") != signatures.get(key)
+                                           or record.get("demand") != demand_digest):
+                stale.add(key)
+                continue
+            completed[key] = record["result"]
+    if valid_bytes < journal_path.stat().st_size:
+        # Cut the torn tail so the next append starts on a fresh line
+        with open(journal_path, "r+b") as journal:
+            journal.truncate(valid_bytes)
+    stale -= set(completed)
+    if stale:
+        logger.info(f"Ignoring journal records of {sorted(stale)} in {journal_path}: solved with other inputs.")
+    logger.debug(f"Loaded {len(completed)} completed combinations from {journal_path}")
+    return completed
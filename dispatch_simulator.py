@@ -0,0 +1,190 @@
+import numpy as np
+import pandas as pd
+import logging
+from setup_Components import HOURS_PER_YEAR
+from batch_analysis import annual_metrics
+
+logger = logging.getLogger('debug_logger')  # Use the new debug logger
+
+
+def _as_points(value, n_points):
+    """Broadcast a scalar or 1-D capacity input to an array of n_points floats."""
+    arr = np.asarray(0.0 if value is None else value, dtype=float)
+    return np.broadcast_to(arr, (n_points,)).astype(float)
+
+
+def _as_profile(profile, n_snapshots):
+    """Return a profile as a float array of length n_snapshots (zeros if missing)."""
+    if profile is None:
+        return np.zeros(n_snapshots)
+    values = np.asarray(profile, dtype=float).reshape(-1)
+    if len(values) != n_snapshots:
+        raise ValueError(f"Profile length {len(values)} does not match demand length {n_snapshots}.")
+    return np.nan_to_num(values)
+
+
+def simulate_dispatch(demand_data=None, solar_profile=None, wind_profile=None,
+                      solar_capacity=None, wind_capacity=None, battery_capacity=None,
+                      Battery_max_energy_capacity=None, Battery_Eff_store=1.0, Battery_Eff_dispatch=1.0,
+                      Solar_captialCost=0, Solar_marginalCost=0, Wind_captialCost=0, Wind_marginalCost=0,
+                      Battery_captialCost=0, Battery_marginalCost=0,
+                      sell_curtailment_percentage=0, curtailment_selling_price=0, OA_cost=0,
+                      snapshot_hours=1.0, return_hourly=False):
+    """
+    Rule-based (greedy) dispatch for given capacities, vectorized over a batch of capacity points.
+    The state of charge makes the snapshots sequential, so only the points are vectorized.
+
+    Each hour renewables serve demand first, any surplus charges the battery (the battery can only
+    charge from renewables, as in optimize_network) and the remainder is curtailed. Any deficit is
+    discharged from the battery and what is left is unmet demand. The battery starts empty and its energy
+    capacity is battery_capacity * Battery_max_energy_capacity (max hours), matching the StorageUnit built
+    in setup_network; like optimize_network (whose DoD constraint is disabled) it may discharge fully.
+    The annual metrics come from batch_analysis.annual_metrics, the formulas used for solved networks.
+
+    Parameters:
+    - demand_data (pd.Series or array): Time-series demand (MW).
+    - solar_profile, wind_profile (pd.Series or array, optional): Per-unit generation profiles.
+    - solar_capacity, wind_capacity, battery_capacity (float or 1-D array): Capacities (MW) of each point.
+    - Battery_max_energy_capacity (float): Battery max hours (MWh/MW); defaults to 1 h like PyPSA.
+    - Battery_Eff_store, Battery_Eff_dispatch (float): Charging and discharging efficiencies.
+    - *_captialCost, *_marginalCost (float): Costs as used in setup_network.
+    - sell_curtailment_percentage, curtailment_selling_price, OA_cost (float): As in analyze_network_results.
+    - snapshot_hours (float): Duration of each snapshot in hours (0.25 for 15-minute data). Energy
+      sums are scaled to one year like the objective snapshot weighting in setup_network.
+    - return_hourly (bool): Also return (snapshot x point) arrays of the dispatch.
+
+    Returns:
+    - dict: Arrays of length n_points keyed like the results_dict entries of analyze_network_results
+      ("Per Unit Cost", "Annual Demand Offset", "Annual Curtailment", ...), plus hourly arrays under
+      "Hourly" when return_hourly is True.
+    """
+    demand = np.asarray(demand_data, dtype=float).reshape(-1)
+    n_snapshots = len(demand)
+    solar_pu = _as_profile(solar_profile, n_snapshots)
+    wind_pu = _as_profile(wind_profile, n_snapshots)
+
+    n_points = max(np.size(solar_capacity), np.size(wind_capacity), np.size(battery_capacity), 1)
+    solar_cap = _as_points(solar_capacity, n_points)
+    wind_cap = _as_points(wind_capacity, n_points)
+    battery_cap = _as_points(battery_capacity, n_points)
+
+    max_hours = 1.0 if Battery_max_energy_capacity is None else float(Battery_max_energy_capacity)
+    energy_cap = battery_cap * max_hours
+    eff_store = float(Battery_Eff_store)
+    eff_dispatch = float(Battery_Eff_dispatch)
+    hours = float(snapshot_hours)
+
+    soc = np.zeros(n_points)
+    solar_alloc_sum = np.zeros(n_points)
+    wind_alloc_sum = np.zeros(n_points)
+    solar_curt_sum = np.zeros(n_points)
+    wind_curt_sum = np.zeros(n_points)
+    charge_sum = np.zeros(n_points)
+    discharge_sum = np.zeros(n_points)
+    unmet_sum = np.zeros(n_points)
+
+    if return_hourly:
+        hourly = {name: np.empty((n_snapshots, n_points)) for name in
+                  ("Solar Allocation", "Wind Allocation", "SOC", "ESS Discharge", "ESS Charge",
+                   "Unmet demand", "Curtailment")}
+
+    for t in range(n_snapshots):
+        solar_avail = solar_cap * solar_pu[t]
+        wind_avail = wind_cap * wind_pu[t]
+        avail = solar_avail + wind_avail
+
+        direct = np.minimum(avail, demand[t])
+        surplus = avail - direct
+        deficit = demand[t] - direct
+
+        charge = np.minimum(np.minimum(surplus, battery_cap), (energy_cap - soc) / (eff_store * hours))
+        charge = np.maximum(charge, 0)
+        soc = soc + charge * eff_store * hours
+
+        discharge = np.minimum(np.minimum(deficit, battery_cap), soc * eff_dispatch / hours)
+        soc = soc - discharge * hours / eff_dispatch
+
+        curtailment = surplus - charge
+        unmet = deficit - discharge
+
+        # Split the renewable allocation (direct use + charging) and curtailment by availability share
+        solar_share = np.divide(solar_avail, avail, out=np.zeros(n_points), where=avail > 0)
+        used = direct + charge
+        solar_alloc = used * solar_share
+        solar_curt = curtailment * solar_share
+
+        solar_alloc_sum += solar_alloc
+        wind_alloc_sum += used - solar_alloc
+        solar_curt_sum += solar_curt
+        wind_curt_sum += curtailment - solar_curt
+        charge_sum += charge
+        discharge_sum += discharge
+        unmet_sum += unmet
+
+        if return_hourly:
+            hourly["Solar Allocation"][t] = solar_alloc
+            hourly["Wind Allocation"][t] = used - solar_alloc
+            hourly["SOC"][t] = soc
+            hourly["ESS Discharge"][t] = discharge
+            hourly["ESS Charge"][t] = charge
+            hourly["Unmet demand"][t] = unmet
+            hourly["Curtailment"][t] = curtailment
+
+    # MW summed over snapshots -> annual MWh (snapshot hours times horizon-to-year scaling)
+    weighting = HOURS_PER_YEAR / n_snapshots
+    solar_alloc_sum *= weighting
+    wind_alloc_sum *= weighting
+    solar_curt_sum *= weighting
+    wind_curt_sum *= weighting
+    charge_sum *= weighting
+    discharge_sum *= weighting
+    unmet_sum *= weighting
+
+    totals = dict(
+        solar_capacity=solar_cap, solar_capital_cost=Solar_captialCost, solar_marginal_cost=Solar_marginalCost,
+        wind_capacity=wind_cap, wind_capital_cost=Wind_captialCost, wind_marginal_cost=Wind_marginalCost,
+        ess_capacity=battery_cap, ess_capital_cost=Battery_captialCost, ess_marginal_cost=Battery_marginalCost,
+        solar_allocation=solar_alloc_sum, wind_allocation=wind_alloc_sum,
+        solar_curtailment=solar_curt_sum, wind_curtailment=wind_curt_sum,
+        ess_discharge=discharge_sum, ess_charge=charge_sum, unmet=unmet_sum,
+        curtailment=solar_curt_sum + wind_curt_sum,
+        generation=(solar_cap * solar_pu.sum() + wind_cap * wind_pu.sum()) * weighting,
+        demand=np.full(n_points, demand.sum() * weighting),
+    )
+    results = annual_metrics(totals, sell_curtailment_percentage, curtailment_selling_price, OA_cost)
+    if return_hourly:
+        results["Hourly"] = hourly
+    return results
+
+
+def evaluate_capacity_grid(solar_capacities=None, wind_capacities=None, battery_capacities=None,
+                           DO=None, annual_curtailment_limit=None, **kwargs):
+    """
+    Screen a full capacity grid with the greedy dispatch simulator in one batched call.
+
+    Parameters:
+    - solar_capacities, wind_capacities, battery_capacities (iterable, optional): Grid axes (MW).
+      A missing axis is treated as a single zero capacity.
+    - DO (float, optional): Required demand offset (0-1); points below it are marked infeasible.
+    - annual_curtailment_limit (float, optional): Curtailment limit (0-1); points above it are marked infeasible.
+    - **kwargs: Passed to simulate_dispatch (demand_data, profiles, costs, efficiencies, ...).
+
+    Returns:
+    - pd.DataFrame: One row per grid point with capacities and summary metrics, sorted by Per Unit Cost.
+    """
+    axes = [np.atleast_1d(np.asarray(c if c is not None else [0.0], dtype=float))
+            for c in (solar_capacities, wind_capacities, battery_capacities)]
+    solar_grid, wind_grid, battery_grid = (g.ravel() for g in np.meshgrid(*axes, indexing='ij'))
+
+    kwargs.pop("return_hourly", None)
+    results = simulate_dispatch(solar_capacity=solar_grid, wind_capacity=wind_grid,
+                                battery_capacity=battery_grid, **kwargs)
+    grid_df = pd.DataFrame(results)
+    feasible = np.ones(len(grid_df), dtype=bool)
+    if DO is not None:
+        feasible &= grid_df["Annual Demand Offset"].to_numpy() >= DO * 100
+    if annual_curtailment_limit is not None:
+        feasible &= np.nan_to_num(grid_df["Annual Curtailment"].to_numpy()) <= annual_curtailment_limit * 100
+    grid_df["Feasible"] = feasible
+    logger.debug(f"Screened {len(grid_df)} capacity points with the greedy dispatch simulator.")
+    return grid_df.sort_values(by="Per Unit Cost")
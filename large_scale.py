@@ -0,0 +1,199 @@
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+from scipy import sparse
+
+from model_diagnostics import model_size, peak_rss_mb
+
+logger = logging.getLogger('debug_logger')  # Use the new debug logger
+
+# Solver preset (see solver_config.SOLVER_PRESETS) that selects the large-scale first-order mode
+LARGE_SCALE_PRESET = "large-scale"
+
+# Option names for the configurable limits of the first-order solve, per solver
+FIRST_ORDER_OPTIONS = {
+    "highs": {"tolerance": "pdlp_d_gap_tol", "iteration_limit": "pdlp_iteration_limit", "time_limit": "time_limit"},
+    "gurobi": {"tolerance": "BarConvTol", "iteration_limit": "BarIterLimit", "time_limit": "TimeLimit"},
+}
+
+# Exact simplex re-solve of the dispatch once capacities are fixed
+POLISH_OPTIONS = {"highs": {"solver": "simplex"}, "gurobi": {"Method": 1}}
+
+# HiGHS primal_solution_status of a feasible point
+HIGHS_FEASIBLE = 2
+
+# Largest relative row violation for a first-order point to be used as the dispatch without polishing
+FEASIBILITY_TOLERANCE = 1e-6
+
+
+def first_order_options(solver_name="highs", tolerance=None, iteration_limit=None, time_limit=None):
+    """
+    Solver options for the tolerance, iteration and time limits of the first-order solve.
+
+    Parameters:
+    - solver_name (str): "highs" (PDLP) or "gurobi" (barrier without crossover).
+    - tolerance (float, optional): Relative duality gap at which the solve stops.
+    - iteration_limit (int, optional): Maximum number of iterations.
+    - time_limit (float, optional): Maximum solve time (s).
+
+    Returns:
+    - dict: Options to merge into the solve_model keyword arguments.
+    """
+    names = FIRST_ORDER_OPTIONS[solver_name]
+    limits = {"tolerance": tolerance, "iteration_limit": iteration_limit, "time_limit": time_limit}
+    return {names[limit]: value for limit, value in limits.items() if value is not None}
+
+
+def _max_row_violation(h):
+    """Largest row bound violation of the HiGHS primal point, relative to 1 + |bound|."""
+    lp = h.getLp()
+    a = lp.a_matrix_
+    matrix = sparse.csc_matrix((np.asarray(a.value_), np.asarray(a.index_), np.asarray(a.start_)),
+                               shape=(lp.num_row_, lp.num_col_))
+    activity = matrix @ np.asarray(h.getSolution().col_value, dtype=float)
+    lower, upper = np.asarray(lp.row_lower_, dtype=float), np.asarray(lp.row_upper_, dtype=float)
+    with np.errstate(invalid='ignore'):
+        below = np.where(np.isfinite(lower), (lower - activity) / (1 + np.abs(lower)), 0)
+        above = np.where(np.isfinite(upper), (activity - upper) / (1 + np.abs(upper)), 0)
+    return float(max(below.max(initial=0), above.max(initial=0)))
+
+
+def _map_highs_solution(m):
+    """
+    Copy the primal point held by HiGHS (a PDLP point linopy left unmapped) into the linopy variables
+    and return its objective value. The model must have been passed with io_api="direct".
+
+    Raises:
+    - ValueError: If the HiGHS columns do not match the model variables.
+    """
+    h = m.solver_model
+    col_value = np.asarray(h.getSolution().col_value, dtype=float)
+    vlabels = m.matrices.vlabels
+    if len(col_value) != len(vlabels):
+        raise ValueError(f"HiGHS holds {len(col_value)} columns, the model has {len(vlabels)} variables.")
+    solution = pd.Series(col_value, index=vlabels)
+    solution.loc[-1] = np.nan
+    for name, var in m.variables.items():
+        values = solution.reindex(np.ravel(var.labels)).to_numpy().reshape(var.labels.shape)
+        var.solution = xr.DataArray(values, var.coords)
+    # linopy only exposes solutions of models with status "ok"; the termination condition stays as reported
+    m.status = "ok"
+    return h.getInfo().objective_function_value
+
+
+def solve_first_order(network=None, solve_kwargs=None):
+    """
+    Solve the capacity model with the first-order method and return the capacities it found.
+    A point that fails the row check only provides capacities and has to be polished.
+
+    Parameters:
+    - network (pypsa.Network): Network with the model built by optimize_network.
+    - solve_kwargs (dict): solve_model keyword arguments (solver name and first-order options).
+
+    Returns:
+    - tuple: ({"Solar", "Wind", "Battery"} capacities in MW for setup_network(fixed_capacities=...), or
+      None if no usable point was found; solve time in s; True if the network holds a consistent dispatch)
+    """
+    if solve_kwargs.get("solver_name") == "highs":
+        # Pass the model to HiGHS directly: its columns are then in linopy label order, which
+        # _map_highs_solution relies on
+        solve_kwargs = dict(solve_kwargs, io_api="direct")
+    start = time.perf_counter()
+    status, condition = network.optimize.solve_model(**solve_kwargs)
+    solve_time = time.perf_counter() - start
+    m = network.model
+
+    consistent = status == "ok"
+    if not consistent:
+        h = getattr(m, "solver_model", None)
+        if h is None or not hasattr(h, "getInfo") or h.getInfo().primal_solution_status != HIGHS_FEASIBLE:
+            logger.debug(f"First-order solve returned '{condition}' without a feasible point.")
+            return None, solve_time, False
+        try:
+            violation = _max_row_violation(h)
+            objective = _map_highs_solution(m)
+            network.optimize.assign_solution()
+            network.optimize.post_processing()
+        except Exception as e:
+            # The caller then solves the model exactly
+            logger.debug(f"First-order point reported as '{condition}' could not be mapped to the network: {e}")
+            return None, solve_time, False
+        consistent = violation <= FEASIBILITY_TOLERANCE
+        logger.debug(f"First-order point reported as '{condition}', max relative row violation {violation:.2e}.")
+        network.objective = objective
+
+    capacities = {name: network.generators.at[name, "p_nom_opt"]
+                  for name in ("Solar", "Wind") if name in network.generators.index}
+    if "Battery" in network.storage_units.index:
+        capacities["Battery"] = network.storage_units.at["Battery", "p_nom_opt"]
+    return capacities, solve_time, consistent
+
+
+def synthetic_case(demand_data=None, profiles=None, years=1, freq='h'):
+    """
+    Build a large synthetic case by repeating a one-year case over several years and/or refining it.
+
+    Parameters:
+    - demand_data (pd.Series): Hourly demand (MW).
+    - profiles (dict): Name -> hourly per-unit profile with the same length as demand_data.
+    - years (int): Number of times the year is repeated.
+    - freq (str): Target resolution, e.g. 'h' or '15min'; finer steps repeat the hourly value.
+
+    Returns:
+    - tuple: (demand, dict of profiles) on the new DatetimeIndex.
+    """
+    hourly = pd.date_range(start="2022-01-01", periods=len(demand_data) * years, freq="h")
+    index = pd.date_range(start=hourly[0], end=hourly[-1] + pd.Timedelta(hours=1), freq=freq, inclusive="left")
+    steps = len(index) // len(hourly)
+
+    def expand(series):
+        return pd.Series(np.repeat(np.tile(np.asarray(series, dtype=float), years), steps), index=index)
+
+    return expand(demand_data), {name: expand(profile) for name, profile in profiles.items()}
+
+
+def _benchmark_run(build=None, solve=None):
+    """Build and solve one case in a fresh process; returns size, time, objective and peak memory."""
+    start = time.perf_counter()
+    network, m = build()
+    build_time = time.perf_counter() - start
+    size = model_size(m)
+    del m  # The network keeps the model; solve may release it
+    start = time.perf_counter()
+    objective = solve(network)
+    return {
+        "Snapshots": len(network.snapshots),
+        "Nonzeros": size["Nonzeros"],
+        "Build Time (s)": build_time,
+        "Solve Time (s)": time.perf_counter() - start,
+        "Objective": objective,
+        "Process Peak RSS (MB)": peak_rss_mb(),
+    }
+
+
+def benchmark_large_scale(cases=None):
+    """
+    Measure time and peak memory of solve paths on large cases, one fresh process per run.
+
+    Parameters:
+    - cases (dict): (case name, path name) -> (build, solve) where build() returns (network, model) and
+      solve(network) returns the objective. Both must be picklable (module-level functions or partials).
+
+    Returns:
+    - pd.DataFrame: One row per run, indexed by case and path.
+    """
+    rows = {}
+    for (case, path), (build, solve) in cases.items():
+        # A new process per run, so the peak RSS belongs to that run alone
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            try:
+                rows[(case, path)] = executor.submit(_benchmark_run, build, solve).result()
+            except Exception as e:
+                logger.debug(f"Benchmark {case} / {path} failed: {e}")
+                rows[(case, path)] = {"Error": str(e)}
+        logger.debug(f"Benchmark {case} / {path}: {rows[(case, path)]}")
+    return pd.DataFrame.from_dict(rows, orient="index").rename_axis(["Case", "Path"])
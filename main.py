@@ -1,17 +1,346 @@
 import pypsa
 import pandas as pd
 from preprocessing import preprocess_multiple_profiles
-from setup_Components import setup_network
+from setup_Components import map_profiles, setup_network, snapshot_hours
 from createModel import optimize_network
-from run_Optimizer import analyze_network_results
+from run_Optimizer import analyze_network_results, combination_key
+from checkpoint import append_journal, load_journal, demand_hash
+from warm_start import job_signature, find_similar_job, new_job_dir, warm_start_kwargs, save_solved_job, prune_store
+from solver_config import solver_settings, allocate_threads
+from model_diagnostics import SolvePeakRss, build_diagnostics, check_memory_budget, release_network, peak_rss_mb
+from large_scale import LARGE_SCALE_PRESET, POLISH_OPTIONS, first_order_options, solve_first_order
+from rolling_horizon import DEFAULT_OVERLAP, DEFAULT_WINDOW, rolling_dispatch
+from capacity_surrogate import build_capacity_surrogate
+from run_options import CacheOptions, ModeOptions, ParallelOptions, SolverOptions, as_options
 import gurobipy as gp
 import logging
+import shutil
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
+traceback_logger = logging.getLogger('django')
 logger = logging.getLogger('debug_logger')  # Use the new debug logger
 
+# Cost (INR/MWh) of missing the DO or curtailment limit when validating coarse capacities at full resolution
+VALIDATION_SLACK_PENALTY = 1e6
 
-def optimization_model(input_data, consumer_demand_path=None, hourly_demand=None, re_replacement=None, valid_combinations=None, OA_cost=None, curtailment_selling_price=None, sell_curtailment_percentage=None, annual_curtailment_limit=None, peak_target=None, peak_hours=None):
-    
+
+def resample_to_resolution(series, rule):
+    """
+    Downsample a time series to a coarser resolution by averaging.
+
+    Parameters:
+    - series (pd.Series): Time series with a DatetimeIndex (MW or per unit).
+    - rule (str): Pandas offset alias of the target resolution, e.g. '3h' or '1D'.
+
+    Returns:
+    - tuple: (resampled series, snapshot durations in hours of the resampled index)
+    """
+    hours = snapshot_hours(series.index)
+    return series.resample(rule).mean(), hours.resample(rule).sum()
+
+
+def optimize_coarse_capacities(demand_data=None, solar_profile=None, resample=None, network_kwargs=None, model_kwargs=None, solve_kwargs=None,
+                               wind_profile=None):
+    """
+    Optimize capacities on demand and profiles downsampled to resample, for a fast first pass.
+
+    Returns:
+    - dict or None: Capacity (MW) of every extendable generator and storage unit by name, for
+      setup_network(fixed_capacities=...), or None if the coarse problem is not optimal or the solve
+      fails (the caller then optimizes at full resolution).
+    """
+    coarse_demand, coarse_hours = resample_to_resolution(demand_data, resample)
+    coarse_solar = resample_to_resolution(solar_profile, resample)[0] if solar_profile is not None else None
+    coarse_wind = resample_to_resolution(wind_profile, resample)[0] if wind_profile is not None else None
+    # Further renewable projects are averaged to the same resolution as the demand
+    coarse_kwargs = dict(network_kwargs, renewable_projects=map_profiles(
+        network_kwargs.get("renewable_projects"), lambda profile: resample_to_resolution(profile, resample)[0]))
+    network = setup_network(demand_data=coarse_demand, solar_profile=coarse_solar, wind_profile=coarse_wind,
+                            snapshot_weightings=coarse_hours, **coarse_kwargs)
+    optimize_network(network=network, solar_profile=coarse_solar, wind_profile=coarse_wind, demand_data=coarse_demand,
+                     **model_kwargs)
+    try:
+        status, condition = network.optimize.solve_model(**(solve_kwargs or {}))
+    except Exception as e:
+        tb = traceback.format_exc()  # Get the full traceback
+        traceback_logger.error(f"Exception: {str(e)}\nTraceback:\n{tb}")  # Log error with traceback
+        logger.debug(f"Coarse ({resample}) optimization failed: {e}")
+        return None
+    if condition != "optimal":
+        logger.debug(f"Coarse ({resample}) optimization returned '{condition}'.")
+        return None
+    capacities = {}
+    for components in (network.generators, network.storage_units):
+        extendable = components[components["p_nom_extendable"].astype(bool)]
+        capacities.update(extendable["p_nom_opt"].astype(float).to_dict())
+    return capacities
+
+
+def policy_shortfall(result=None, DO=None, annual_curtailment_limit=None):
+    """Percentage points by which a result misses the DO target or exceeds the curtailment limit."""
+    shortfall = 0.0
+    if DO is not None:
+        shortfall = max(shortfall, DO * 100 - result["Annual Demand Offset"])
+    if annual_curtailment_limit is not None:
+        shortfall = max(shortfall, result["Annual Curtailment"] - annual_curtailment_limit * 100)
+    return shortfall
+
+
+def dispatch_combination(ipp=None, solar_name=None, solar_profile=None, ess_name=None, demand_data=None,
+                         network_kwargs=None, model_kwargs=None, analysis_kwargs=None, capacities=None,
+                         solver_name=None, solver_threads=None, rolling_window=DEFAULT_WINDOW,
+                         rolling_overlap=DEFAULT_OVERLAP, solver_preset=None, wind_name=None, wind_profile=None):
+    """
+    Dispatch one combination with fixed capacities in rolling windows and analyze the stitched dispatch.
+
+    Parameters:
+    - capacities (dict): {"Solar", "Wind", "Battery"} capacities in MW, e.g. from capacities_from_results.
+    - rolling_window, rolling_overlap (str or int): Committed window and look-ahead, see window_bounds.
+    - solver_preset (str, optional): Preset of the window solves (not LARGE_SCALE_PRESET).
+    - Other parameters as in solve_combination.
+
+    Returns:
+    - dict or None: results_dict entry, or None if the combination could not be dispatched
+    """
+    results_dict = {}
+    key = combination_key(ipp_name=ipp, solar_name=solar_name, wind_name=wind_name, ess_name=ess_name)
+    # Default simplex: every window restarts from the previous window's basis
+    solver_name, solver_options = solver_settings(solver_preset, solver_name, solver_threads)
+    try:
+        with SolvePeakRss() as rss:
+            network, windows = rolling_dispatch(demand_data=demand_data, solar_profile=solar_profile,
+                                                wind_profile=wind_profile, capacities=capacities, network_kwargs=network_kwargs,
+                                                model_kwargs=model_kwargs, window=rolling_window,
+                                                overlap=rolling_overlap,
+                                                solve_kwargs={"solver_name": solver_name, **solver_options})
+    except ValueError as e:
+        logger.debug(f"{key} - rolling dispatch failed: {e}")
+        return None
+    # Window solves carry no duals of the annual problem, so no sensitivity report
+    analyze_network_results(network=network, solar_profile=solar_profile, wind_profile=wind_profile,
+                            results_dict=results_dict, ess_name=ess_name, solar_name=solar_name,
+                            wind_name=wind_name, ipp_name=ipp, solve=False, **dict(analysis_kwargs, report_duals=False))
+    release_network(network)
+    if key not in results_dict:
+        return None
+    result = results_dict[key]
+    result["Solve Time (s)"] = float(windows["Solve Time (s)"].sum())
+    result["Rolling Windows"] = len(windows)
+    result["Dispatch Mode"] = f"rolling {rolling_window}/{rolling_overlap}"
+    result["Policy Shortfall (pp)"] = policy_shortfall(result, model_kwargs["DO"],
+                                                       model_kwargs["annual_curtailment_limit"])
+    result["Solver"] = solver_name
+    result["Solver Preset"] = solver_preset or "default"
+    result["Model Diagnostics"] = {"Solve Peak RSS (MB)": rss.peak_mb, "Process Peak RSS (MB)": peak_rss_mb()}
+    return result
+
+
+def solve_combination(ipp=None, solar_name=None, solar_profile=None, wind_name=None, wind_profile=None,
+                      ess_name=None, demand_data=None,
+                      network_kwargs=None, model_kwargs=None, analysis_kwargs=None, signature_kwargs=None,
+                      solver=None, mode=None, cache=None, solver_threads=None, memory_budget_mb=None):
+    """
+    Build, solve and analyze one IPP technology combination.
+
+    Self-contained so that optimization_model can run it in a worker process.
+
+    Parameters:
+    - network_kwargs (dict): Arguments of setup_network for the combination.
+    - model_kwargs (dict): Arguments of optimize_network for the combination.
+    - analysis_kwargs (dict): Cost and reporting arguments of analyze_network_results.
+    - signature_kwargs (dict): Scalar inputs hashed into the warm-start job signature.
+    - solver (SolverOptions, optional): Solver preset, name, large-scale polish and first-order limits.
+    - mode (ModeOptions, optional): Resampling, operational (rolling dispatch, see dispatch_combination)
+      or capacity-grid mode (see build_capacity_surrogate).
+    - cache (CacheOptions, optional): Warm-start store (the journal is handled by optimization_model).
+    - solver_threads (int, optional): Threads of this combination's solver.
+    - memory_budget_mb (float, optional): Warn before solving if the process is expected to exceed it.
+
+    Returns:
+    - tuple: (combination key, results_dict entry or None if the combination could not be solved;
+      a CapacitySurrogate with capacity_grid)
+    """
+    solver, mode, cache = SolverOptions() if solver is None else solver, ModeOptions() if mode is None else mode, \
+        CacheOptions() if cache is None else cache
+    solver_preset, solver_name, polish = solver.preset, solver.name, solver.polish
+    resample, resample_tolerance, capacity_grid = mode.resample, mode.resample_tolerance, mode.capacity_grid
+    warm_start_dir, warm_start_tolerance = cache.warm_start_dir, cache.warm_start_tolerance
+    results_dict = {}
+    key = combination_key(ipp_name=ipp, solar_name=solar_name, wind_name=wind_name, ess_name=ess_name)
+    operational_capacities = (mode.operational_capacities or {}).get(key)
+    if operational_capacities is not None:
+        ignored = [option for option, value in (("warm start", warm_start_dir), ("resampling", resample),
+                                                ("the large-scale preset", solver_preset == LARGE_SCALE_PRESET or None))
+                   if value is not None]
+        if ignored:
+            logger.warning(f"{key} - {', '.join(ignored)} not used in rolling dispatch.")
+        return key, dispatch_combination(ipp, solar_name, solar_profile, ess_name, demand_data, network_kwargs,
+                                         model_kwargs, analysis_kwargs, operational_capacities, solver_name,
+                                         solver_threads, mode.rolling_window, mode.rolling_overlap,
+                                         None if solver_preset == LARGE_SCALE_PRESET else solver_preset,
+                                         wind_name, wind_profile)
+    if capacity_grid is not None:
+        ignored = [option for option, value in (("warm start", warm_start_dir), ("resampling", resample),
+                                                ("solver preset", solver_preset)) if value is not None]
+        if ignored:
+            logger.warning(f"{key} - {', '.join(ignored)} not used for the capacity grid.")
+        # Default simplex as in the rolling dispatch: many small fixed-capacity solves
+        solver_name, solver_options = solver_settings(None, solver_name, solver_threads)
+        return key, build_capacity_surrogate(
+            demand_data=demand_data, solar_profile=solar_profile, wind_profile=wind_profile,
+            network_kwargs=network_kwargs,
+            model_kwargs=model_kwargs, analysis_kwargs=analysis_kwargs, ipp_name=ipp,
+            solar_capacities=capacity_grid.get("Solar"), wind_capacities=capacity_grid.get("Wind"),
+            battery_capacities=capacity_grid.get("Battery"),
+            solve_kwargs={"solver_name": solver_name, **solver_options})
+    solver_name, solver_options = solver_settings(solver_preset, solver_name, solver_threads)
+    large_scale = solver_preset == LARGE_SCALE_PRESET
+    if large_scale:
+        solver_options.update(first_order_options(solver_name, **solver.first_order_limits()))
+        if warm_start_dir is not None or resample is not None:
+            # A first-order solve neither uses a simplex basis nor needs a coarse first pass
+            logger.debug(f"{key} - warm start and resampling are not used in large-scale mode.")
+            warm_start_dir = resample = None
+    solve_kwargs = {"solver_name": solver_name, **solver_options}
+
+    # Sampled RSS peak of this combination's builds and solves; the process peak (ru_maxrss) only grows
+    # over a serial run
+    with SolvePeakRss() as rss:
+        # Resampling mode: choose capacities on coarse data, then only re-solve the dispatch at full resolution
+        fixed_capacities = None
+        if resample is not None:
+            fixed_capacities = optimize_coarse_capacities(demand_data, solar_profile, resample, network_kwargs,
+                                                          model_kwargs, solve_kwargs, wind_profile)
+
+        network = setup_network(demand_data=demand_data, solar_profile=solar_profile, wind_profile=wind_profile,
+                                fixed_capacities=fixed_capacities, **network_kwargs)
+        m = optimize_network(network=network, solar_profile=solar_profile, wind_profile=wind_profile,
+                             demand_data=demand_data,
+                             policy_slack_penalty=VALIDATION_SLACK_PENALTY if fixed_capacities else None,
+                             **model_kwargs)
+        diagnostics = build_diagnostics(network, m)
+        check_memory_budget(diagnostics, memory_budget_mb, key)
+
+        # Warm start from the basis of a previously solved job with nearly the same demand
+        if warm_start_dir is not None:
+            signature = job_signature(profiles={'Solar': solar_profile, 'Wind': wind_profile}, key=key,
+                                      n_snapshots=len(demand_data), resample=resample, **signature_kwargs)
+            similar_job = find_similar_job(warm_start_dir, signature, demand_data, warm_start_tolerance)
+            job_dir = new_job_dir(warm_start_dir)
+            solve_kwargs.update(warm_start_kwargs(similar_job, job_dir, solver_name, solver_options))
+
+        if large_scale:
+            # First-order solve for the capacities, then an exact simplex re-solve of the dispatch with them fixed
+            capacities, first_order_time, consistent = solve_first_order(network, solve_kwargs)
+            if not polish and capacities is not None and not consistent:
+                logger.debug(f"{key} - first-order dispatch failed the row check, polishing instead.")
+            polished = capacities is not None and (polish or not consistent)
+            if polished:
+                release_network(network)
+                network = setup_network(demand_data=demand_data, solar_profile=solar_profile, wind_profile=wind_profile,
+                                        fixed_capacities=capacities, **network_kwargs)
+                m = optimize_network(network=network, solar_profile=solar_profile, wind_profile=wind_profile,
+                                     demand_data=demand_data, policy_slack_penalty=VALIDATION_SLACK_PENALTY,
+                                     **model_kwargs)
+                _, polish_options = solver_settings(None, solver_name, solver_threads, POLISH_OPTIONS[solver_name])
+                analyze_network_results(network=network, solar_profile=solar_profile, wind_profile=wind_profile,
+                                        results_dict=results_dict, ess_name=ess_name, solar_name=solar_name,
+                                        wind_name=wind_name, ipp_name=ipp,
+                                        solve_kwargs={"solver_name": solver_name, **polish_options}, **analysis_kwargs)
+            elif consistent:
+                # Unpolished first-order point: no duals are mapped, so no sensitivity report
+                analyze_network_results(network=network, solar_profile=solar_profile, wind_profile=wind_profile,
+                                        results_dict=results_dict, ess_name=ess_name, solar_name=solar_name,
+                                        wind_name=wind_name, ipp_name=ipp, solve=False,
+                                        **dict(analysis_kwargs, report_duals=False))
+            else:
+                # No usable first-order point (e.g. iteration or time limit hit early): solve the model exactly
+                logger.debug(f"{key} - first-order solve found no feasible point, solving with the default method.")
+                _, exact_options = solver_settings(None, solver_name, solver_threads)
+                analyze_network_results(network=network, solar_profile=solar_profile, wind_profile=wind_profile,
+                                        results_dict=results_dict, ess_name=ess_name, solar_name=solar_name,
+                                        wind_name=wind_name, ipp_name=ipp,
+                                        solve_kwargs={"solver_name": solver_name, **exact_options}, **analysis_kwargs)
+            if key in results_dict:
+                results_dict[key]["First-Order Solve Time (s)"] = first_order_time
+                results_dict[key]["Solve Time (s)"] += first_order_time
+                results_dict[key]["Polished"] = polished
+                if polished:
+                    results_dict[key]["Polish Shortfall (pp)"] = policy_shortfall(
+                        results_dict[key], model_kwargs["DO"], model_kwargs["annual_curtailment_limit"])
+        else:
+            analyze_network_results(network=network, solar_profile=solar_profile, wind_profile=wind_profile,
+                                    results_dict=results_dict, ess_name=ess_name, solar_name=solar_name,
+                                    wind_name=wind_name, ipp_name=ipp,
+                                    solve_kwargs=solve_kwargs, **analysis_kwargs)
+        # Results are extracted: free the model and solver before the next build
+        release_network(network)
+        del m
+
+        if resample is not None:
+            if fixed_capacities is None:
+                resolution = "full (coarse optimization not optimal)"
+            elif key not in results_dict or policy_shortfall(results_dict[key], model_kwargs["DO"], model_kwargs["annual_curtailment_limit"]) > resample_tolerance:
+                # Coarse capacities miss DO/curtailment limits at full resolution by more than
+                # resample_tolerance percentage points: optimize at full resolution instead
+                logger.debug(f"{key} - {resample} capacities failed full-resolution validation, re-optimizing.")
+                results_dict.pop(key, None)
+                network = setup_network(demand_data=demand_data, solar_profile=solar_profile, wind_profile=wind_profile, **network_kwargs)
+                m = optimize_network(network=network, solar_profile=solar_profile, wind_profile=wind_profile, demand_data=demand_data, **model_kwargs)
+                diagnostics = build_diagnostics(network, m)
+                check_memory_budget(diagnostics, memory_budget_mb, key)
+                analyze_network_results(network=network, solar_profile=solar_profile, wind_profile=wind_profile,
+                                        results_dict=results_dict, ess_name=ess_name, solar_name=solar_name,
+                                        wind_name=wind_name, ipp_name=ipp,
+                                        solve_kwargs={"solver_name": solver_name, **solver_options}, **analysis_kwargs)
+                release_network(network)
+                del m
+                resolution = "full (coarse capacities failed validation)"
+            else:
+                shortfall = policy_shortfall(results_dict[key], model_kwargs["DO"], model_kwargs["annual_curtailment_limit"])
+                resolution = f"{resample} (validated at full resolution, shortfall {shortfall:.2f} pp)"
+            if key in results_dict:
+                results_dict[key]["Capacity Resolution"] = resolution
+
+    if warm_start_dir is not None:
+        if key in results_dict:
+            save_solved_job(job_dir, signature, demand_data, key, similar_job["job"] if similar_job else None)
+            results_dict[key]["Warm Start Job"] = similar_job["job"] if similar_job else None
+        else:
+            shutil.rmtree(job_dir, ignore_errors=True)
+
+    if key in results_dict:
+        results_dict[key]["Solver"] = solver_name
+        results_dict[key]["Solver Preset"] = solver_preset or "default"
+        diagnostics["Solve Peak RSS (MB)"] = rss.peak_mb
+        # Lifetime peak of the process: in a serial run the maximum over all combinations so far
+        diagnostics["Process Peak RSS (MB)"] = peak_rss_mb()
+        results_dict[key]["Model Diagnostics"] = diagnostics
+    return key, results_dict.get(key)
+
+
+def optimization_model(input_data, consumer_demand_path=None, hourly_demand=None, re_replacement=None, valid_combinations=None, OA_cost=None, curtailment_selling_price=None, sell_curtailment_percentage=None, annual_curtailment_limit=None, peak_target=None, peak_hours=None, report_duals=False, freq='h', start='2022-01-01', export_excel=True, solver=None, parallelism=None, mode=None, cache=None):
+    """
+    Optimize every IPP technology combination of input_data and rank them by per-unit cost.
+    Combinations pair one solar and/or wind project with one ESS project, or one solar with one wind project.
+
+    Execution options are grouped (see run_options); each group is an options object or a dict of its
+    fields, and None keeps its defaults:
+    - solver (SolverOptions): preset, name, polish, first_order_tolerance/iteration_limit/time_limit.
+    - parallelism (ParallelOptions): n_workers, total_threads, memory_budget_mb.
+    - mode (ModeOptions): resample, resample_tolerance, operational_capacities, rolling_window,
+      rolling_overlap, capacity_grid.
+    - cache (CacheOptions): warm_start_dir, warm_start_tolerance, journal_path.
+
+    A combination whose solve raises (in a worker or serially) is logged and left out of the ranking.
+    """
+    solver = as_options(SolverOptions, solver)
+    parallelism = as_options(ParallelOptions, parallelism)
+    mode = as_options(ModeOptions, mode)
+    cache = as_options(CacheOptions, cache)
+    journal_path, warm_start_dir = cache.journal_path, cache.warm_start_dir
+    operational_capacities, capacity_grid = mode.operational_capacities, mode.capacity_grid
 
     ipp_name = None
     solar = None
@@ -21,89 +350,210 @@ def optimization_model(input_data, consumer_demand_path=None, hourly_demand=None
         demand_file = pd.read_excel(consumer_demand_path)
         # Use direct hourly data, ensure index is datetime
         if not isinstance(demand_file.index, pd.DatetimeIndex):
-            demand_file.index = pd.date_range(start='2022-01-01', periods=len(demand_file), freq='h')
+            demand_file.index = pd.date_range(start=start, periods=len(demand_file), freq=freq)
         demand_data = demand_file.squeeze()
     else:
         # Use direct hourly data from hourly_demand
         if not isinstance(hourly_demand.index, pd.DatetimeIndex):
-            hourly_demand.index = pd.date_range(start='2022-01-01', periods=len(hourly_demand), freq='h')
+            hourly_demand.index = pd.date_range(start=start, periods=len(hourly_demand), freq=freq)
         demand_data = hourly_demand.squeeze()
 
+    # Split the CPUs between parallel combinations and the solver threads of each one
+    workers, solver_threads = allocate_threads(parallelism.n_workers, parallelism.total_threads)
+    if workers == 1 and parallelism.n_workers is None and parallelism.total_threads is None:
+        solver_threads = None  # Serial run without explicit settings: leave threads to the solver
+    parallel = workers > 1
+
     # Use only user input (input_data) for the optimization
-    results_dict = {}
+    # Surrogates (capacity_grid) are not journaled
+    if capacity_grid is not None and journal_path is not None:
+        logger.warning("The journal is not used for the capacity grid.")
+        journal_path = None
+    # Combination key -> solve_combination arguments, in input order
+    jobs = {}
+    order = []
+    # Combination key -> signature of everything that determines its result, checked against the journal
+    journal_signatures = {}
     final_dict = input_data
     for ipp in final_dict:
         solar_projects = final_dict[ipp].get('Solar', {})
         wind_projects = final_dict[ipp].get('Wind', {})
         ess_projects = final_dict[ipp].get('ESS', {})
 
-        # Solar + Battery only (no wind)
-        if solar_projects and ess_projects and not wind_projects:
-            for solar_project in solar_projects:
-                solar_profile = solar_projects[solar_project]['profile']
+        # Solar + Battery, Wind + Battery, Solar + Wind + Battery and Solar + Wind, one project of each
+        # technology per combination; a solar or wind project alone is not evaluated
+        combinations = [(solar_name, wind_name, ess_name)
+                        for solar_name in [*solar_projects, None]
+                        for wind_name in [*wind_projects, None]
+                        for ess_name in [*ess_projects, None]
+                        if (solar_name or wind_name) and (ess_name or (solar_name and wind_name))]
+        for solar_name, wind_name, ess_name in combinations:
+            key = combination_key(ipp_name=ipp, solar_name=solar_name, wind_name=wind_name, ess_name=ess_name)
+            order.append(key)
+            # Operational mode: only combinations with given capacities are dispatched
+            if operational_capacities is not None and key not in operational_capacities:
+                logger.debug(f"{key} - no operational capacities given, skipping.")
+                continue
+
+            solar_profile = Solar_captialCost = Solar_marginalCost = Solar_maxCapacity = None
+            if solar_name is not None:
+                solar_profile = solar_projects[solar_name]['profile']
                 # Use direct hourly profile, ensure index matches demand_data
                 if not isinstance(solar_profile.index, pd.DatetimeIndex):
                     solar_profile.index = demand_data.index
-                Solar_captialCost = solar_projects[solar_project]['capital_cost']
-                Solar_marginalCost = solar_projects[solar_project]['marginal_cost']
-                Solar_maxCapacity = solar_projects[solar_project]['max_capacity']
-                solar_name = solar_project
-
-                for ess_system in ess_projects:
-                    Battery_captialCost = ess_projects[ess_system]['capital_cost']
-                    Battery_marginalCost = ess_projects[ess_system]['marginal_cost']
-                    Battery_Eff_store = ess_projects[ess_system]['efficiency']
-                    Battery_Eff_dispatch = ess_projects[ess_system]['efficiency']
-                    DoD = ess_projects[ess_system]['DoD']
-                    Battery_max_energy_capacity = ess_projects[ess_system].get('max_energy_capacity', None)  # Human-readable, for battery energy cap
-                    ess_name = ess_system
-
-                    network = setup_network(
-                        demand_data=demand_data,
-                        solar_profile=solar_profile,
-                        Solar_maxCapacity=Solar_maxCapacity,
-                        Solar_captialCost=Solar_captialCost,
-                        Solar_marginalCost=Solar_marginalCost,
-                        Battery_captialCost=Battery_captialCost,
-                        Battery_marginalCost=Battery_marginalCost,
-                        Battery_Eff_store=Battery_Eff_store,
-                        Battery_Eff_dispatch=Battery_Eff_dispatch,
-                        ess_name=ess_name,
-                        solar_name=solar_name,
-                        Battery_max_energy_capacity=Battery_max_energy_capacity  # Human-readable, for battery energy cap
-                    )
-
-                    m = optimize_network(
-                        network=network,
-                        solar_profile=solar_profile,
-                        demand_data=demand_data,
-                        Solar_maxCapacity=Solar_maxCapacity,
-                        Solar_captialCost=Solar_captialCost,
-                        Battery_captialCost=Battery_captialCost,
-                        Solar_marginalCost=Solar_marginalCost,
-                        Battery_marginalCost=Battery_marginalCost,
-                        sell_curtailment_percentage=sell_curtailment_percentage,
-                        curtailment_selling_price=curtailment_selling_price,
-                        DO=re_replacement/100 if re_replacement else 0.65,
-                        DoD=DoD,
-                        annual_curtailment_limit=annual_curtailment_limit,
-                        ess_name=ess_name,
-                        peak_target=peak_target,
-                        peak_hours=peak_hours,
-                        Battery_max_energy_capacity=Battery_max_energy_capacity  # Human-readable, for battery energy cap
-                    )
-
-                    analyze_network_results(
-                        network=network,
-                        sell_curtailment_percentage=sell_curtailment_percentage,
-                        curtailment_selling_price=curtailment_selling_price,
-                        solar_profile=solar_profile,
-                        results_dict=results_dict,
-                        OA_cost=OA_cost,
-                        ess_name=ess_name,
-                        solar_name=solar_name,
-                        ipp_name=ipp
-                    )
+                Solar_captialCost = solar_projects[solar_name]['capital_cost']
+                Solar_marginalCost = solar_projects[solar_name]['marginal_cost']
+                Solar_maxCapacity = solar_projects[solar_name]['max_capacity']
+
+            wind_profile = Wind_captialCost = Wind_marginalCost = Wind_maxCapacity = None
+            if wind_name is not None:
+                wind_profile = wind_projects[wind_name]['profile']
+                if not isinstance(wind_profile.index, pd.DatetimeIndex):
+                    wind_profile.index = demand_data.index
+                Wind_captialCost = wind_projects[wind_name]['capital_cost']
+                Wind_marginalCost = wind_projects[wind_name]['marginal_cost']
+                Wind_maxCapacity = wind_projects[wind_name]['max_capacity']
+
+            Battery_captialCost = Battery_marginalCost = Battery_Eff_store = Battery_Eff_dispatch = None
+            DoD = Battery_max_energy_capacity = None
+            if ess_name is not None:
+                Battery_captialCost = ess_projects[ess_name]['capital_cost']
+                Battery_marginalCost = ess_projects[ess_name]['marginal_cost']
+                Battery_Eff_store = ess_projects[ess_name]['efficiency']
+                Battery_Eff_dispatch = ess_projects[ess_name]['efficiency']
+                DoD = ess_projects[ess_name]['DoD']
+                Battery_max_energy_capacity = ess_projects[ess_name].get('max_energy_capacity', None)  # Human-readable, for battery energy cap
+
+            network_kwargs = dict(
+                Solar_maxCapacity=Solar_maxCapacity,
+                Solar_captialCost=Solar_captialCost,
+                Solar_marginalCost=Solar_marginalCost,
+                Wind_maxCapacity=Wind_maxCapacity,
+                Wind_captialCost=Wind_captialCost,
+                Wind_marginalCost=Wind_marginalCost,
+                Battery_captialCost=Battery_captialCost,
+                Battery_marginalCost=Battery_marginalCost,
+                Battery_Eff_store=Battery_Eff_store,
+                Battery_Eff_dispatch=Battery_Eff_dispatch,
+                ess_name=ess_name,
+                solar_name=solar_name,
+                wind_name=wind_name,
+                Battery_max_energy_capacity=Battery_max_energy_capacity  # Human-readable, for battery energy cap
+            )
+            model_kwargs = dict(
+                Solar_maxCapacity=Solar_maxCapacity,
+                Solar_captialCost=Solar_captialCost,
+                Wind_maxCapacity=Wind_maxCapacity,
+                Wind_captialCost=Wind_captialCost,
+                Battery_captialCost=Battery_captialCost,
+                Solar_marginalCost=Solar_marginalCost,
+                Wind_marginalCost=Wind_marginalCost,
+                Battery_marginalCost=Battery_marginalCost,
+                sell_curtailment_percentage=sell_curtailment_percentage,
+                curtailment_selling_price=curtailment_selling_price,
+                DO=re_replacement/100 if re_replacement else 0.65,
+                DoD=DoD,
+                annual_curtailment_limit=annual_curtailment_limit,
+                ess_name=ess_name,
+                peak_target=peak_target,
+                peak_hours=peak_hours,
+                Battery_max_energy_capacity=Battery_max_energy_capacity  # Human-readable, for battery energy cap
+            )
+            analysis_kwargs = dict(
+                sell_curtailment_percentage=sell_curtailment_percentage,
+                curtailment_selling_price=curtailment_selling_price,
+                OA_cost=OA_cost,
+                report_duals=report_duals,
+                # Parallel workers would overwrite each other's Excel exports
+                export_excel=export_excel and not parallel
+            )
+            signature_kwargs = dict(
+                Solar_maxCapacity=Solar_maxCapacity, Solar_captialCost=Solar_captialCost,
+                Solar_marginalCost=Solar_marginalCost, Wind_maxCapacity=Wind_maxCapacity,
+                Wind_captialCost=Wind_captialCost, Wind_marginalCost=Wind_marginalCost,
+                Battery_captialCost=Battery_captialCost,
+                Battery_marginalCost=Battery_marginalCost, Battery_Eff_store=Battery_Eff_store,
+                Battery_Eff_dispatch=Battery_Eff_dispatch, DoD=DoD,
+                Battery_max_energy_capacity=Battery_max_energy_capacity, re_replacement=re_replacement,
+                sell_curtailment_percentage=sell_curtailment_percentage,
+                curtailment_selling_price=curtailment_selling_price,
+                annual_curtailment_limit=annual_curtailment_limit,
+                peak_target=peak_target, peak_hours=peak_hours
+            )
+            jobs[key] = dict(
+                ipp=ipp, solar_name=solar_name, solar_profile=solar_profile, wind_name=wind_name,
+                wind_profile=wind_profile, ess_name=ess_name,
+                demand_data=demand_data, network_kwargs=network_kwargs, model_kwargs=model_kwargs,
+                analysis_kwargs=analysis_kwargs, signature_kwargs=signature_kwargs,
+                solver=solver, mode=mode, cache=cache, solver_threads=solver_threads,
+                # Parallel workers share the budget
+                memory_budget_mb=(parallelism.memory_budget_mb / workers
+                                  if parallelism.memory_budget_mb is not None else None)
+            )
+            journal_signatures[key] = job_signature(
+                profiles={'Solar': solar_profile, 'Wind': wind_profile}, key=key, n_snapshots=len(demand_data),
+                OA_cost=OA_cost, report_duals=report_duals, resample=mode.resample,
+                resample_tolerance=mode.resample_tolerance, solver_preset=solver.preset,
+                polish=solver.polish, first_order_limits=solver.first_order_limits(),
+                operational_capacities=(operational_capacities or {}).get(key),
+                rolling_window=mode.rolling_window, rolling_overlap=mode.rolling_overlap,
+                freq=freq, start=start, solver_name=solver.name, **signature_kwargs)
+
+    # Combinations already completed by an interrupted run with the same journal and the same inputs
+    # are not solved again
+    completed = {}
+    demand_digest = demand_hash(demand_data)
+    if journal_path is not None:
+        completed = load_journal(journal_path, journal_signatures, demand_digest)
+        for key in completed:
+            logger.debug(f"{key} - restored from journal, skipping optimization.")
+            jobs.pop(key, None)
+    solved = dict(completed)
+
+    # Combination key -> error of a combination whose solve raised; the other combinations still run
+    failures = {}
+
+    def record(key, result):
+        if result is not None:
+            solved[key] = result
+            if journal_path is not None:
+                append_journal(journal_path, key, result, journal_signatures[key], demand_digest)
+
+    def record_failure(key, error):
+        tb = traceback.format_exc()  # Get the full traceback (includes the worker's for parallel runs)
+        traceback_logger.error(f"Exception: {str(error)}\nTraceback:\n{tb}")  # Log error with traceback
+        logger.debug(f"{key} - failed: {error}")
+        failures[key] = f"{type(error).__name__}: {error}"
+
+    if parallel and len(jobs) > 1:
+        logger.debug(f"Solving {len(jobs)} combinations with {workers} workers x {solver_threads} solver threads.")
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            futures = {executor.submit(solve_combination, **job): key for key, job in jobs.items()}
+            for future in as_completed(futures):
+                try:
+                    key, result = future.result()
+                except Exception as e:
+                    record_failure(futures[future], e)
+                    continue
+                record(key, result)
+    else:
+        for key, job in jobs.items():
+            try:
+                record(*solve_combination(**job))
+            except Exception as e:
+                record_failure(key, e)
+    if failures:
+        logger.info(f"{len(failures)} of {len(jobs)} combinations failed: {failures}")
+
+    if warm_start_dir is not None:
+        # All workers are done with the store: evict the least recently used jobs
+        prune_store(warm_start_dir)
+
+    # Same order as a serial run, whatever order the workers finished in
+    results_dict = {key: solved[key] for key in order if key in solved}
+    if capacity_grid is not None and results_dict:
+        # Capacity-grid mode: one CapacitySurrogate per combination, to be queried rather than ranked
+        return results_dict
 
     # Convert results_dict to DataFrame for easy sorting
     if results_dict:
@@ -114,6 +564,7 @@ def optimization_model(input_data, consumer_demand_path=None, hourly_demand=None
         return sorted_dict
     else:
         return {"error": "The demand cannot be met by the IPPs",
+                "failures": failures,
                 "ipp": ipp_name,
                 "solar": solar,
                 "wind": wind,
@@ -0,0 +1,166 @@
+import gc
+import logging
+import os
+import sys
+import threading
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger('debug_logger')  # Use the new debug logger
+
+# Peak process memory added by building the solver matrices and solving with HiGHS, per constraint
+# nonzero. Measured on the Solar + ESS model at 8760 and 17520 snapshots (~770 B/nnz at both).
+SOLVE_BYTES_PER_NONZERO = 800
+
+MB = 2 ** 20
+
+
+# Interval (s) at which SolvePeakRss samples the resident set size
+RSS_SAMPLE_INTERVAL = 0.05
+
+
+def current_rss_mb():
+    """Resident set size of this process (MB), or None if it cannot be read."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / MB
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / MB
+    except (OSError, ValueError, AttributeError):
+        return peak_rss_mb()  # Upper bound without psutil or /proc
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process since it started (MB), or None if it cannot be read.
+
+    This is the lifetime peak: after several solves in one process it is the largest of them, not the
+    last one. Use SolvePeakRss for the peak of one solve.
+    """
+    if psutil is not None and sys.platform == "win32":
+        return psutil.Process().memory_info().peak_wset / MB
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak / MB if sys.platform == "darwin" else peak / 1024
+
+
+class SolvePeakRss:
+    """
+    Context manager sampling the resident set size in a background thread while its block runs.
+
+    HiGHS and Gurobi release the GIL while solving, so the sampler keeps running during the solve and
+    peak_mb is the peak of this block only, unlike peak_rss_mb. Allocations shorter than the sampling
+    interval can be missed.
+
+    Attributes:
+    - before_mb, after_mb, peak_mb (float or None): RSS when the block starts, when it ends and the
+      highest sample in between (MB); None if RSS cannot be read.
+    """
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.before_mb = self.after_mb = self.peak_mb = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _record(self):
+        rss = current_rss_mb()
+        if rss is not None:
+            self.peak_mb = rss if self.peak_mb is None else max(self.peak_mb, rss)
+        return rss
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self._record()
+
+    def __enter__(self):
+        self.before_mb = self._record()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.after_mb = self._record()
+        return False
+
+
+def network_memory_mb(network=None):
+    """Memory held by the static and time-series component tables of a PyPSA network (MB)."""
+    total = network.snapshot_weightings.memory_usage(deep=True).sum()
+    for component in network.iterate_components():
+        total += component.df.memory_usage(deep=True).sum()
+        for series in component.pnl.values():
+            total += series.memory_usage(deep=True).sum()
+    return total / MB
+
+
+def model_size(m=None):
+    """
+    Size of a linopy model built by optimize_network.
+
+    Parameters:
+    - m (linopy.Model): The model (network.model).
+
+    Returns:
+    - dict: Variables, Constraints, Nonzeros, Model Memory (MB) held by the linopy/xarray
+      datasets and the Estimated Solve Memory (MB) the solver will add on top.
+    """
+    nonzeros = sum(int((con.vars.values != -1).sum()) for _, con in m.constraints.items())
+    model_bytes = (sum(var.data.nbytes for _, var in m.variables.items())
+                   + sum(con.data.nbytes for _, con in m.constraints.items()))
+    return {
+        "Variables": int(m.nvars),
+        "Constraints": int(m.ncons),
+        "Nonzeros": nonzeros,
+        "Model Memory (MB)": model_bytes / MB,
+        "Estimated Solve Memory (MB)": nonzeros * SOLVE_BYTES_PER_NONZERO / MB,
+    }
+
+
+def build_diagnostics(network=None, m=None):
+    """model_size plus the network memory and current process memory, taken after the model is built."""
+    diagnostics = model_size(m)
+    diagnostics["Network Memory (MB)"] = network_memory_mb(network)
+    diagnostics["RSS Before Solve (MB)"] = current_rss_mb()
+    return diagnostics
+
+
+def check_memory_budget(diagnostics=None, memory_budget_mb=None, key=None):
+    """
+    Warn before solving if the process is expected to exceed memory_budget_mb.
+
+    Parameters:
+    - diagnostics (dict): Output of build_diagnostics.
+    - memory_budget_mb (float, optional): Memory budget of the process; no check if None.
+    - key (str, optional): Combination key for the log message.
+
+    Returns:
+    - bool: True if the expected peak fits in the budget (or no budget is set).
+    """
+    if memory_budget_mb is None:
+        return True
+    expected = (diagnostics["RSS Before Solve (MB)"] or 0) + diagnostics["Estimated Solve Memory (MB)"]
+    diagnostics["Expected Peak Memory (MB)"] = expected
+    if expected > memory_budget_mb:
+        logger.warning(f"{key} - expected peak memory {expected:.0f} MB exceeds the budget of "
+                       f"{memory_budget_mb:.0f} MB ({diagnostics['Nonzeros']} nonzeros).")
+        return False
+    return True
+
+
+def release_network(network=None):
+    """Drop the linopy model held by a solved network and collect it, returning its memory promptly."""
+    if network is not None and getattr(network, "model", None) is not None:
+        network.model = None
+    gc.collect()
@@ -1,159 +1,279 @@
+import logging
+import re
+from pathlib import Path
 
+import numpy as np
 import pandas as pd
-import re
-def preprocess_multiple_profiles():
-
-    # The following code is commented out to disable loading profiles from the input folder.
-    # solar_df=pd.read_excel(r"inputs/Profiles.xlsx", sheet_name="Solar")
-    # wind_df=pd.read_excel(r"inputs/Profiles.xlsx", sheet_name="Wind")
-    # solar_df_cleaned = solar_df.drop(solar_df.columns[0], axis=1)
-    # wind_df_cleaned = wind_df.drop(wind_df.columns[0], axis=1)
-    # solar_df_cleaned=solar_df_cleaned[2:].reset_index(drop=True)
-    # wind_df_cleaned=wind_df_cleaned[2:].reset_index(drop=True)
-    # # Set the first row as the column header for solar_df_cleaned
-    # solar_df_cleaned.columns = solar_df_cleaned.iloc[0]
-    # solar_df_cleaned = solar_df_cleaned[1:]  # Remove the first row (now the header)
-    # # Set the first row as the column header for wind_df_cleaned
-    # wind_df_cleaned.columns = wind_df_cleaned.iloc[0]
-    # wind_df_cleaned = wind_df_cleaned[1:]
-    # solar_df_cleaned = solar_df_cleaned.reset_index(drop=True)
-    # wind_df_cleaned = wind_df_cleaned.reset_index(drop=True)
-    # Project-specific parameters
-        parameters = {
-            'Solar': {
-                'IPP1_Project1': {
-                    'max_capacity': 200,
-                    'capital_cost': 0,
-                    'marginal_cost': 2800,
-                },
-                'IPP2_Project1': {
-                    'max_capacity': 130,
-                    'capital_cost': 0,
-                    'marginal_cost': 2700,
-
-                },
-                'IPP3_Project1': {
-                    'max_capacity': 150,
-                    'capital_cost': 0,
-                    'marginal_cost': 2900,
-
-                },
-                'IPP1_Project2': {
-                    'max_capacity': 110,
-                    'capital_cost': 0,
-                    'marginal_cost': 2850,
-
-                }
-            },
-            'Wind': {
-                'IPP1_Project1': {
-                    'max_capacity': 200,
-                    'capital_cost': 0,
-                    'marginal_cost': 3400
-                },
-                'IPP2_Project1': {
-                    'max_capacity': 190,
-                    'capital_cost': 0,
-                    'marginal_cost': 3300
-                },
-                'IPP3_Project1': {
-                    'max_capacity': 150,
-                    'capital_cost': 0,
-                    'marginal_cost': 3500
-                },
-                'IPP1_Project2': {
-                    'max_capacity': 180,
-                    'capital_cost': 0,
-                    'marginal_cost': 3500
-                }
-            },
-            'ESS': {
-                    'IPP1_ESS1': {
-                        'capital_cost': 18000000,
-                        'marginal_cost': 60,
-                        'efficiency': 0.95,
-                        'DoD': 0.80
-                        },
-                    'IPP2_ESS1': {
-                        'capital_cost': 18000000,
-                        'marginal_cost': 62,
-                        'efficiency': 0.95,
-                        'DoD': 0.80
-                    },
-                    'IPP3_ESS1': {
-                        'capital_cost': 18000000,
-                        'marginal_cost': 55,
-                        'efficiency': 0.95,
-                        'DoD': 0.80
-                    },
-                    'IPP1_ESS2': {
-                        'capital_cost': 18000000,
-                        'marginal_cost': 50,
-                        'efficiency': 0.95,
-                        'DoD': 0.80
-                    },
-                    'IPP3_ESS2': {
-                        'capital_cost': 18000000,
-                        'marginal_cost': 52,
-                        'efficiency': 0.95,
-                        'DoD': 0.80
-                    }
-
-                    
+
+logger = logging.getLogger('debug_logger')  # Use the new debug logger
+
+# Profile column names: "<Technology>_<IPP>_Project<n>", e.g. "Solar_IPP1_Project2"
+PROFILE_COLUMN = r'^(?P<technology>[A-Za-z]+)_(?P<ipp>IPP\d+)_Project(?P<project>\d+)$'
+ESS_KEY = re.compile(r'^(IPP\d+)_ESS(\d+)$')
+
+# Rows read per chunk from CSV catalogues
+CHUNK_ROWS = 100_000
+
+# Profiles are per unit (0-1), so single precision is ample and halves the catalogue in memory
+PROFILE_DTYPE = np.float32
+
+# Example of the project parameters expected by preprocess_multiple_profiles, keyed like the columns
+EXAMPLE_PARAMETERS = {
+    'Solar': {
+        'IPP1_Project1': {'max_capacity': 200, 'capital_cost': 0, 'marginal_cost': 2800},
+        'IPP2_Project1': {'max_capacity': 130, 'capital_cost': 0, 'marginal_cost': 2700},
+        'IPP3_Project1': {'max_capacity': 150, 'capital_cost': 0, 'marginal_cost': 2900},
+        'IPP1_Project2': {'max_capacity': 110, 'capital_cost': 0, 'marginal_cost': 2850},
+    },
+    'Wind': {
+        'IPP1_Project1': {'max_capacity': 200, 'capital_cost': 0, 'marginal_cost': 3400},
+        'IPP2_Project1': {'max_capacity': 190, 'capital_cost': 0, 'marginal_cost': 3300},
+        'IPP3_Project1': {'max_capacity': 150, 'capital_cost': 0, 'marginal_cost': 3500},
+        'IPP1_Project2': {'max_capacity': 180, 'capital_cost': 0, 'marginal_cost': 3500},
+    },
+    'ESS': {
+        'IPP1_ESS1': {'capital_cost': 18000000, 'marginal_cost': 60, 'efficiency': 0.95, 'DoD': 0.80},
+        'IPP2_ESS1': {'capital_cost': 18000000, 'marginal_cost': 62, 'efficiency': 0.95, 'DoD': 0.80},
+        'IPP3_ESS1': {'capital_cost': 18000000, 'marginal_cost': 55, 'efficiency': 0.95, 'DoD': 0.80},
+        'IPP1_ESS2': {'capital_cost': 18000000, 'marginal_cost': 50, 'efficiency': 0.95, 'DoD': 0.80},
+        'IPP3_ESS2': {'capital_cost': 18000000, 'marginal_cost': 52, 'efficiency': 0.95, 'DoD': 0.80},
+    },
+}
+
+
+def parse_profile_columns(columns=None):
+    """
+    Parse "<Technology>_<IPP>_Project<n>" column names in one vectorized pass.
+
+    Parameters:
+    - columns (iterable): Column names of a profile sheet or CSV file.
+
+    Returns:
+    - pd.DataFrame: One row per matching column (index: column name) with "technology", "ipp",
+      "project" and "project_key" ("<IPP>_Project<n>", the key of the parameters dict).
+    """
+    names = pd.Index([str(column).strip() for column in columns])
+    parsed = names.str.extract(PROFILE_COLUMN)
+    parsed.index = names
+    matched = parsed.dropna().copy()
+    skipped = names[parsed["ipp"].isna()]
+    if len(skipped):
+        logger.debug(f"Ignoring {len(skipped)} column(s) without a Tech_IPPn_Projectm name: {list(skipped)}")
+    matched["project_key"] = matched["ipp"] + "_Project" + matched["project"]
+    return matched
+
+
+def _count_rows(path):
+    """Number of lines after the header of a text file, an upper bound of its CSV rows."""
+    with open(path, "rb") as f:
+        return max(sum(1 for _ in f) - 1, 0)
+
+
+def _read_csv(path, index_col=None, chunk_rows=CHUNK_ROWS):
+    """Read the profile columns of a CSV file chunk by chunk into one preallocated column-major block."""
+    header = pd.read_csv(path, nrows=0).columns
+    columns = parse_profile_columns(header)
+    profile_columns = list(header[header.str.strip().isin(columns.index)])
+    usecols = profile_columns if index_col is None else [index_col] + profile_columns
+    n_rows = _count_rows(path)
+    block = np.empty((n_rows, len(columns)), dtype=PROFILE_DTYPE, order='F')
+    index = np.empty(n_rows, dtype=object) if index_col is not None else None
+    filled = 0
+    for chunk in pd.read_csv(path, usecols=usecols, chunksize=chunk_rows):
+        rows = slice(filled, filled + len(chunk))
+        if index_col is not None:
+            index[rows] = chunk[index_col].to_numpy()
+        block[rows] = chunk[profile_columns].to_numpy(dtype=PROFILE_DTYPE)
+        filled += len(chunk)
+    if filled < n_rows:
+        # Blank lines were counted but not read
+        block, index = np.asfortranarray(block[:filled]), (index[:filled] if index is not None else None)
+    return block, columns, index
+
+
+def _read_excel(path, sheet_name=None, index_col=None):
+    """Read the profile columns of every sheet (or the given sheets) of a workbook into one preallocated column-major block."""
+    sheets = pd.read_excel(path, sheet_name=sheet_name)
+    if isinstance(sheets, pd.DataFrame):
+        sheets = {sheet_name: sheets}
+    parsed, index, n_rows = {}, None, None
+    for name, sheet in sheets.items():
+        sheet.columns = [str(column).strip() for column in sheet.columns]
+        columns = parse_profile_columns(sheet.columns)
+        if columns.empty:
+            logger.debug(f"Sheet '{name}' has no profile columns, skipping.")
+            continue
+        if index_col is not None and index is None:
+            index = sheet[index_col].to_numpy()
+        if n_rows is not None and len(sheet) != n_rows:
+            raise ValueError(f"Sheet '{name}' has {len(sheet)} rows, expected {n_rows}.")
+        n_rows = len(sheet)
+        parsed[name] = columns
+    if not parsed:
+        return np.empty((0, 0), dtype=PROFILE_DTYPE, order='F'), parse_profile_columns([]), None
+    columns = pd.concat(parsed.values())
+    duplicated = columns.index[columns.index.duplicated()]
+    if len(duplicated):
+        raise ValueError(f"Profile columns appear on more than one sheet: {list(duplicated.unique())}")
+    # Each sheet fills its columns of one preallocated column-major block
+    block = np.empty((n_rows, len(columns)), dtype=PROFILE_DTYPE, order='F')
+    start = 0
+    for name, sheet_columns in parsed.items():
+        block[:, start:start + len(sheet_columns)] = sheets[name][list(sheet_columns.index)].to_numpy(dtype=PROFILE_DTYPE)
+        start += len(sheet_columns)
+    return block, columns, index
+
+
+def read_profile_table(profile_path=None, sheet_name=None, index_col=None, chunk_rows=CHUNK_ROWS):
+    """
+    Read all profile columns of a multi-sheet workbook or a CSV file once.
+
+    Only columns named "<Technology>_<IPP>_Project<n>" are kept (plus index_col), as one
+    PROFILE_DTYPE array in column-major order, so each profile is a contiguous slice and no
+    per-column DataFrames are held. The array is allocated once and CSV files are read into it in
+    chunks of chunk_rows rows.
+
+    Parameters:
+    - profile_path (str or Path): .xlsx/.xls workbook or .csv file.
+    - sheet_name (str or list, optional): Sheets to read (default: all sheets of a workbook).
+    - index_col (str, optional): Column with the timestamps of the rows.
+    - chunk_rows (int): Rows per chunk when reading a CSV file.
+
+    Returns:
+    - tuple: (values as a (rows, profiles) array, parse_profile_columns table in the same column order,
+      timestamps of the rows or None)
+    """
+    path = Path(profile_path)
+    if path.suffix.lower() == ".csv":
+        block, columns, index = _read_csv(path, index_col, chunk_rows)
+    else:
+        block, columns, index = _read_excel(path, sheet_name, index_col)
+    return block, columns, index
+
+
+def validate_profiles(values=None, columns=None, n_snapshots=None, fill_value=None):
+    """
+    Check profile length, missing values and the 0-1 per-unit range for all profiles at once.
+
+    Parameters:
+    - values (np.ndarray): (rows, profiles) array from read_profile_table, already aligned to the demand.
+    - columns (pd.DataFrame): parse_profile_columns table of the profiles.
+    - n_snapshots (int): Number of demand snapshots every profile must cover.
+    - fill_value (float, optional): Value replacing missing entries; missing entries are an error if None.
+
+    Returns:
+    - np.ndarray: The validated values (missing entries filled if fill_value is given).
+    """
+    problems = []
+    if values.shape[0] != n_snapshots:
+        problems.append(f"profiles have {values.shape[0]} rows, demand has {n_snapshots}")
+    missing = np.isnan(values)
+    missing_counts = missing.sum(axis=0)
+    if missing_counts.any():
+        names = columns.index[missing_counts > 0]
+        if fill_value is None:
+            problems.append(f"missing values in {dict(zip(names, missing_counts[missing_counts > 0].tolist()))}")
+        else:
+            logger.debug(f"Filling {int(missing_counts.sum())} missing profile values with {fill_value}: {list(names)}")
+            values[missing] = fill_value
+    with np.errstate(invalid='ignore'):
+        out_of_range = ((values < 0) | (values > 1)).any(axis=0)
+    if out_of_range.any():
+        problems.append(f"values outside 0-1 in {list(columns.index[out_of_range])}")
+    if problems:
+        raise ValueError("Invalid profiles: " + "; ".join(problems) + ".")
+    return values
+
+
+def align_profiles(values=None, index=None, demand_index=None):
+    """
+    Align profile rows to the demand snapshots.
+
+    With timestamps (index) the rows are reindexed to demand_index, so snapshots the profiles do not
+    cover become missing values for validate_profiles; without them the rows are taken in order.
+
+    Returns:
+    - np.ndarray: (len(demand_index), profiles) array when timestamps are given, otherwise values
+      unchanged. Rows that already match demand_index are returned without a copy.
+
+    Raises:
+    - ValueError: If the timestamps are not unique.
+    """
+    if index is None:
+        return values
+    timestamps = pd.DatetimeIndex(pd.to_datetime(index))
+    if not timestamps.is_unique:
+        raise ValueError(f"Profile timestamps are not unique: {list(timestamps[timestamps.duplicated()].unique()[:5])}")
+    positions = timestamps.get_indexer(demand_index)
+    if len(positions) == len(values) and np.array_equal(positions, np.arange(len(values))):
+        return values
+    aligned = np.full((len(demand_index), values.shape[1]), np.nan, dtype=values.dtype, order='F')
+    found = positions >= 0
+    aligned[found] = values[positions[found]]
+    return aligned
+
+
+def _ess_by_ipp(parameters=None):
+    """ESS parameters ("IPPn_ESSm" keys) grouped per IPP as {"ESS_m": details}."""
+    ess = {}
+    for name, details in (parameters or {}).get('ESS', {}).items():
+        match = ESS_KEY.match(name)
+        if match is None:
+            logger.debug(f"Ignoring ESS entry '{name}' without an IPPn_ESSm name.")
+            continue
+        ipp, number = match.groups()
+        ess.setdefault(ipp, {})[f"ESS_{number}"] = details
+    return ess
+
+
+def iter_profile_inputs(profile_path=None, demand_index=None, parameters=None, sheet_name=None, index_col=None,
+                        fill_value=None, chunk_rows=CHUNK_ROWS):
+    """
+    Read, validate and align a profile catalogue once, then yield the input_data entry of one IPP at a time.
+
+    Profiles are Series views on the single validated array, so an IPP's entry adds no copy of its
+    profiles; a caller that processes and drops each entry keeps memory at the size of that array.
+
+    Parameters:
+    - profile_path (str or Path): Workbook or CSV file with "<Technology>_<IPP>_Project<n>" columns.
+    - demand_index (pd.DatetimeIndex): Snapshots of the demand the profiles are aligned to.
+    - parameters (dict, optional): {"Solar"/"Wind": {"IPPn_Projectm": {"max_capacity", "capital_cost",
+      "marginal_cost"}}, "ESS": {"IPPn_ESSm": {...}}}, see EXAMPLE_PARAMETERS.
+    - sheet_name, index_col, chunk_rows: Passed to read_profile_table.
+    - fill_value (float, optional): Passed to validate_profiles.
+
+    Yields:
+    - tuple: (IPP name, {"Solar": {...}, "Wind": {...}, "ESS": {...}}) in the layout optimization_model expects.
+    """
+    parameters = parameters or {}
+    values, columns, index = read_profile_table(profile_path, sheet_name, index_col, chunk_rows)
+    values = validate_profiles(align_profiles(values, index, demand_index), columns, len(demand_index), fill_value)
+    ess = _ess_by_ipp(parameters)
+    positions = pd.Series(np.arange(len(columns)), index=columns.index)
+
+    for ipp, projects in columns.groupby("ipp", sort=False):
+        ipp_data = {"Solar": {}, "Wind": {}, "ESS": dict(ess.get(ipp, {}))}
+        for column, project in projects.iterrows():
+            technology = project["technology"]
+            project_params = parameters.get(technology, {}).get(project["project_key"], {})
+            ipp_data.setdefault(technology, {})[f"{technology}_{project['project']}"] = {
+                "profile": pd.Series(values[:, positions[column]], index=demand_index, name=column, copy=False),
+                "max_capacity": project_params.get("max_capacity"),
+                "capital_cost": project_params.get("capital_cost"),
+                "marginal_cost": project_params.get("marginal_cost"),
             }
-        }
-
-
-        #Create Dictionary
-        def extract_ipp_project(column_name):
-            match = re.match(r'(\w+)_(IPP\d+)_Project(\d+)', column_name)
-            if match:
-                return match.groups()  # Returns ("Technology", "IPP", "Project")
-            return None
-
-        def create_profile_dict(df, technology, parameters):
-            profile_dict = {}
-            for column in df.columns:
-                parsed = extract_ipp_project(column)
-                if parsed:
-                    tech, ipp, project = parsed
-                    project_key = f"{ipp}_Project{project}"
-                    if ipp not in profile_dict:
-                        profile_dict[ipp] = {"Solar": {}, "Wind": {},"ESS": {}}
-
-                    profile = df[column].fillna(0).reset_index(drop=True)  # Series of hourly data
-                    project_params = parameters[technology].get(project_key, {})
-                    project_dict = {
-                        "profile": profile,
-                        "max_capacity": project_params.get("max_capacity"),
-                        "capital_cost": project_params.get("capital_cost"),
-                        "marginal_cost": project_params.get("marginal_cost")
-                    }
-
-                    if technology == "Solar" and "ESS" in project_params:
-                        project_dict["ESS"] = project_params["ESS"]
-
-                    profile_dict[ipp][technology][f"{technology}_{project}"] = project_dict
-
-            return profile_dict
-        
-        def create_profile_dict_ess(technology,parameters):
-            ess_dict={}
-            for ess_projects,details in parameters['ESS'].items():
-                match = re.match(r'(IPP\d+)_ESS(\d+)', ess_projects)
-                ipp, project_no = match.groups()     
-                if ipp not in ess_dict:
-                  ess_dict[ipp] = {"ESS": {}}           
-                ess_dict[ipp][technology][f"{technology}_{project_no}"] = details
-
-            return ess_dict
-
-        ess_params = create_profile_dict_ess("ESS",parameters)
-
-        # Only use user input; do not process or return any profiles from files or hardcoded parameters.
-        return {}
-#             final_dict[ipp]["ESS"].update(data["ESS"])
-#         else:
-#             final_dict[ipp] = data
-
-#     return final_dict
+        yield ipp, ipp_data
+
+
+def preprocess_multiple_profiles(profile_path=None, demand_index=None, parameters=None, sheet_name=None, index_col=None,
+                                 fill_value=None, chunk_rows=CHUNK_ROWS):
+    """
+    Build the input_data dict of optimization_model from a profile catalogue in one pass.
+
+    See iter_profile_inputs for the parameters.
+
+    Returns:
+    - dict: IPP name -> {"Solar": {...}, "Wind": {...}, "ESS": {...}}
+    """
+    return dict(iter_profile_inputs(profile_path, demand_index, parameters, sheet_name, index_col,
+                                    fill_value, chunk_rows))
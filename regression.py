@@ -0,0 +1,217 @@
+import logging
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from main import optimization_model
+
+logger = logging.getLogger('debug_logger')  # Use the new debug logger
+
+REFERENCE_DIR = Path(__file__).resolve().parent
+DEMAND_FILE = "comparison demand.xlsx"
+SOLAR_FILE = "Solar for comparison.xlsx"
+SUMMARY_FILE = "optimization_annual_summary.xlsx"
+HOURLY_FILE = "optimization_hourly_results.xlsx"
+# Runtimes of every regression run, appended by the command line entry point
+RUNTIMES_FILE = "regression_runtimes.csv"
+
+# Inputs that reproduce the reference workbooks: one IPP with one solar profile and one battery
+GOLDEN_SOLAR = {"max_capacity": 1000, "capital_cost": 4.5e7, "marginal_cost": 150}
+GOLDEN_ESS = {"capital_cost": 2.5e6, "marginal_cost": 200, "efficiency": 0.97, "DoD": 0.8, "max_energy_capacity": 40}
+GOLDEN_SCENARIO = dict(re_replacement=45, OA_cost=1000, curtailment_selling_price=3000, sell_curtailment_percentage=0.5,
+                       annual_curtailment_limit=0.3, peak_target=0.9, peak_hours=[18, 19, 20, 21])
+
+# Annual summary column of the reference workbook -> results_dict key
+SUMMARY_COLUMNS = {
+    "Optimal Solar Capacity (MW)": "Optimal Solar Capacity (MW)",
+    "Optimal Wind Capacity (MW)": "Optimal Wind Capacity (MW)",
+    "Optimal Battery Capacity (MW)": "Optimal Battery Capacity (MW)",
+    "Per Unit Cost (INR/MWh)": "Per Unit Cost",
+    "Final Cost (INR)": "Final Cost",
+    "Total Cost (INR)": "Total Cost",
+    "Annual Demand Offset (%)": "Annual Demand Offset",
+    "Annual Demand Met (MWh)": "Annual Demand Met",
+    "Annual Curtailment (%)": "Annual Curtailment",
+    "Annual Generation (MWh)": "Annual Generation",
+    "Annual Demand (MWh)": "Annual Demand",
+    "Objective Aggregate Cost (INR)": "Objective Aggregate Cost",
+}
+
+# The dispatch of the reference is one of many optimal dispatches (e.g. charging while demand is unmet
+# costs the same as charging later), so hour-by-hour only the columns fixed by the capacities are
+# compared; the dispatch columns are compared on their annual totals.
+HOURLY_COLUMNS = ["Demand", "Generation", "Curtailment"]
+HOURLY_TOTAL_COLUMNS = ["Solar Allocation", "ESS Discharge", "ESS Charge", "Unmet demand",
+                        "Total Demand met by allocation"]
+
+# Relative tolerance of every compared quantity; absolute tolerance applies to values near zero
+SUMMARY_RTOL = 1e-4
+HOURLY_RTOL = 1e-4
+ATOL = 1e-3
+
+# Execution modes: optimization_model keyword arguments, the number of identical battery options
+# (two give the parallel mode two combinations to distribute) and a looser rtol for approximate modes.
+MODES = {
+    "serial": {"kwargs": {}},
+    "parallel": {"kwargs": {"parallelism": {"n_workers": 2, "total_threads": 2}}, "ess_copies": 2},
+    # Solved once to seed the warm-start store, then timed warm-started from the stored basis
+    "cached": {"kwargs": {}, "warm_start": True},
+    # Capacities chosen on 3-hour averages, dispatch re-solved at full resolution with them fixed
+    "aggregated": {"kwargs": {"mode": {"resample": "3h"}}, "rtol": 0.02},
+    "fast-path": {"kwargs": {"solver": {"preset": "fast-screen"}}},
+    "large-scale": {"kwargs": {"solver": {"preset": "large-scale"}}},
+}
+
+
+def load_reference(reference_dir=None):
+    """
+    Read the golden inputs and outputs.
+
+    Parameters:
+    - reference_dir (str or Path, optional): Directory holding the four workbooks (default: the repository).
+
+    Returns:
+    - tuple: (hourly demand DataFrame, solar profile Series, annual summary Series, hourly results DataFrame)
+    """
+    reference_dir = Path(reference_dir or REFERENCE_DIR)
+    demand = pd.read_excel(reference_dir / DEMAND_FILE)
+    solar_profile = pd.read_excel(reference_dir / SOLAR_FILE).squeeze()
+    summary = pd.read_excel(reference_dir / SUMMARY_FILE).iloc[0]
+    hourly = pd.read_excel(reference_dir / HOURLY_FILE, index_col=0)
+    return demand, solar_profile, summary, hourly
+
+
+def golden_input_data(solar_profile=None, ess_copies=1):
+    """input_data of optimization_model for the golden case, with ess_copies identical battery options."""
+    solar = dict(GOLDEN_SOLAR, profile=solar_profile.copy())
+    ess = {f"ESS_{i + 1}": dict(GOLDEN_ESS) for i in range(ess_copies)}
+    return {"IPP1": {"Solar": {"Solar_1": solar}, "ESS": ess}}
+
+
+def _mismatch(name, actual, expected, rtol, atol=ATOL):
+    """Failure message if actual differs from expected by more than atol + rtol * |expected|, else None."""
+    actual, expected = np.asarray(actual, dtype=float), np.asarray(expected, dtype=float)
+    if actual.shape != expected.shape:
+        return f"{name}: shape {actual.shape} != {expected.shape}"
+    error = np.abs(actual - expected)
+    allowed = atol + rtol * np.abs(expected)
+    if np.all(error <= allowed):
+        return None
+    worst = int(np.argmax(error - allowed))
+    return f"{name}: {actual.flat[worst]:.6g} != {expected.flat[worst]:.6g} (rtol {rtol:g})"
+
+
+def compare_to_reference(result=None, summary=None, hourly=None, rtol=None):
+    """
+    Compare one results_dict entry against the reference annual summary and hourly results.
+
+    Parameters:
+    - result (dict): results_dict entry returned by optimization_model.
+    - summary (pd.Series): Reference annual summary (row of optimization_annual_summary.xlsx).
+    - hourly (pd.DataFrame): Reference hourly results (optimization_hourly_results.xlsx).
+    - rtol (float, optional): Relative tolerance overriding SUMMARY_RTOL and HOURLY_RTOL.
+
+    Returns:
+    - list: Failure messages, empty if the result matches.
+    """
+    failures = []
+    for column, key in SUMMARY_COLUMNS.items():
+        failures.append(_mismatch(column, result[key], summary[column], rtol or SUMMARY_RTOL))
+    for column in HOURLY_COLUMNS:
+        failures.append(_mismatch(f"hourly {column}", result[column], hourly[column], rtol or HOURLY_RTOL))
+    for column in HOURLY_TOTAL_COLUMNS:
+        failures.append(_mismatch(f"total {column}", np.sum(result[column]), hourly[column].sum(),
+                                  rtol or HOURLY_RTOL))
+    return [failure for failure in failures if failure is not None]
+
+
+def run_mode(mode=None, demand=None, solar_profile=None, warm_start_dir=None):
+    """
+    Run optimization_model on the golden case in one execution mode.
+
+    Parameters:
+    - mode (str): Key of MODES.
+    - demand (pd.DataFrame): Hourly demand.
+    - solar_profile (pd.Series): Solar profile.
+    - warm_start_dir (str or Path, optional): Warm-start store of the cached mode.
+
+    Returns:
+    - tuple: (optimization_model result, runtime of the timed run in s)
+    """
+    spec = MODES[mode]
+    kwargs = dict(GOLDEN_SCENARIO, export_excel=False, **spec["kwargs"])
+
+    def run():
+        input_data = golden_input_data(solar_profile, spec.get("ess_copies", 1))
+        return optimization_model(input_data, hourly_demand=demand.copy(), **kwargs)
+
+    if spec.get("warm_start"):
+        kwargs["cache"] = {"warm_start_dir": warm_start_dir}
+        run()  # Seeds the store; the timed run below starts from its basis
+    start = time.perf_counter()
+    result = run()
+    return result, time.perf_counter() - start
+
+
+def run_regression(modes=None, reference_dir=None, runtimes_path=None):
+    """
+    Run the golden case under each execution mode, check it against the reference workbooks and time it.
+
+    Parameters:
+    - modes (list, optional): Keys of MODES (default: all).
+    - reference_dir (str or Path, optional): Directory holding the workbooks (default: the repository).
+    - runtimes_path (str or Path, optional): CSV file the runtimes are appended to (see save_runtimes).
+
+    Returns:
+    - pd.DataFrame: One row per mode with Runtime (s), Solve Time (s), Combinations, Passed and Failures.
+    """
+    demand, solar_profile, summary, hourly = load_reference(reference_dir)
+    rows = {}
+    for mode in modes or MODES:
+        spec = MODES[mode]
+        warm_start_dir = tempfile.mkdtemp(prefix="golden_warm_start_") if spec.get("warm_start") else None
+        try:
+            result, runtime = run_mode(mode, demand, solar_profile, warm_start_dir)
+        finally:
+            if warm_start_dir is not None:
+                shutil.rmtree(warm_start_dir, ignore_errors=True)
+        if "error" in result:
+            failures = [f"no result: {result['error']}"]
+            result, solve_time = {}, np.nan
+        else:
+            failures = [f"{key}: {failure}" for key, entry in result.items()
+                        for failure in compare_to_reference(entry, summary, hourly, spec.get("rtol"))]
+            solve_time = sum(entry["Solve Time (s)"] for entry in result.values())
+        rows[mode] = {"Runtime (s)": runtime, "Solve Time (s)": solve_time, "Combinations": len(result),
+                      "Passed": not failures, "Failures": failures}
+        logger.debug(f"Golden case, {mode}: {runtime:.1f} s, {'passed' if not failures else failures}")
+    report = pd.DataFrame.from_dict(rows, orient="index").rename_axis("Mode")
+    if runtimes_path is not None:
+        save_runtimes(report, runtimes_path)
+    return report
+
+
+def save_runtimes(report=None, runtimes_path=None):
+    """
+    Append the runtimes of a regression report to a CSV file, so they can be tracked across runs.
+
+    Parameters:
+    - report (pd.DataFrame): Output of run_regression.
+    - runtimes_path (str or Path): CSV file, created with a header if missing.
+    """
+    runtimes_path = Path(runtimes_path)
+    rows = report[["Runtime (s)", "Solve Time (s)", "Combinations", "Passed"]].reset_index()
+    rows.insert(0, "Timestamp", pd.Timestamp.now().isoformat(timespec="seconds"))
+    rows.to_csv(runtimes_path, mode="a", header=not runtimes_path.exists(), index=False)
+
+
+if __name__ == "__main__":
+    report = run_regression(sys.argv[1:] or None, runtimes_path=REFERENCE_DIR / RUNTIMES_FILE)
+    with pd.option_context("display.max_colwidth", None, "display.width", 200):
+        print(report)
+    sys.exit(0 if report["Passed"].all() else 1)
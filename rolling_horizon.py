@@ -0,0 +1,395 @@
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from setup_Components import map_profiles, setup_network, snapshot_hours
+from createModel import optimize_network
+
+logger = logging.getLogger('debug_logger')  # Use the new debug logger
+
+DEFAULT_WINDOW = "7D"
+DEFAULT_OVERLAP = "1D"
+
+# Cost (INR/MWh) of exceeding a window's share of the DO, peak or curtailment budget
+BUDGET_SLACK_PENALTY = 1e6
+
+# A window's allowance is capped at this multiple of its pro-rata share of the horizon budget, so budget
+# left unused by early windows does not pile up in the last ones (the last window of a year with little
+# curtailment would otherwise be allowed the whole annual curtailment budget)
+CARRY_OVER_LIMIT = 2.0
+
+# Cost (INR/MWh) that breaks ties in favour of leaving unmet demand to the look-ahead rather than the
+# committed snapshots: unmet demand is otherwise free, but only the committed part is charged to the budget
+COMMIT_TIE_BREAK = 1e-3
+
+# Window solves are small and many: no solver log per window
+QUIET_OPTIONS = {"highs": {"output_flag": False}, "gurobi": {"OutputFlag": 0}}
+
+
+def capacities_from_results(results=None):
+    """
+    Capacities chosen by a planning run, for optimization_model(mode={"operational_capacities": ...}).
+
+    Parameters:
+    - results (dict): Output of optimization_model (combination key -> results_dict entry).
+
+    Returns:
+    - dict: Combination key -> {"Solar", "Wind", "Battery"} capacities in MW.
+    """
+    return {key: {"Solar": result["Optimal Solar Capacity (MW)"], "Wind": result["Optimal Wind Capacity (MW)"],
+                  "Battery": result["Optimal Battery Capacity (MW)"]}
+            for key, result in results.items() if isinstance(result, dict)}
+
+
+def quiet_solve_kwargs(solve_kwargs=None):
+    """linopy solve arguments for many small re-solves: direct API and no solver log (default: HiGHS)."""
+    solve_kwargs = dict(solve_kwargs or {"solver_name": "highs"})
+    return {"io_api": "direct", **QUIET_OPTIONS.get(solve_kwargs["solver_name"], {}), **solve_kwargs}
+
+
+def _steps(length, snapshots):
+    """Number of snapshots in a window length given as an int or a pandas offset such as '7D'."""
+    if isinstance(length, (int, np.integer)):
+        return int(length)
+    step = pd.Timedelta(hours=float(snapshot_hours(snapshots).iloc[0]))
+    return max(1, int(pd.Timedelta(length) / step))
+
+
+def window_bounds(snapshots=None, window=DEFAULT_WINDOW, overlap=DEFAULT_OVERLAP):
+    """
+    Positions of the rolling windows over snapshots.
+
+    Parameters:
+    - snapshots (pd.DatetimeIndex): Full horizon.
+    - window (str or int): Snapshots committed per window (pandas offset or count).
+    - overlap (str or int): Look-ahead solved with each window but committed by the next one.
+
+    Returns:
+    - list: (start, commit_end, end) positions; snapshots[start:commit_end] are committed and
+      snapshots[start:end] are solved.
+    """
+    n, n_window, n_overlap = len(snapshots), _steps(window, snapshots), _steps(overlap, snapshots)
+    return [(start, min(start + n_window, n), min(start + n_window + n_overlap, n))
+            for start in range(0, n, n_window)]
+
+
+def change_row_bounds(highs=None, rows=None, lower=None, upper=None):
+    """
+    Set the bounds of many HiGHS rows, in one batched call where highspy has one; the basis is kept.
+
+    Parameters:
+    - highs (highspy.Highs): Solver holding the model.
+    - rows (np.ndarray): Row indices (int32).
+    - lower, upper (np.ndarray): New row bounds.
+    """
+    if hasattr(highs, "changeRowsBounds"):
+        highs.changeRowsBounds(len(rows), rows, lower, upper)
+        return
+    # highspy 1.8 only has the single-row update
+    for row, row_lower, row_upper in zip(rows.tolist(), lower.tolist(), upper.tolist()):
+        highs.changeRowBounds(row, row_lower, row_upper)
+
+
+class FixedCapacityModel:
+    """
+    A fixed-capacity network and model built once and re-solved for other data or capacities by
+    rewriting only the right-hand side (row bounds in HiGHS, which keeps the basis).
+    """
+
+    def __init__(self, demand=None, profiles=None, capacities=None, network_kwargs=None, model_kwargs=None,
+                 solve_kwargs=None, n_commit=None, hot_start=True):
+        # Further renewable projects are cut to the snapshots of this model, like the Solar and Wind profiles
+        network_kwargs = dict(network_kwargs, renewable_projects=map_profiles(
+            network_kwargs.get("renewable_projects"), lambda profile: profile.reindex(demand.index)))
+        self.network = setup_network(demand_data=demand, solar_profile=profiles.get("Solar"),
+                                     wind_profile=profiles.get("Wind"), fixed_capacities=capacities,
+                                     **network_kwargs)
+        self.model = optimize_network(network=self.network, solar_profile=profiles.get("Solar"),
+                                      wind_profile=profiles.get("Wind"), demand_data=demand,
+                                      policy_slack_penalty=BUDGET_SLACK_PENALTY, **model_kwargs)
+        # Rolling windows with a look-ahead: only the first n_commit snapshots are committed
+        if n_commit is not None and n_commit < len(demand):
+            committed_unmet = self.model.variables["Generator-p"].loc[demand.index[:n_commit], "Unmet_Demand"]
+            self.model.objective += COMMIT_TIE_BREAK * committed_unmet.sum()
+        self.solve_kwargs = solve_kwargs
+        # Without hot start every solve starts afresh with presolve, but from the model already in HiGHS
+        self.hot_start = hot_start
+        self._rhs = {}
+        self.highs = None
+        if solve_kwargs["solver_name"] == "highs":
+            matrices = self.model.matrices
+            self.rows = pd.Series(np.arange(len(matrices.clabels), dtype=np.int32), index=matrices.clabels)
+            self.cols = pd.Series(np.arange(len(matrices.vlabels)), index=matrices.vlabels)
+            self.highs = self.model.to_highspy()
+            for option, value in solve_kwargs.items():
+                if option not in ("solver_name", "io_api"):
+                    self.highs.setOptionValue(option, value)
+
+    def _set_rhs(self, name, values):
+        if name not in self.model.constraints:
+            return
+        con = self.model.constraints[name]
+        values = np.broadcast_to(values, con.rhs.shape)
+        # Unchanged rhs (e.g. the demand rows between capacity points) is not written again
+        if name in self._rhs and np.array_equal(self._rhs[name], values):
+            return
+        self._rhs[name] = values.copy()
+        if self.highs is None:
+            con.rhs = con.rhs.copy(data=values)
+            return
+        labels = np.ravel(con.labels.values)
+        present = labels != -1
+        rows = self.rows[labels[present]].to_numpy()
+        values = np.ravel(values)[present].astype(float)
+        sign = np.ravel(np.broadcast_to(con.sign.values, con.rhs.shape))[present]
+        lower = np.where(sign == "<=", -np.inf, values)
+        upper = np.where(sign == ">=", np.inf, values)
+        change_row_bounds(self.highs, rows, lower, upper)
+
+    def set_capacities(self, capacities=None):
+        """
+        Move the model to other fixed capacities; generator capacities enter through the available
+        generation passed to solve.
+
+        Parameters:
+        - capacities (dict): Generator ("Solar", "Wind" or a further project) or "Battery" name -> MW;
+          missing entries are 0.
+        """
+        generators = self.network.generators
+        renewables = generators.index.drop("Unmet_Demand")
+        generators.loc[renewables, "p_nom"] = [capacities.get(name, 0) for name in renewables]
+        if "Battery" in self.network.storage_units.index:
+            p_nom = capacities.get("Battery", 0)
+            self.network.storage_units.at["Battery", "p_nom"] = p_nom
+            p_max_pu = self.network.get_switchable_as_dense("StorageUnit", "p_max_pu")[["Battery"]].to_numpy()
+            p_min_pu = self.network.get_switchable_as_dense("StorageUnit", "p_min_pu")[["Battery"]].to_numpy()
+            max_hours = self.network.storage_units.at["Battery", "max_hours"]
+            self._set_rhs("StorageUnit-fix-p_dispatch-upper", p_max_pu * p_nom)
+            self._set_rhs("StorageUnit-fix-p_store-upper", -p_min_pu * p_nom)
+            self._set_rhs("StorageUnit-fix-state_of_charge-upper", np.full(p_max_pu.shape, max_hours * p_nom))
+
+    def _solution(self, name):
+        """Solution of one model variable as a DataFrame (snapshot x component)."""
+        var = self.model.variables[name]
+        if self.highs is None:
+            return var.solution.to_pandas()
+        values = self.highs.getSolution().col_value
+        labels = var.labels.to_pandas()
+        return pd.DataFrame(np.asarray(values)[self.cols[labels.to_numpy().ravel()].to_numpy()].reshape(labels.shape),
+                            index=labels.index, columns=labels.columns)
+
+    def solve(self, demand=None, available=None, soc_initial=None, budgets=None):
+        """
+        Solve the model for one window or capacity point.
+
+        Parameters:
+        - demand (np.ndarray): Demand of the model snapshots (MW).
+        - available (pd.DataFrame): p_max_pu * p_nom of every generator (snapshot x generator), positional.
+        - soc_initial (float): Battery state of charge before the first snapshot (MWh).
+        - budgets (dict): Allowances "unmet", "peak" and "curtailment" (MWh), see policy_budgets.
+
+        Returns:
+        - tuple: (termination condition, dict of dispatch DataFrames for the model snapshots, or None)
+        """
+        m = self.model
+        self._set_rhs("Bus-nodal_balance", demand[None, :])
+        generators = m.constraints["Generator-fix-p-upper"].rhs.coords["Generator-fix"].values
+        self._set_rhs("Generator-fix-p-upper", available[generators].to_numpy())
+        renewables = m.variables["Renewable_curtailment"].coords["Generator"].values
+        self._set_rhs("curtailment_calculation_constraint", available[renewables].to_numpy())
+        self._set_rhs("demand_offset_constraint", budgets["unmet"])
+        self._set_rhs("peak_hour_demand_constraint", budgets["peak"])
+        self._set_rhs("annual_curtailment_upper_limit_constraint", budgets["curtailment"])
+        if "StorageUnit-energy_balance" in m.constraints:
+            rhs = m.constraints["StorageUnit-energy_balance"].rhs.values.copy()
+            battery = self.network.storage_units.loc["Battery"]
+            hours = self.network.snapshot_weightings.stores.iloc[0]
+            rhs[0, :] = -soc_initial * (1 - battery.standing_loss) ** hours
+            self._set_rhs("StorageUnit-energy_balance", rhs)
+
+        if self.highs is not None:
+            if not self.hot_start:
+                self.highs.clearSolver()
+            self.highs.run()
+            condition = self.highs.modelStatusToString(self.highs.getModelStatus()).lower()
+            optimal = condition == "optimal"
+        else:
+            status, condition = m.solve(**self.solve_kwargs)
+            optimal = status == "ok"
+        if not optimal:
+            return condition, None
+        dispatch = {"p": self._solution("Generator-p")}
+        if "StorageUnit-p_dispatch" in m.variables:
+            for name in ("p_dispatch", "p_store", "state_of_charge"):
+                dispatch[name] = self._solution(f"StorageUnit-{name}")
+        return condition, {name: values.rename_axis(columns=None) for name, values in dispatch.items()}
+
+
+def _operating_cost(network=None, model_kwargs=None):
+    """Objective of optimize_network at an assigned dispatch: marginal, curtailment and peak-penalty terms."""
+    weightings = network.snapshot_weightings.objective
+    generators = network.generators
+    p = network.generators_t.p
+    cost = (p * generators.marginal_cost).multiply(weightings, axis=0).sum().sum()
+    if "Battery" in network.storage_units.index:
+        cost += (network.storage_units_t.p_dispatch["Battery"] * network.storage_units.at["Battery", "marginal_cost"]
+                 * weightings).sum()
+    renewables = generators.index.drop("Unmet_Demand")
+    available = network.get_switchable_as_dense("Generator", "p_max_pu")[renewables] * generators.loc[renewables, "p_nom"]
+    curtailment_cost = generators.loc[renewables, "marginal_cost"] - (
+        model_kwargs["sell_curtailment_percentage"] * model_kwargs["curtailment_selling_price"])
+    cost += ((available - p[renewables]).clip(lower=0) * curtailment_cost).multiply(weightings, axis=0).sum().sum()
+    if model_kwargs.get("peak_target") is not None and model_kwargs.get("peak_hours") is not None:
+        peak_mask = network.snapshots.hour.isin(model_kwargs["peak_hours"])
+        cost += (p.loc[peak_mask, "Unmet_Demand"] * weightings[peak_mask]).sum() * 1000
+    return cost
+
+
+def policy_budgets(network=None, model_kwargs=None):
+    """
+    The DO, peak and curtailment limits of optimize_network as budgets over the horizon of a fixed-capacity network.
+
+    Parameters:
+    - network (pypsa.Network): Network with fixed capacities.
+    - model_kwargs (dict): Arguments of optimize_network (DO, peak_target, peak_hours, annual_curtailment_limit).
+
+    Returns:
+    - tuple: (weighted quantities per snapshot the budgets are shared out by: "unmet" demand, "peak"
+      demand and "curtailment" generation, as arrays (MWh); horizon budgets (MWh) under the same keys)
+    """
+    weightings = network.snapshot_weightings.generators.to_numpy()
+    demand = network.loads_t.p_set.sum(axis=1).to_numpy()
+    generators = network.generators
+    renewables = generators.index.drop("Unmet_Demand")
+    available = network.get_switchable_as_dense("Generator", "p_max_pu")[renewables] * generators.loc[renewables, "p_nom"]
+    peak_target, peak_hours = model_kwargs.get("peak_target"), model_kwargs.get("peak_hours")
+    peak = (network.snapshots.hour.isin(peak_hours) if peak_target is not None and peak_hours is not None
+            else np.zeros(len(network.snapshots), bool))
+    shares = {"unmet": demand * weightings, "peak": demand * weightings * peak,
+              "curtailment": available.sum(axis=1).to_numpy() * weightings}
+    budgets = {
+        "unmet": (1 - model_kwargs["DO"]) * shares["unmet"].sum(),
+        "peak": (1 - peak_target) * shares["peak"].sum() if peak.any() else 0.0,
+        "curtailment": model_kwargs["annual_curtailment_limit"] * shares["curtailment"].sum(),
+    }
+    return shares, budgets
+
+
+def assign_dispatch(network=None, dispatch=None, model_kwargs=None):
+    """
+    Assign a dispatch to a fixed-capacity network in the layout of a solved network, for
+    analyze_network_results(solve=False).
+
+    Parameters:
+    - network (pypsa.Network): Network with fixed capacities.
+    - dispatch (dict): "p" (snapshot x generator) and, with a battery, "p_dispatch", "p_store" and
+      "state_of_charge" DataFrames over the network snapshots.
+    - model_kwargs (dict): Arguments of optimize_network, for the objective value.
+    """
+    network.generators["p_nom_opt"] = network.generators.p_nom
+    network.generators_t.p = dispatch["p"]
+    if "Battery" in network.storage_units.index:
+        network.storage_units["p_nom_opt"] = network.storage_units.p_nom
+        for name in ("p_dispatch", "p_store", "state_of_charge"):
+            setattr(network.storage_units_t, name, dispatch[name])
+        network.storage_units_t.p = dispatch["p_dispatch"] - dispatch["p_store"]
+    network.objective = _operating_cost(network, model_kwargs)
+
+
+def rolling_dispatch(demand_data=None, solar_profile=None, wind_profile=None, capacities=None, network_kwargs=None,
+                     model_kwargs=None, window=DEFAULT_WINDOW, overlap=DEFAULT_OVERLAP, solve_kwargs=None,
+                     carry_over_limit=CARRY_OVER_LIMIT):
+    """
+    Dispatch fixed capacities over the horizon in overlapping rolling windows, sharing the annual DO,
+    peak and curtailment limits out to the windows as budgets.
+
+    Parameters:
+    - demand_data, solar_profile, wind_profile (pd.Series): Full-horizon inputs.
+    - capacities (dict): {"Solar", "Wind", "Battery"} capacities in MW, plus one per further renewable
+      project of network_kwargs.
+    - network_kwargs, model_kwargs (dict): Arguments of setup_network and optimize_network, as in solve_combination.
+    - window, overlap (str or int): See window_bounds.
+    - solve_kwargs (dict, optional): linopy solve arguments (solver_name and options).
+    - carry_over_limit (float, optional): Cap of a window's allowance as a multiple of its pro-rata share
+      of the horizon budget; None lets the last windows use all budget left unused.
+
+    Returns:
+    - tuple: (full-horizon pypsa.Network with the capacities fixed and the stitched dispatch assigned,
+      ready for analyze_network_results(solve=False); pd.DataFrame with one row per window)
+    """
+    solve_kwargs = quiet_solve_kwargs(solve_kwargs)
+    profiles = {name: profile for name, profile in (("Solar", solar_profile), ("Wind", wind_profile))
+                if profile is not None}
+    network = setup_network(demand_data=demand_data, solar_profile=solar_profile, wind_profile=wind_profile,
+                            fixed_capacities=capacities, **network_kwargs)
+    snapshots = network.snapshots
+    weightings = network.snapshot_weightings.generators.to_numpy()
+    demand = network.loads_t.p_set.sum(axis=1).to_numpy()
+    generators = network.generators
+    available = network.get_switchable_as_dense("Generator", "p_max_pu") * generators.p_nom
+    renewables = generators.index.drop("Unmet_Demand")
+    # Horizon budgets (MWh) and the weighted quantities they are shared out by
+    shares, remaining = policy_budgets(network, model_kwargs)
+    horizon_budgets = dict(remaining)
+    # Peak snapshots with demand: the only ones where unmet demand counts against the peak budget
+    peak = shares["peak"] > 0
+
+    has_battery = "Battery" in network.storage_units.index
+    dispatch = {"p": pd.DataFrame(0.0, index=snapshots, columns=generators.index)}
+    if has_battery:
+        for name in ("p_dispatch", "p_store", "state_of_charge"):
+            dispatch[name] = pd.DataFrame(0.0, index=snapshots, columns=["Battery"])
+    soc = network.storage_units.at["Battery", "state_of_charge_initial"] if has_battery else 0.0
+
+    models = {}
+    rows = []
+    for start, commit_end, end in window_bounds(snapshots, window, overlap):
+        window_snapshots = snapshots[start:end]
+        # Windows with the same length, committed part, hours of day and durations share one model
+        pattern = (commit_end - start, tuple(window_snapshots.hour), tuple(snapshot_hours(window_snapshots)))
+        if pattern not in models:
+            models[pattern] = FixedCapacityModel(demand_data.iloc[start:end],
+                                           {name: profile.iloc[start:end] for name, profile in profiles.items()},
+                                           capacities, network_kwargs, model_kwargs, solve_kwargs,
+                                           n_commit=commit_end - start)
+        budgets = {}
+        for name, share in shares.items():
+            total = share[start:].sum()
+            # An overspent budget leaves no allowance (not a negative one) for the windows that remain
+            budgets[name] = max(remaining[name] * share[start:end].sum() / total, 0.0) if total > 0 else 0.0
+            if carry_over_limit is not None and share.sum() > 0:
+                pro_rata = horizon_budgets[name] * share[start:end].sum() / share.sum()
+                budgets[name] = min(budgets[name], carry_over_limit * pro_rata)
+
+        solve_start = time.perf_counter()
+        condition, window_dispatch = models[pattern].solve(demand[start:end], available.iloc[start:end], soc,
+                                                           budgets)
+        solve_time = time.perf_counter() - solve_start
+        if window_dispatch is None:
+            raise ValueError(f"Rolling window {snapshots[start]} - {snapshots[end - 1]} returned '{condition}'.")
+
+        committed = slice(start, commit_end)
+        n_commit = commit_end - start
+        for name, values in window_dispatch.items():
+            dispatch[name].iloc[committed] = values[dispatch[name].columns].to_numpy()[:n_commit]
+        if has_battery:
+            soc = float(dispatch["state_of_charge"]["Battery"].iloc[commit_end - 1])
+
+        unmet = dispatch["p"]["Unmet_Demand"].to_numpy()[committed]
+        curtailed = (available[renewables] - dispatch["p"][renewables]).clip(lower=0).sum(axis=1).to_numpy()[committed]
+        used = {"unmet": (unmet * weightings[committed]).sum(),
+                "peak": (unmet * weightings[committed] * peak[committed]).sum(),
+                "curtailment": (curtailed * weightings[committed]).sum()}
+        for name in remaining:
+            remaining[name] -= used[name]
+        rows.append({"Start": snapshots[start], "End": snapshots[commit_end - 1], "Solve Time (s)": solve_time,
+                     "Unmet Allowance (MWh)": budgets["unmet"], "Unmet (MWh)": used["unmet"],
+                     "Curtailment Allowance (MWh)": budgets["curtailment"], "Curtailment (MWh)": used["curtailment"],
+                     "Remaining Unmet Budget (MWh)": remaining["unmet"]})
+
+    # Stitched dispatch on the full-horizon network
+    assign_dispatch(network, dispatch, model_kwargs)
+    logger.debug(f"Rolling dispatch: {len(rows)} windows, {len(models)} window model(s) built.")
+    return network, pd.DataFrame(rows).set_index("Start")
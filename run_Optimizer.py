@@ -4,14 +4,35 @@ import pandas as pd
 import logging
 import time
 from pathlib import Path
+from sensitivity import dual_sensitivity_report
+from batch_analysis import annual_summary_batch, stack_network_results
 
 # Get the logger that is configured in the settings
 traceback_logger = logging.getLogger('django')
 logger = logging.getLogger('debug_logger')  # Use the new debug logger
 
+def combination_key(ipp_name=None, solar_name=None, wind_name=None, ess_name=None):
+  """Key of one IPP technology combination in results_dict, e.g. "IPP1-Solar_1-ESS_1"."""
+  if solar_name is not None and wind_name is None and ess_name is not None:
+    key =f"{ipp_name}-{solar_name}-{ess_name}"
+  elif solar_name is None and wind_name is not None  and ess_name is not None:
+    key =f"{ipp_name}-{wind_name}-{ess_name}"
+  elif solar_name is not None and wind_name is not None  and ess_name is not None:
+    key =f"{ipp_name}-{solar_name}-{wind_name}-{ess_name}"
+  elif solar_name is not None and wind_name is None  and ess_name is None:
+    key =f"{ipp_name}-{solar_name}"
+  elif solar_name is None and wind_name is not None  and ess_name is None:
+    key =f"{ipp_name}-{wind_name}"
+  elif solar_name is not None and wind_name is not None and ess_name is None:
+    key =f"{ipp_name}-{solar_name}-{wind_name}"
+  else:
+    key ="No generation technology added"
+  return key
+
 def analyze_network_results(network=None, sell_curtailment_percentage=None, curtailment_selling_price=None,
                             solar_profile=None, wind_profile=None, results_dict=None, OA_cost=None,
-                            ess_name=None, solar_name=None, wind_name=None, ipp_name=None):
+                            ess_name=None, solar_name=None, wind_name=None, ipp_name=None, report_duals=False,
+                            solve_kwargs=None, export_excel=True, solve=True):
   # if solar_profile is not None and not solar_profile.empty:
   #  solar_name = solar_profile.name
   # if wind_profile is not None and not wind_profile.empty:
@@ -19,132 +40,61 @@ def analyze_network_results(network=None, sell_curtailment_percentage=None, curt
 
   try:
       # Solve the optimization model
-      lopf_status = network.optimize.solve_model()
-      if lopf_status[1] == "infeasible":
-          raise ValueError("Optimization returned 'infeasible' status.")
-
-      # Initialize placeholders for results
-      gross_energy_generation = 0
-      gross_energy_allocation = 0
-      solar_wind_allocation = 0
-      solar_allocation = 0
-      wind_allocation = 0
+      # solve_kwargs are passed to linopy, e.g. warmstart_fn/basis_fn for a warm-started re-solve
+      # solve=False analyzes a solution already assigned to the network (e.g. an accepted first-order point)
+      solve_time = 0.0
+      if solve:
+          solve_start = time.perf_counter()
+          lopf_status = network.optimize.solve_model(**(solve_kwargs or {}))
+          solve_time = time.perf_counter() - solve_start
+          if lopf_status[1] == "infeasible":
+              raise ValueError("Optimization returned 'infeasible' status.")
+
+      key = combination_key(ipp_name=ipp_name, solar_name=solar_name, wind_name=wind_name, ess_name=ess_name)
+
+      # Every metric comes from the vectorized batch engine (here with one combination), so single-network
+      # and multi-combination post-processing share one implementation
+      summary, hourly = annual_summary_batch(stack_network_results({key: network}), sell_curtailment_percentage,
+                                             curtailment_selling_price, OA_cost)
+      metrics = summary.loc[key]
+      hourly = {name: pd.Series(values[0], index=network.snapshots) for name, values in hourly.items()}
 
       # Demand profile
+      # Series taken from the network are copied so the results do not keep its DataFrames alive
+      # after release_network
       demand = network.loads_t.p_set.sum(axis=1)
-      # Handle Solar
-      if "Solar" in network.generators.index:
-          solar_allocation = network.generators_t.p["Solar"]
-          solar_capacity = network.generators.at["Solar", "p_nom_opt"]
-          solar_generation = network.generators_t.p_max_pu["Solar"] * solar_capacity
-          gross_energy_generation += solar_generation
-          gross_energy_allocation += solar_allocation
-          solar_wind_allocation += solar_allocation
-
-          # Solar costs
-          solar_capital_cost = solar_capacity * network.generators.at["Solar", "capital_cost"]
-          # solar_marginal_cost = (solar_allocation * network.generators.at["Solar", "marginal_cost"]).sum(axis=0) * 2
-          solar_marginal_cost = (solar_allocation * network.generators.at["Solar", "marginal_cost"]).sum(axis=0) 
-          total_solar_cost = solar_capital_cost + solar_marginal_cost
-      else:
-          solar_capacity = 0
-          solar_capital_cost = 0
-          solar_marginal_cost = 0
-          total_solar_cost = 0
-
-      # Handle Wind
-      if "Wind" in network.generators.index:
-          wind_allocation = network.generators_t.p["Wind"]
-          wind_capacity = network.generators.at["Wind", "p_nom_opt"]
-          wind_generation = network.generators_t.p_max_pu["Wind"] * wind_capacity
-          gross_energy_generation += wind_generation
-          gross_energy_allocation += wind_allocation
-          solar_wind_allocation += wind_allocation
+      solar_allocation = network.generators_t.p["Solar"].copy() if "Solar" in network.generators.index else 0
+      wind_allocation = network.generators_t.p["Wind"].copy() if "Wind" in network.generators.index else 0
 
-          # Wind costs
-          wind_capital_cost = wind_capacity * network.generators.at["Wind", "capital_cost"]
-          # wind_marginal_cost = (wind_allocation * network.generators.at["Wind", "marginal_cost"]).sum(axis=0) * 2
-          wind_marginal_cost = (wind_allocation * network.generators.at["Wind", "marginal_cost"]).sum(axis=0)
-          total_wind_cost = wind_capital_cost + wind_marginal_cost
-      else:
-          wind_capacity = 0
-          total_wind_cost = 0
-          wind_capital_cost = 0
-          wind_marginal_cost = 0
-
-      # Battery SOC, Discharge, Charge
+      # Battery SOC, Discharge (below 1e-5 MW shown as 0), Charge
       if ess_name is not None:
-          battery_soc = network.storage_units_t.state_of_charge["Battery"]
-          ess_discharge = network.storage_units_t.p_dispatch["Battery"]
-          ess_discharge[abs(ess_discharge) < 1e-5] = 0
-          ess_charge = network.storage_units_t.p_store["Battery"]
-          gross_energy_allocation += (ess_discharge - ess_charge)
-          ess_capacity = network.storage_units.at["Battery", "p_nom_opt"]
-          ess_capital_cost = ess_capacity * network.storage_units.at["Battery", "capital_cost"]
-          # ess_marginal_cost = ((((network.storage_units_t.p_dispatch["Battery"] * network.storage_units.at["Battery", "marginal_cost"]).sum(axis=0)) + ((network.storage_units_t.p_store["Battery"] * network.storage_units.at["Battery", "marginal_cost"]).sum(axis=0)))) * 2
-          ess_marginal_cost = ((((network.storage_units_t.p_dispatch["Battery"] * network.storage_units.at["Battery", "marginal_cost"]).sum(axis=0)) + ((network.storage_units_t.p_store["Battery"] * network.storage_units.at["Battery", "marginal_cost"]).sum(axis=0)))) 
-          total_ess_cost = ess_capital_cost + ess_marginal_cost
-
-          # Max hours 
+          battery_soc = network.storage_units_t.state_of_charge["Battery"].copy()
+          ess_discharge = hourly["ESS Discharge"]
+          ess_charge = network.storage_units_t.p_store["Battery"].copy()
       else:
-          ess_capacity = 0
           battery_soc = 0
           ess_discharge = 0
           ess_charge = 0
-          ess_capital_cost = 0
-          ess_marginal_cost = 0
-          total_ess_cost = 0
 
       # Unmet demand and total demand met by allocation
-      virtual_gen = network.generators_t.p['Unmet_Demand']
-      demand_met = np.where(virtual_gen > 0, "No", "Yes")
-
-  # Curtailment calculations
-      gross_curtailment = gross_energy_generation - solar_wind_allocation
-      gross_curtailment[gross_curtailment < 0] = 0
-      # gross_curtailment[abs(ess_discharge) < 1e-5] = 0
-      # annual_curtailment = gross_curtailment.sum() * 2
-      annual_curtailment = gross_curtailment.sum() 
-      gross_curtailment_marginal=0
-
-      # Curtailment costs
-      if "Solar" in network.generators.index:
-          solar_curtailment = (network.generators_t.p_max_pu['Solar'] * solar_capacity) - solar_allocation
-          solar_curtailment[solar_curtailment < 0] = 0
-          gross_curtailment_marginal += solar_curtailment * network.generators.at["Solar", "marginal_cost"]
-        # solar_curtailment = gross_curtailment * (solar_generation / gross_energy_generation)
-        # solar_curtailment_cost = (solar_curtailment * network.generators.at["Solar", "marginal_cost"]).sum(axis=0)
-      else:
-          solar_curtailment = 0
-
-      if "Wind" in network.generators.index:
-          wind_curtailment = (network.generators_t.p_max_pu['Wind'] * wind_capacity) - wind_allocation
-          wind_curtailment[wind_curtailment < 0] = 0
-          gross_curtailment_marginal += wind_curtailment * network.generators.at["Wind", "marginal_cost"]
-        #  wind_curtailment = gross_curtailment * (wind_generation / gross_energy_generation)
-        # wind_curtailment_cost = (wind_curtailment * network.generators.at["Wind", "marginal_cost"]).sum(axis=0)
-      else:
-          wind_curtailment = 0
-
-      sell_curtailment = sell_curtailment_percentage * (solar_curtailment + wind_curtailment) * curtailment_selling_price
-      # total_curtailment_cost = (gross_curtailment_marginal - sell_curtailment).sum(axis=0) * 2
-      total_curtailment_cost = (gross_curtailment_marginal - sell_curtailment).sum(axis=0) 
-
-      # Total cost calculation
-      total_cost = total_solar_cost + total_wind_cost + total_curtailment_cost + total_ess_cost
-      # annual_demand_met = gross_energy_allocation.sum() * 2
-      annual_demand_met = gross_energy_allocation.sum()
-      per_unit_cost = total_cost / annual_demand_met if annual_demand_met > 0 else float('inf')
-      annual_demand_offset = 100 -  (virtual_gen.sum() / network.loads_t.p_set.sum().sum()) * 100
-      # annual_generation = gross_energy_generation.sum() * 2
-      annual_generation = gross_energy_generation.sum()
-      excess_percentage = (annual_curtailment / annual_generation) * 100
-      # annual_demand = demand.sum() * 2
-      annual_demand = demand.sum() 
-      OA_cost=OA_cost
-      Final_cost=OA_cost + per_unit_cost
-      # objective_for_aggregate_cost = network.objective * 2
-      objective_for_aggregate_cost = network.objective 
+      virtual_gen = network.generators_t.p['Unmet_Demand'].copy()
+      demand_met = hourly["Demand met"].to_numpy()
+      gross_energy_generation = hourly["Generation"]
+      gross_curtailment = hourly["Curtailment"]
+      gross_energy_allocation = hourly["Total Demand met by allocation"]
+
+      solar_capacity = metrics["Optimal Solar Capacity (MW)"]
+      wind_capacity = metrics["Optimal Wind Capacity (MW)"]
+      ess_capacity = metrics["Optimal Battery Capacity (MW)"]
+      per_unit_cost = metrics["Per Unit Cost"]
+      Final_cost = metrics["Final Cost"]
+      total_cost = metrics["Total Cost"]
+      annual_demand_offset = metrics["Annual Demand Offset"]
+      annual_demand_met = metrics["Annual Demand Met"]
+      excess_percentage = metrics["Annual Curtailment"]
+      annual_generation = metrics["Annual Generation"]
+      annual_demand = metrics["Annual Demand"]
+      objective_for_aggregate_cost = metrics["Objective Aggregate Cost"]
 
       # Define the annual summary dictionary with units
       annual_summary = {
@@ -177,55 +127,22 @@ def analyze_network_results(network=None, sell_curtailment_percentage=None, curt
           "Total Demand met by allocation": gross_energy_allocation,
           "Demand met": demand_met
       })
-      # Save hourly results to Excel
-      results_df.to_excel("optimization_hourly_results.xlsx", index=True)
-
-      # Save annual summary to separate Excel file with error handling
-      annual_summary_path = Path("optimization_annual_summary.xlsx")
-      for attempt in range(3):  # Retry up to 3 times
-          try:
-              pd.DataFrame([annual_summary]).to_excel(annual_summary_path, index=False)
-              break  # Exit loop if successful
-          except PermissionError as e:
-              logger.error(f"Attempt {attempt + 1}: Unable to write to {annual_summary_path}. Ensure the file is not open.")
-              if attempt < 2:  # Retry for the first two attempts
-                  time.sleep(2)  # Wait for 2 seconds before retrying
-              else:
-                  raise e  # Raise the error after 3 failed attempts
-
-      # Print outputs
-      # logger.debug(f"\nOptimal Capacities:")
-      # logger.debug(f"Optimal Solar Capacity: {solar_capacity:.2f} MW")
-      # logger.debug(f"Optimal Wind Capacity: {wind_capacity:.2f} MW")
-      # logger.debug(f"Optimal Battery Capacity: {ess_capacity:.2f} MW")
-      # logger.debug(f"Annual Demand Offset: {annual_demand_offset:.2f}%")
-      # logger.debug(f"Annual Demand: {annual_demand :.2f}")
-      # logger.debug(f"Annual Generation: {annual_generation:.2f}")
-      # logger.debug(f"Annual Demand met: {annual_demand_met:.2f}")
-      # logger.debug(f"Total Solar Cost: {total_solar_cost:.2f} (Capital: {solar_capital_cost:.2f}, Marginal: {solar_marginal_cost:.2f})")
-      # logger.debug(f"Total Wind Cost: {total_wind_cost:.2f} (Capital: {wind_capital_cost:.2f}, Marginal: {wind_marginal_cost:.2f})")
-      # logger.debug(f"Total ESS Cost: {total_ess_cost:.2f} (Capital: {ess_capital_cost:.2f}, Marginal: {ess_marginal_cost:.2f})")
-      # logger.debug(f"Total Curtailment Cost: {total_curtailment_cost:.2f}")
-      # logger.debug(f"Total Cost: {total_cost:.2f}")
-      # logger.debug(f"Per unit cost: {per_unit_cost:.2f}")
-      # logger.debug(f"Final Cost: {Final_cost:.2f}")
-      # logger.debug(f"Annual Curtailment: {excess_percentage:.2f}%")
-      # logger.debug(f"Total objective cost: {objective_for_aggregate_cost:.2f}")
-
-      if solar_name is not None and wind_name is None and ess_name is not None:
-        key =f"{ipp_name}-{solar_name}-{ess_name}"
-      elif solar_name is None and wind_name is not None  and ess_name is not None:
-        key =f"{ipp_name}-{wind_name}-{ess_name}"
-      elif solar_name is not None and wind_name is not None  and ess_name is not None:
-        key =f"{ipp_name}-{solar_name}-{wind_name}-{ess_name}"
-      elif solar_name is not None and wind_name is None  and ess_name is None:
-        key =f"{ipp_name}-{solar_name}"
-      elif solar_name is None and wind_name is not None  and ess_name is None:
-        key =f"{ipp_name}-{wind_name}"
-      elif solar_name is not None and wind_name is not None and ess_name is None:
-        key =f"{ipp_name}-{solar_name}-{wind_name}"
-      else:
-        key ="No generation technology added"
+      if export_excel:
+          # Save hourly results to Excel
+          results_df.to_excel("optimization_hourly_results.xlsx", index=True)
+
+          # Save annual summary to separate Excel file with error handling
+          annual_summary_path = Path("optimization_annual_summary.xlsx")
+          for attempt in range(3):  # Retry up to 3 times
+              try:
+                  pd.DataFrame([annual_summary]).to_excel(annual_summary_path, index=False)
+                  break  # Exit loop if successful
+              except PermissionError as e:
+                  logger.error(f"Attempt {attempt + 1}: Unable to write to {annual_summary_path}. Ensure the file is not open.")
+                  if attempt < 2:  # Retry for the first two attempts
+                      time.sleep(2)  # Wait for 2 seconds before retrying
+                  else:
+                      raise e  # Raise the error after 3 failed attempts
 
       results_dict[key] = {
                   "Optimal Solar Capacity (MW)": solar_capacity,
@@ -237,6 +154,10 @@ def analyze_network_results(network=None, sell_curtailment_percentage=None, curt
                   "Annual Demand Offset": annual_demand_offset,
                   "Annual Demand Met": annual_demand_met,
                   "Annual Curtailment": excess_percentage,
+                  "Annual Generation": annual_generation,
+                  "Annual Demand": annual_demand,
+                  "Objective Aggregate Cost": objective_for_aggregate_cost,
+                  "Solve Time (s)": solve_time,
 
                   "Demand": [round(val, 2) for val in demand],
                   "Solar Allocation": solar_allocation if isinstance(solar_allocation, pd.Series) else 0,
@@ -251,6 +172,9 @@ def analyze_network_results(network=None, sell_curtailment_percentage=None, curt
                   "Demand met": demand_met
 
               }
+      if report_duals:
+          # Shadow prices of the policy constraints answer what-if questions without re-solving
+          results_dict[key]["Sensitivity"] = dual_sensitivity_report(network).to_dict(orient="index")
       # results_df.to_excel(f"results_{key}.xlsx", index=False)
       # logger.debug(f"{key} - Optimization successful.")
       # logger.debug(results_dict)
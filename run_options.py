@@ -0,0 +1,109 @@
+from dataclasses import dataclass, fields
+
+from rolling_horizon import DEFAULT_OVERLAP, DEFAULT_WINDOW
+
+
+@dataclass
+class SolverOptions:
+    """
+    Solver choice of optimization_model.
+
+    Parameters:
+    - preset (str, optional): Key of solver_config.SOLVER_PRESETS, e.g. "fast-screen" or "large-scale".
+    - name (str, optional): "highs" or "gurobi"; chosen by availability and licence if omitted.
+    - polish (bool): In large-scale mode, re-solve the dispatch exactly with the first-order capacities fixed.
+    - first_order_tolerance, first_order_iteration_limit, first_order_time_limit (optional): Limits of
+      the large-scale first-order solve, see first_order_options.
+    """
+    preset: str = None
+    name: str = None
+    polish: bool = True
+    first_order_tolerance: float = None
+    first_order_iteration_limit: int = None
+    first_order_time_limit: float = None
+
+    def first_order_limits(self):
+        """Keyword arguments of first_order_options."""
+        return dict(tolerance=self.first_order_tolerance, iteration_limit=self.first_order_iteration_limit,
+                    time_limit=self.first_order_time_limit)
+
+
+@dataclass
+class ParallelOptions:
+    """
+    Parallelism and memory limits of optimization_model.
+
+    Parameters:
+    - n_workers (int, optional): Combinations solved in parallel processes.
+    - total_threads (int, optional): Solver threads of the whole run, split evenly between the workers
+      (default: all usable CPUs).
+    - memory_budget_mb (float, optional): Memory budget of the whole run, shared by the workers.
+    """
+    n_workers: int = None
+    total_threads: int = None
+    memory_budget_mb: float = None
+
+
+@dataclass
+class ModeOptions:
+    """
+    Execution mode of optimization_model; the default optimizes capacities at full resolution.
+
+    Parameters:
+    - resample (str, optional): Choose capacities on data averaged to this resolution (e.g. "3h"), then
+      validate them at full resolution.
+    - resample_tolerance (float): Policy shortfall (percentage points) accepted in that validation.
+    - operational_capacities (dict, optional): Combination key -> {"Solar", "Wind", "Battery"} capacities
+      (MW); those combinations are only dispatched, in rolling windows.
+    - rolling_window, rolling_overlap (str or int): Windows of the operational dispatch.
+    - capacity_grid (dict, optional): {"Solar", "Wind", "Battery": capacities in MW}; every combination
+      is evaluated on this grid and returned as a CapacitySurrogate.
+
+    Raises:
+    - ValueError: If both operational_capacities and capacity_grid are given.
+    """
+    resample: str = None
+    resample_tolerance: float = 0.5
+    operational_capacities: dict = None
+    rolling_window: object = DEFAULT_WINDOW
+    rolling_overlap: object = DEFAULT_OVERLAP
+    capacity_grid: dict = None
+
+    def __post_init__(self):
+        # Each mode replaces the capacity optimization; combining them has no meaning
+        if self.operational_capacities is not None and self.capacity_grid is not None:
+            raise ValueError("operational_capacities and capacity_grid cannot be combined; choose one mode.")
+
+
+@dataclass
+class CacheOptions:
+    """
+    Reuse of earlier runs by optimization_model.
+
+    Parameters:
+    - warm_start_dir (str or Path, optional): Solved-job store; new solves start from the basis of a job
+      with the same inputs and nearly the same demand.
+    - warm_start_tolerance (float): Maximum relative demand distance of such a job.
+    - journal_path (str or Path, optional): Journal of completed combinations; an interrupted run with
+      the same journal and inputs resumes where it stopped.
+    """
+    warm_start_dir: object = None
+    warm_start_tolerance: float = 0.05
+    journal_path: object = None
+
+
+def as_options(options_class=None, value=None):
+    """
+    Return value as an instance of options_class: None gives the defaults and a dict is unpacked.
+
+    Raises:
+    - ValueError: For keys the options class does not have.
+    """
+    if value is None:
+        return options_class()
+    if isinstance(value, options_class):
+        return value
+    unknown = set(value) - {field.name for field in fields(options_class)}
+    if unknown:
+        raise ValueError(f"Unknown {options_class.__name__} {sorted(unknown)}.")
+    return options_class(**value)
@@ -0,0 +1,185 @@
+import numpy as np
+import pandas as pd
+import logging
+
+logger = logging.getLogger('debug_logger')  # Use the new debug logger
+
+# Custom constraints added in optimize_network plus the PyPSA capacity bounds
+SENSITIVITY_CONSTRAINTS = [
+    "demand_offset_constraint",
+    "peak_hour_demand_constraint",
+    "annual_curtailment_upper_limit_constraint",
+    "battery_energy_capacity_cap_constraint",
+    "Generator-ext-p_nom-lower",
+    "Generator-ext-p_nom-upper",
+    "StorageUnit-ext-p_nom-lower",
+    "StorageUnit-ext-p_nom-upper",
+]
+
+
+def _highs_ranging(h, m):
+    """RHS ranging from a highspy solver object; its rows are in m.matrices.clabels order."""
+    status, ranging = h.getRanging()
+    if int(status) != 0:
+        return None
+    return pd.DataFrame({
+        "Activity": np.asarray(h.getSolution().row_value, dtype=float),
+        "RHS Lower": np.asarray(ranging.row_bound_dn.value_, dtype=float),
+        "RHS Upper": np.asarray(ranging.row_bound_up.value_, dtype=float),
+        "Objective at RHS Lower": np.asarray(ranging.row_bound_dn.objective_, dtype=float),
+        "Objective at RHS Upper": np.asarray(ranging.row_bound_up.objective_, dtype=float),
+    }, index=m.matrices.clabels)
+
+
+def _gurobi_ranging(g):
+    """RHS ranging from a gurobipy model; linopy names its rows "c<label>". Objectives at the range ends are NaN."""
+    constrs = g.getConstrs()
+    labels = [int(name[1:]) for name in g.getAttr("ConstrName", constrs)]
+    rhs = np.asarray(g.getAttr("RHS", constrs), dtype=float)
+    return pd.DataFrame({
+        "Activity": rhs - np.asarray(g.getAttr("Slack", constrs), dtype=float),
+        "RHS Lower": np.asarray(g.getAttr("SARHSLow", constrs), dtype=float),
+        "RHS Upper": np.asarray(g.getAttr("SARHSUp", constrs), dtype=float),
+        "Objective at RHS Lower": np.nan,
+        "Objective at RHS Upper": np.nan,
+    }, index=labels)
+
+
+def _row_ranging(m):
+    """RHS ranging of every row indexed by linopy label, or None without a basic HiGHS/Gurobi solution."""
+    solver_model = getattr(m, "solver_model", None)
+    try:
+        if hasattr(solver_model, "getRanging"):
+            return _highs_ranging(solver_model, m)
+        if hasattr(solver_model, "getConstrs"):
+            return _gurobi_ranging(solver_model)
+    except Exception as e:
+        logger.debug(f"RHS ranging not available: {e}")
+    return None
+
+
+def _renewable_generation(network):
+    """Annual available renewable generation (MWh) at the optimal capacities."""
+    renewables = network.generators.index.difference(["Unmet_Demand"])
+    p_max_pu = network.get_switchable_as_dense("Generator", "p_max_pu")[renewables]
+    weighted_pu = p_max_pu.multiply(network.snapshot_weightings.generators, axis=0).sum()
+    return float((weighted_pu * network.generators.loc[renewables, "p_nom_opt"]).sum())
+
+
+def _curtailment_limit_offset(m, con):
+    """Capacity terms of the annual curtailment row at the optimum; rhs + offset is the limit in MWh."""
+    if "Generator-p_nom" not in m.variables:
+        return 0.0
+    p_nom = m.variables["Generator-p_nom"]
+    solution = pd.Series(p_nom.solution.values.ravel(), index=p_nom.labels.values.ravel())
+    term_vars = con.vars.values.ravel()
+    in_p_nom = np.isin(term_vars, solution.index)
+    return -float((con.coeffs.values.ravel()[in_p_nom] * solution.loc[term_vars[in_p_nom]].to_numpy()).sum())
+
+
+def _what_if(name, dual, network):
+    """Translate a dual into (description, objective change in INR, RHS step) for a user-facing parameter."""
+    if name == "demand_offset_constraint":
+        # rhs = (1 - DO) * total_demand, so +1% RE replacement lowers the rhs by 1% of demand
+        total_demand = network.loads_t.p_set.multiply(network.snapshot_weightings.generators, axis=0).sum().sum()
+        step = -total_demand / 100
+        return "Cost of +1% RE replacement (INR)", dual * step, step
+    if name == "peak_hour_demand_constraint":
+        return "Cost of +1 MWh peak demand served (INR)", -dual, -1.0
+    if name == "annual_curtailment_upper_limit_constraint":
+        # +1% on the limit adds 1% of generation to the limit (MWh)
+        step = _renewable_generation(network) / 100
+        return "Cost of +1% curtailment limit (INR)", dual * step, step
+    if name == "battery_energy_capacity_cap_constraint":
+        return "Cost of +1 MWh battery energy in every binding hour (INR)", dual, np.nan
+    if name.endswith("p_nom-upper"):
+        return "Cost of +1 MW capacity upper bound (INR)", dual, 1.0
+    if name.endswith("p_nom-lower"):
+        return "Cost of +1 MW capacity lower bound (INR)", dual, 1.0
+    return "Cost of +1 unit RHS (INR)", dual, 1.0
+
+
+def dual_sensitivity_report(network=None, constraint_names=None, tol=1e-6):
+    """
+    Shadow prices and valid RHS ranges of the policy constraints after solve_model().
+    Per-snapshot constraints are reported as the summed dual over the horizon.
+
+    Parameters:
+    - network (pypsa.Network): Solved network; network.model must hold the linopy model with duals.
+    - constraint_names (list, optional): Constraints to report (default SENSITIVITY_CONSTRAINTS).
+    - tol (float): Absolute dual value above which a row counts as binding.
+
+    Returns:
+    - pd.DataFrame: One row per constraint (element) with Shadow Price, RHS, RHS Lower/Upper and what-if values.
+    """
+    m = network.model
+    if constraint_names is None:
+        constraint_names = SENSITIVITY_CONSTRAINTS
+    ranging = _row_ranging(m)
+    if ranging is None:
+        logger.debug("No RHS ranging for this solve; what-if values are not range-checked.")
+
+    rows = []
+    for name in constraint_names:
+        if name not in m.constraints:
+            continue
+        con = m.constraints[name]
+        labels = con.labels
+        duals = con.dual
+        rhs = con.rhs
+
+        if "snapshot" in labels.dims:
+            # Per-snapshot constraint: report the summed dual over the whole horizon
+            elements = [(name, labels.values.ravel(), duals.values.ravel(), rhs.values.ravel())]
+        elif labels.ndim == 0:
+            elements = [(name, labels.values.ravel(), duals.values.ravel(), rhs.values.ravel())]
+        else:
+            dim = labels.dims[0]
+            elements = [(f"{name}[{element}]", labels.sel({dim: element}).values.ravel(),
+                         duals.sel({dim: element}).values.ravel(), rhs.sel({dim: element}).values.ravel())
+                         for element in labels.coords[dim].values]
+        sign = con.sign.values.ravel()[:1]
+
+        for row_name, row_labels, row_duals, row_rhs in elements:
+            valid = row_labels != -1
+            row_labels, row_duals, row_rhs = row_labels[valid], row_duals[valid], row_rhs[valid]
+            if len(row_labels) == 0:
+                continue
+            shadow_price = float(np.nansum(row_duals))
+            description, what_if, step = _what_if(name, shadow_price, network)
+            rhs_lower = rhs_upper = np.nan
+            if ranging is not None and len(row_labels) == 1:
+                label = row_labels[0]
+                if abs(shadow_price) > tol or sign.item() == "=":
+                    rhs_lower = ranging.at[label, "RHS Lower"]
+                    rhs_upper = ranging.at[label, "RHS Upper"]
+                elif sign.item() == "<=":
+                    # Non-binding: the dual stays zero as long as the rhs stays above the activity
+                    rhs_lower, rhs_upper = ranging.at[label, "Activity"], np.inf
+                else:
+                    rhs_lower, rhs_upper = -np.inf, ranging.at[label, "Activity"]
+            row_rhs = float(row_rhs[0]) if len(row_rhs) == 1 else np.nan
+            if name == "annual_curtailment_upper_limit_constraint":
+                offset = _curtailment_limit_offset(m, con)
+                row_rhs, rhs_lower, rhs_upper = row_rhs + offset, rhs_lower + offset, rhs_upper + offset
+            within_range = np.nan
+            if not (np.isnan(rhs_lower) or np.isnan(step)):
+                within_range = bool(rhs_lower <= row_rhs + step <= rhs_upper)
+            rows.append({
+                "Constraint": row_name,
+                "Shadow Price": shadow_price,
+                "Binding Rows": int((np.abs(row_duals) > tol).sum()),
+                "Rows": len(row_labels),
+                "RHS": row_rhs,
+                "RHS Lower": rhs_lower,
+                "RHS Upper": rhs_upper,
+                "What-if": description,
+                "What-if Value": what_if,
+                "What-if Step": step,
+                "Within RHS Range": within_range,
+            })
+
+    report = pd.DataFrame(rows, columns=["Constraint", "Shadow Price", "Binding Rows", "Rows", "RHS",
+                                         "RHS Lower", "RHS Upper", "What-if", "What-if Value", "What-if Step",
+                                         "Within RHS Range"])
+    return report.set_index("Constraint")
@@ -1,7 +1,66 @@
+import numpy as np
+import pandas as pd
 import pypsa
+
+HOURS_PER_YEAR = 8760
+
+
+def snapshot_hours(snapshots):
+    """
+    Duration in hours of every snapshot, taken as the gap to the next snapshot (the last snapshot
+    repeats the previous gap). Hourly data gives 1.0, 15-minute data 0.25.
+    """
+    if len(snapshots) < 2:
+        return pd.Series(1.0, index=snapshots)
+    gaps = np.diff(snapshots.asi8) / 3.6e12  # ns -> h
+    return pd.Series(np.append(gaps, gaps[-1]), index=snapshots)
+
+
+def set_snapshot_weightings(network, hours=None):
+    """
+    Weight snapshots by their duration so energy, cost and curtailment sums are in MWh.
+
+    Generators and stores are weighted by the snapshot duration (MW -> MWh, SOC in MWh). The objective
+    is additionally scaled to one year, so annual capital costs and operating costs over a partial or
+    multi-year horizon stay comparable. For 8760 hourly snapshots all weightings are 1.
+
+    Parameters:
+    - network (pypsa.Network): Network whose snapshots are set.
+    - hours (pd.Series or float, optional): Snapshot durations in hours (default inferred from the index).
+    """
+    if hours is None:
+        hours = snapshot_hours(network.snapshots)
+    hours = pd.Series(hours, index=network.snapshots, dtype=float) if np.isscalar(hours) else hours.reindex(network.snapshots)
+    network.snapshot_weightings["generators"] = hours
+    network.snapshot_weightings["stores"] = hours
+    network.snapshot_weightings["objective"] = hours * (HOURS_PER_YEAR / hours.sum())
+
+
+def fixed_capital_cost(network=None):
+    """
+    Annual capital cost of the non-extendable components (fixed capacities). PyPSA leaves it out of the
+    objective, so adding it back makes the objective comparable whether capacities were optimized or fixed.
+    """
+    cost = 0.0
+    for components in (network.generators, network.storage_units):
+        fixed = components[~components["p_nom_extendable"].astype(bool)]
+        cost += float((fixed["capital_cost"] * fixed["p_nom"]).sum())
+    return cost
+
+
+def map_profiles(renewable_projects=None, transform=None):
+    """
+    Copy of renewable_projects (see setup_network) with transform applied to every project profile,
+    e.g. to resample or slice them like the demand.
+    """
+    return {name: dict(project, profile=transform(project["profile"]))
+            for name, project in (renewable_projects or {}).items()}
+
+
 def setup_network(demand_data=None, solar_profile=None, wind_profile=None, Solar_maxCapacity=None, Solar_captialCost=None, Solar_marginalCost=None,
                   Wind_maxCapacity=None, Wind_captialCost=None, Wind_marginalCost=None,
-                  Battery_captialCost = None, Battery_marginalCost= None,Battery_Eff_store=None,Battery_Eff_dispatch=None,snapshots=None,ess_name=None,solar_name=None,wind_name=None,Battery_max_energy_capacity=None):
+                  Battery_captialCost = None, Battery_marginalCost= None,Battery_Eff_store=None,Battery_Eff_dispatch=None,snapshots=None,ess_name=None,solar_name=None,wind_name=None,Battery_max_energy_capacity=None,
+                  snapshot_weightings=None, fixed_capacities=None, renewable_projects=None):
     """
     Function to initialize and set up the PyPSA network with demand, solar, wind, battery storage,
     and unmet demand generator.
@@ -19,6 +78,12 @@ def setup_network(demand_data=None, solar_profile=None, wind_profile=None, Solar
     - Battery_captialCost (float): Capital cost for battery storage (INR/MW).
     - Battery_marginalCost (float): Marginal cost for battery storage (INR/MWh).
     - snapshots (pd.Index, optional): Custom index for snapshots (default is None, which uses solar profile's index).
+    - snapshot_weightings (pd.Series or float, optional): Snapshot durations in hours (default inferred from the index).
+    - fixed_capacities (dict, optional): Generator or "Battery" name -> MW to fix instead of optimizing.
+    - renewable_projects (dict, optional): Further renewable generators, name -> {"profile",
+      "max_capacity", "capital_cost", "marginal_cost"} as in the input_data projects. The solar and wind
+      arguments above are the projects "Solar" and "Wind"; the report columns of analyze_network_results
+      cover those two, while every project enters the model constraints.
 
     Returns:
     - network (pypsa.Network): Initialized and configured PyPSA network.
@@ -29,6 +94,8 @@ def setup_network(demand_data=None, solar_profile=None, wind_profile=None, Solar
     if demand_data is not None:
       snapshots = demand_data.index
       network.set_snapshots(snapshots)
+      set_snapshot_weightings(network, snapshot_weightings)
+    fixed_capacities = fixed_capacities or {}
 
 
     # Add bus to the network
@@ -42,34 +109,36 @@ def setup_network(demand_data=None, solar_profile=None, wind_profile=None, Solar
                 bus="ElectricityBus",
                 p_set=demand_data.squeeze())  # squeeze() if demand_data is a single-column DataFrame
 
-    # Add solar generator with profile
+    # Every renewable project is one extendable (or fixed) generator with its per-unit profile
+    projects = {}
     if solar_name is not None:
-            network.add("Generator",
-                        "Solar",
-                        bus="ElectricityBus",
-                        p_nom_extendable=True,  # Allow optimization of solar capacity
-                        p_nom_max=Solar_maxCapacity,
-                        capital_cost=Solar_captialCost,
-                        marginal_cost=Solar_marginalCost,
-                        p_max_pu=solar_profile.squeeze())  # Using the solar profile as per-unit scaling
-
-    # Add wind generator with profile
+        projects["Solar"] = {"profile": solar_profile, "max_capacity": Solar_maxCapacity,
+                             "capital_cost": Solar_captialCost, "marginal_cost": Solar_marginalCost}
     if wind_name is not None:
-            network.add("Generator",
-                        "Wind",
-                        bus="ElectricityBus",
-                        p_nom_extendable=True,
-                        p_nom_max=Wind_maxCapacity,
-                        capital_cost=Wind_captialCost,
-                        marginal_cost=Wind_marginalCost,
-                        p_max_pu=wind_profile.squeeze())  # Wind profile
+        projects["Wind"] = {"profile": wind_profile, "max_capacity": Wind_maxCapacity,
+                            "capital_cost": Wind_captialCost, "marginal_cost": Wind_marginalCost}
+    for name, project in (renewable_projects or {}).items():
+        if name in projects or name == "Unmet_Demand":
+            raise ValueError(f"Renewable project name '{name}' is already used in the network.")
+        projects[name] = project
+    for name, project in projects.items():
+        network.add("Generator",
+                    name,
+                    bus="ElectricityBus",
+                    p_nom_extendable=name not in fixed_capacities,  # Allow optimization of the capacity
+                    p_nom=fixed_capacities.get(name, 0),
+                    p_nom_max=project["max_capacity"],
+                    capital_cost=project["capital_cost"],
+                    marginal_cost=project["marginal_cost"],
+                    p_max_pu=project["profile"].squeeze())  # Using the profile as per-unit scaling
 
     # Add battery storage with profile
     if ess_name is not None:
             network.add("StorageUnit",
                         "Battery",
                         bus="ElectricityBus",
-                        p_nom_extendable=True,             # Allow optimization of storage capacity (power)
+                        p_nom_extendable="Battery" not in fixed_capacities,  # Allow optimization of storage capacity (power)
+                        p_nom=fixed_capacities.get("Battery", 0),
                         capital_cost=Battery_captialCost,              # Capital cost in INR (₹60 lakh/MW)
                         marginal_cost=Battery_marginalCost,                   # Operational cost per MWh (e.g., degradation cost)
                         efficiency_store=Battery_Eff_store,              # Charging efficiency
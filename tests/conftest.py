@@ -0,0 +1,91 @@
+import logging
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# The modules live at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from setup_Components import setup_network  # noqa: E402
+from createModel import optimize_network  # noqa: E402
+
+logging.getLogger('debug_logger').setLevel(logging.WARNING)
+
+# Two days of synthetic hourly data: small enough to solve in well under a second
+N_SNAPSHOTS = 48
+SMALL_COSTS = dict(Solar_maxCapacity=500, Solar_captialCost=4.5e7, Solar_marginalCost=150,
+                   Wind_maxCapacity=500, Wind_captialCost=6e7, Wind_marginalCost=250,
+                   Battery_captialCost=2.5e6, Battery_marginalCost=200)
+SMALL_POLICY = dict(sell_curtailment_percentage=0.5, curtailment_selling_price=100, DO=0.5, DoD=0.8,
+                    annual_curtailment_limit=0.3, peak_target=0.5, peak_hours=[18, 19, 20, 21])
+SMALL_BATTERY = dict(Battery_Eff_store=0.95, Battery_Eff_dispatch=0.95, Battery_max_energy_capacity=4)
+
+
+@pytest.fixture(scope="session")
+def small_profiles():
+    """Demand, solar and wind profiles of a 48-hour synthetic case."""
+    index = pd.date_range("2022-01-01", periods=N_SNAPSHOTS, freq="h")
+    hours = np.arange(N_SNAPSHOTS) % 24
+    demand = pd.Series(100 + 30 * np.sin(2 * np.pi * (hours - 6) / 24), index=index)
+    solar = pd.Series(np.clip(np.sin(np.pi * (hours - 6) / 12), 0, None), index=index)
+    wind = pd.Series(0.35 + 0.25 * np.cos(2 * np.pi * np.arange(N_SNAPSHOTS) / 17), index=index)
+    return demand, solar, wind
+
+
+def solve_small(profiles, solar=True, wind=False, battery=True, fixed_capacities=None, **solve_kwargs):
+    """
+    Build and solve one technology combination of the synthetic case.
+
+    Parameters:
+    - profiles (tuple): (demand, solar, wind) from the small_profiles fixture.
+    - solar, wind, battery (bool): Technologies of the combination.
+    - fixed_capacities (dict, optional): As in setup_network.
+    - **solve_kwargs: Extra HiGHS arguments of solve_model.
+
+    Returns:
+    - pypsa.Network: The solved network.
+    """
+    demand, solar_profile, wind_profile = profiles
+    solar_profile = solar_profile if solar else None
+    wind_profile = wind_profile if wind else None
+    ess_name = "ESS_1" if battery else None
+    network = setup_network(demand_data=demand, solar_profile=solar_profile, wind_profile=wind_profile,
+                            solar_name="Solar_1" if solar else None, wind_name="Wind_1" if wind else None,
+                            ess_name=ess_name, fixed_capacities=fixed_capacities, **SMALL_COSTS, **SMALL_BATTERY)
+    optimize_network(network=network, solar_profile=solar_profile, wind_profile=wind_profile, demand_data=demand,
+                     ess_name=ess_name, Battery_max_energy_capacity=SMALL_BATTERY["Battery_max_energy_capacity"],
+                     **SMALL_COSTS, **SMALL_POLICY)
+    status, condition = network.optimize.solve_model(solver_name="highs", output_flag=False, **solve_kwargs)
+    assert condition == "optimal", condition
+    return network
+
+
+def small_input_data(profiles, ess_overrides=None):
+    """
+    input_data of optimization_model for the synthetic case: one solar project and battery options.
+
+    Parameters:
+    - profiles (tuple): (demand, solar, wind) from the small_profiles fixture.
+    - ess_overrides (list, optional): One dict per battery option, updating the default battery data.
+    """
+    _, solar, _ = profiles
+    battery = {"capital_cost": SMALL_COSTS["Battery_captialCost"], "marginal_cost": SMALL_COSTS["Battery_marginalCost"],
+               "efficiency": SMALL_BATTERY["Battery_Eff_store"], "DoD": SMALL_POLICY["DoD"],
+               "max_energy_capacity": SMALL_BATTERY["Battery_max_energy_capacity"]}
+    return {"IPP1": {
+        "Solar": {"Solar_1": {"profile": solar.copy(), "capital_cost": SMALL_COSTS["Solar_captialCost"],
+                              "marginal_cost": SMALL_COSTS["Solar_marginalCost"],
+                              "max_capacity": SMALL_COSTS["Solar_maxCapacity"]}},
+        "ESS": {f"ESS_{i + 1}": dict(battery, **override) for i, override in enumerate(ess_overrides or [{}])}}}
+
+
+def small_scenario():
+    """Scenario keyword arguments of optimization_model for the synthetic case."""
+    return dict(re_replacement=SMALL_POLICY["DO"] * 100, OA_cost=1000,
+                curtailment_selling_price=SMALL_POLICY["curtailment_selling_price"],
+                sell_curtailment_percentage=SMALL_POLICY["sell_curtailment_percentage"],
+                annual_curtailment_limit=SMALL_POLICY["annual_curtailment_limit"],
+                peak_target=SMALL_POLICY["peak_target"], peak_hours=SMALL_POLICY["peak_hours"])
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from batch_analysis import analyze_networks_batch
+from run_Optimizer import analyze_network_results, combination_key
+from conftest import SMALL_POLICY, solve_small
+
+COMBINATIONS = {"S+E": dict(solar=True, wind=False, battery=True),
+                "W+E": dict(solar=False, wind=True, battery=True),
+                "S+W": dict(solar=True, wind=True, battery=False),
+                "S+W+E": dict(solar=True, wind=True, battery=True)}
+OA_COST = 1000
+
+
+@pytest.fixture(scope="module")
+def solved(small_profiles):
+    networks = {}
+    for techs in COMBINATIONS.values():
+        names = dict(ipp_name="IPP1", solar_name="Solar_1" if techs["solar"] else None,
+                     wind_name="Wind_1" if techs["wind"] else None, ess_name="ESS_1" if techs["battery"] else None)
+        networks[combination_key(**names)] = (solve_small(small_profiles, **techs), names)
+    return networks
+
+
+def test_single_network_path_matches_batch(solved):
+    results_dict = {}
+    for network, names in solved.values():
+        analyze_network_results(network=network, results_dict=results_dict, OA_cost=OA_COST, export_excel=False,
+                                solve=False, sell_curtailment_percentage=SMALL_POLICY["sell_curtailment_percentage"],
+                                curtailment_selling_price=SMALL_POLICY["curtailment_selling_price"], **names)
+    batch = analyze_networks_batch({key: network for key, (network, _) in solved.items()},
+                                   SMALL_POLICY["sell_curtailment_percentage"],
+                                   SMALL_POLICY["curtailment_selling_price"], OA_COST)
+
+    assert set(results_dict) == set(batch.index)
+    for key, row in batch.iterrows():
+        for column, value in row.items():
+            assert results_dict[key][column] == pytest.approx(value, rel=1e-12), (key, column)
+
+
+def test_hourly_columns_follow_network(solved):
+    network, names = solved["IPP1-Solar_1-Wind_1-ESS_1"]
+    results_dict = {}
+    analyze_network_results(network=network, results_dict=results_dict, OA_cost=OA_COST, export_excel=False,
+                            solve=False, sell_curtailment_percentage=SMALL_POLICY["sell_curtailment_percentage"],
+                            curtailment_selling_price=SMALL_POLICY["curtailment_selling_price"], **names)
+    result = results_dict["IPP1-Solar_1-Wind_1-ESS_1"]
+    allocation = network.generators_t.p[["Solar", "Wind"]].sum(axis=1)
+    battery = network.storage_units_t.p_dispatch["Battery"] - network.storage_units_t.p_store["Battery"]
+    pd.testing.assert_series_equal(result["Total Demand met by allocation"], allocation + battery,
+                                   check_names=False, atol=1e-4)
+    unmet = network.generators_t.p["Unmet_Demand"].to_numpy()
+    assert np.array_equal(result["Demand met"] == "Yes", unmet <= 0)
+
+
+def test_objective_aggregate_cost_includes_fixed_capex(small_profiles, solved):
+    network, _ = solved["IPP1-Solar_1-ESS_1"]
+    capacities = {"Solar": network.generators.at["Solar", "p_nom_opt"],
+                  "Battery": network.storage_units.at["Battery", "p_nom_opt"]}
+    fixed = solve_small(small_profiles, solar=True, wind=False, battery=True, fixed_capacities=capacities)
+    summary = analyze_networks_batch({"optimized": network, "fixed": fixed}, SMALL_POLICY["sell_curtailment_percentage"],
+                                     SMALL_POLICY["curtailment_selling_price"], OA_COST)
+    assert summary.at["fixed", "Objective Aggregate Cost"] == pytest.approx(
+        summary.at["optimized", "Objective Aggregate Cost"], rel=1e-6)
@@ -0,0 +1,64 @@
+import logging
+import warnings
+
+import numpy as np
+import pytest
+
+from capacity_surrogate import cross_validated_error, interpolation_bounds
+from main import optimization_model
+from run_options import ModeOptions, as_options
+from conftest import small_input_data, small_scenario
+
+KEY = "IPP1-Solar_1-ESS_1"
+GRID = {"Solar": [0, 150, 300, 450], "Battery": [0, 50, 100]}
+
+
+def surrogate(profiles, **kwargs):
+    demand, _, _ = profiles
+    result = optimization_model(small_input_data(profiles), hourly_demand=demand.to_frame(), export_excel=False,
+                                mode={"capacity_grid": GRID}, **kwargs, **small_scenario())
+    return result[KEY]
+
+
+def test_bounds_of_a_kink():
+    axis = np.linspace(0, 10, 11)
+    # Kink at 4.5, inside a cell
+    values = np.maximum(axis - 4.5, 0)[None, :]
+    bounds = interpolation_bounds([axis], values)
+    assert bounds[0, 4] >= 0.25
+    assert np.allclose(np.delete(bounds[0], [3, 4, 5]), 0)
+
+    # A two-point axis has no neighbouring slope; infinite values count as unknown, without warnings
+    assert np.isnan(interpolation_bounds([np.array([0.0, 1.0])], np.array([[0.0, 1.0]]))).all()
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        values = np.array([[np.inf, 2.0, 1.0, 0.5, 0.5]])
+        bounds = interpolation_bounds([np.arange(5.0)], values)
+        worst, mean = cross_validated_error([np.arange(5.0)], values)
+    assert np.isnan(bounds[0, 0]) and np.isfinite(bounds[0, 1:]).all()
+    assert np.isfinite(worst).all() and np.isfinite(mean).all()
+
+
+def test_diagnostics(small_profiles):
+    diagnostics = surrogate(small_profiles).diagnostics()
+
+    assert diagnostics["Grid Points"] == 12 and diagnostics["Coverage (%)"] == 100
+    assert 0 <= diagnostics["Cells Without Bound (%)"] < 100
+    assert np.isfinite(diagnostics["Cross-Validated Max Error"]["Annual Demand Offset"])
+    assert diagnostics["Cross-Validated Mean Error"]["Annual Demand Offset"] \
+        <= diagnostics["Cross-Validated Max Error"]["Annual Demand Offset"]
+
+
+def test_conflicting_modes_are_rejected():
+    with pytest.raises(ValueError, match="cannot be combined"):
+        as_options(ModeOptions, {"operational_capacities": {KEY: {"Solar": 300}}, "capacity_grid": GRID})
+
+
+def test_disabled_features_are_logged(small_profiles, tmp_path, caplog):
+    with caplog.at_level(logging.WARNING, logger="debug_logger"):
+        surrogate(small_profiles, solver={"preset": "deterministic"},
+                  cache={"journal_path": tmp_path / "journal.jsonl"})
+    messages = [record.message for record in caplog.records]
+    assert any("journal is not used" in message for message in messages)
+    assert any("solver preset not used" in message for message in messages)
+    assert not (tmp_path / "journal.jsonl").exists()
@@ -0,0 +1,60 @@
+import pandas as pd
+import pytest
+
+import main
+from checkpoint import append_journal, load_journal
+from conftest import small_input_data, small_scenario
+
+KEY = "IPP1-Solar_1-ESS_1"
+
+
+@pytest.fixture
+def run(small_profiles, monkeypatch, tmp_path):
+    """Run optimization_model on the synthetic S+E case with a journal; returns (results, solved keys)."""
+    demand = small_profiles[0]
+    solve_combination = main.solve_combination
+
+    def optimize(journal_path=tmp_path / "journal.jsonl", demand_scale=1.0, **overrides):
+        solved = []
+
+        def counting_solve(**job):
+            key, result = solve_combination(**job)
+            solved.append(key)
+            return key, result
+
+        monkeypatch.setattr(main, "solve_combination", counting_solve)
+        kwargs = small_scenario()
+        kwargs.update(overrides)
+        result = main.optimization_model(small_input_data(small_profiles),
+                                         hourly_demand=pd.DataFrame({"Demand": demand * demand_scale}),
+                                         cache={"journal_path": journal_path}, export_excel=False, **kwargs)
+        return result, solved
+
+    return optimize
+
+
+def test_resume_skips_unchanged_combination(run):
+    first, solved = run()
+    assert solved == [KEY]
+    resumed, solved = run()
+    assert solved == []
+    assert resumed[KEY]["Per Unit Cost"] == pytest.approx(first[KEY]["Per Unit Cost"])
+
+
+@pytest.mark.parametrize("change", [dict(re_replacement=55), dict(OA_cost=2000), dict(demand_scale=1.1),
+                                    dict(freq="30min"), dict(start="2023-01-01"),
+                                    dict(mode={"operational_capacities": {KEY: {"Solar": 300, "Battery": 50}}})])
+def test_resume_with_changed_inputs_resolves(run, change):
+    run()
+    _, solved = run(**change)
+    assert solved == [KEY]
+    # The original inputs are still journaled and restored without solving
+    _, solved = run()
+    assert solved == []
+
+
+def test_records_without_signature_are_ignored(tmp_path):
+    journal = tmp_path / "journal.jsonl"
+    append_journal(journal, KEY, {"Per Unit Cost": 1.0})
+    assert load_journal(journal) == {KEY: {"Per Unit Cost": 1.0}}
+    assert load_journal(journal, {KEY: "signature"}, "demand") == {}
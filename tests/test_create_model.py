@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from batch_analysis import stack_network_results
+from createModel import optimize_network
+from main import optimization_model
+from setup_Components import setup_network
+from conftest import SMALL_BATTERY, SMALL_COSTS, SMALL_POLICY, small_input_data, small_scenario, solve_small
+
+
+def build(profiles, renewable_projects=None):
+    demand, solar, wind = profiles
+    network = setup_network(demand_data=demand, solar_profile=solar, wind_profile=wind, solar_name="Solar_1",
+                            wind_name="Wind_1", ess_name="ESS_1", renewable_projects=renewable_projects,
+                            **SMALL_COSTS, **SMALL_BATTERY)
+    return network
+
+
+def test_any_number_of_projects(small_profiles):
+    _, solar, wind = small_profiles
+    projects = {f"Solar_{i}": {"profile": solar * (1 - 0.1 * i), "max_capacity": 200, "capital_cost": 4e7,
+                               "marginal_cost": 150} for i in range(2, 5)}
+    network = build(small_profiles, projects)
+    m = optimize_network(network=network, demand_data=network.loads_t.p_set["ElectricityDemand"], ess_name="ESS_1",
+                         **SMALL_COSTS, **SMALL_POLICY)
+    assert list(m.constraints["curtailment_calculation_constraint"].coords["Generator"].values) == \
+        ["Solar", "Wind", "Solar_2", "Solar_3", "Solar_4"]
+    status, condition = network.optimize.solve_model(solver_name="highs", output_flag=False)
+    assert condition == "optimal"
+
+    with pytest.raises(ValueError):
+        build(small_profiles, {"Solar": projects["Solar_2"]})
+
+
+def test_static_p_max_pu(small_profiles):
+    # A generator with a constant p_max_pu has no column in generators_t.p_max_pu
+    network = build(small_profiles)
+    network.generators_t.p_max_pu = network.generators_t.p_max_pu.drop(columns="Wind")
+    network.generators.loc["Wind", "p_max_pu"] = 0.4
+    optimize_network(network=network, demand_data=network.loads_t.p_set["ElectricityDemand"], ess_name="ESS_1",
+                     **SMALL_COSTS, **SMALL_POLICY)
+    status, condition = network.optimize.solve_model(solver_name="highs", output_flag=False)
+    assert condition == "optimal"
+    stacked = stack_network_results({"IPP1-Solar_1-Wind_1-ESS_1": network})
+    assert np.allclose(stacked["wind_pu"], 0.4)
+    available = 0.4 * network.generators.at["Wind", "p_nom_opt"]
+    assert (network.generators_t.p["Wind"] <= available + 1e-6).all()
+
+
+@pytest.mark.parametrize("mode", [None, {"resample": "3h"}], ids=["full", "resampled"])
+def test_wind_combinations(small_profiles, mode):
+    demand, _, wind = small_profiles
+    input_data = small_input_data(small_profiles)
+    input_data["IPP1"]["Wind"] = {"Wind_1": {"profile": wind.copy(), "capital_cost": SMALL_COSTS["Wind_captialCost"],
+                                             "marginal_cost": SMALL_COSTS["Wind_marginalCost"],
+                                             "max_capacity": SMALL_COSTS["Wind_maxCapacity"]}}
+    result = optimization_model(input_data, hourly_demand=pd.DataFrame({"Demand": demand}), export_excel=False,
+                                mode=mode, **small_scenario())
+    assert set(result) == {"IPP1-Solar_1-ESS_1", "IPP1-Wind_1-ESS_1", "IPP1-Solar_1-Wind_1-ESS_1",
+                           "IPP1-Solar_1-Wind_1"}
+    if mode is None:
+        network = solve_small(small_profiles, solar=False, wind=True, battery=True)
+        assert result["IPP1-Wind_1-ESS_1"]["Optimal Wind Capacity (MW)"] == pytest.approx(
+            network.generators.at["Wind", "p_nom_opt"], rel=1e-6)
@@ -0,0 +1,38 @@
+import pandas as pd
+import pytest
+
+import regression
+
+
+@pytest.fixture(scope="module")
+def reference():
+    """Golden inputs and reference outputs, with the modification times of the reference workbooks."""
+    paths = [regression.REFERENCE_DIR / name for name in (regression.SUMMARY_FILE, regression.HOURLY_FILE)]
+    mtimes = [path.stat().st_mtime_ns for path in paths]
+    yield regression.load_reference()
+    # No mode may export over the reference workbooks
+    assert [path.stat().st_mtime_ns for path in paths] == mtimes
+
+
+@pytest.mark.parametrize("mode", list(regression.MODES))
+def test_golden_case(mode, reference, tmp_path):
+    demand, solar_profile, summary, hourly = reference
+    warm_start_dir = tmp_path / "warm_start" if regression.MODES[mode].get("warm_start") else None
+    result, _ = regression.run_mode(mode, demand, solar_profile, warm_start_dir)
+
+    assert "error" not in result, result
+    assert len(result) == regression.MODES[mode].get("ess_copies", 1)
+    for key, entry in result.items():
+        assert regression.compare_to_reference(entry, summary, hourly, regression.MODES[mode].get("rtol")) == [], key
+
+
+def test_runtimes_are_appended(tmp_path):
+    report = pd.DataFrame({"Runtime (s)": [1.5], "Solve Time (s)": [1.0], "Combinations": [1], "Passed": [True],
+                           "Failures": [[]]}, index=pd.Index(["serial"], name="Mode"))
+    path = tmp_path / regression.RUNTIMES_FILE
+    regression.save_runtimes(report, path)
+    regression.save_runtimes(report, path)
+
+    runtimes = pd.read_csv(path)
+    assert list(runtimes.columns) == ["Timestamp", "Mode", "Runtime (s)", "Solve Time (s)", "Combinations", "Passed"]
+    assert list(runtimes["Mode"]) == ["serial", "serial"]
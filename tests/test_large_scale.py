@@ -0,0 +1,47 @@
+import numpy as np
+
+import large_scale
+from createModel import optimize_network
+from setup_Components import setup_network
+from conftest import SMALL_BATTERY, SMALL_COSTS, SMALL_POLICY
+
+
+def build(profiles):
+    demand, solar, _ = profiles
+    network = setup_network(demand_data=demand, solar_profile=solar, solar_name="Solar_1", ess_name="ESS_1",
+                            **SMALL_COSTS, **SMALL_BATTERY)
+    optimize_network(network=network, demand_data=demand, ess_name="ESS_1", **SMALL_COSTS, **SMALL_POLICY)
+    return network
+
+
+def test_map_highs_solution_matches_linopy(small_profiles):
+    network = build(small_profiles)
+    m = network.model
+    status, _ = m.solve(solver_name="highs", io_api="direct", output_flag=False)
+    assert status == "ok"
+    expected = {name: var.solution.values.copy() for name, var in m.variables.items()}
+
+    objective = large_scale._map_highs_solution(m)
+    assert np.isclose(objective, m.objective.value)
+    for name, var in m.variables.items():
+        np.testing.assert_allclose(var.solution.values, expected[name], err_msg=name)
+
+
+def test_unmappable_point_falls_back(small_profiles, monkeypatch):
+    network = build(small_profiles)
+
+    def fail(m):
+        raise ValueError("columns do not match")
+
+    # Report the point as status unknown so that it has to be mapped
+    solve_model = network.optimize.solve_model
+
+    def unknown_status(**kwargs):
+        solve_model(**kwargs)
+        return "warning", "unknown"
+
+    monkeypatch.setattr(large_scale, "_map_highs_solution", fail)
+    monkeypatch.setattr(network.optimize, "solve_model", unknown_status)
+    capacities, _, consistent = large_scale.solve_first_order(
+        network, {"solver_name": "highs", "solver": "pdlp", "output_flag": False})
+    assert capacities is None and not consistent
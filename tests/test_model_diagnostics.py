@@ -0,0 +1,38 @@
+import mmap
+import time
+
+import numpy as np
+
+from model_diagnostics import SolvePeakRss, release_network
+from run_Optimizer import analyze_network_results
+from conftest import SMALL_POLICY, solve_small
+
+
+def test_solve_peak_rss_sees_transient_allocation():
+    with SolvePeakRss(interval=0.01) as rss:
+        # 50 MB of fresh pages, unmapped before the block ends (heap memory freed by earlier tests may
+        # be reused without growing RSS)
+        block = mmap.mmap(-1, 50_000_000)
+        np.frombuffer(block, dtype=np.uint8)[:] = 1
+        time.sleep(0.2)
+        block.close()
+    assert rss.peak_mb - rss.before_mb > 40
+    assert rss.peak_mb >= rss.after_mb
+
+
+def test_results_do_not_share_network_memory(small_profiles):
+    network = solve_small(small_profiles)
+    results_dict = {}
+    analyze_network_results(network=network, results_dict=results_dict, OA_cost=1000, export_excel=False,
+                            solve=False, ipp_name="IPP1", solar_name="Solar_1", ess_name="ESS_1",
+                            sell_curtailment_percentage=SMALL_POLICY["sell_curtailment_percentage"],
+                            curtailment_selling_price=SMALL_POLICY["curtailment_selling_price"])
+    result = results_dict["IPP1-Solar_1-ESS_1"]
+    network_arrays = [network.generators_t.p.to_numpy(), network.storage_units_t.state_of_charge.to_numpy(),
+                      network.storage_units_t.p_store.to_numpy()]
+    for column in ("Solar Allocation", "SOC", "ESS Charge", "Unmet demand"):
+        values = result[column].to_numpy()
+        assert not any(np.shares_memory(values, array) for array in network_arrays), column
+
+    release_network(network)
+    assert result["Solar Allocation"].sum() > 0
@@ -0,0 +1,40 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+import main
+from main import optimization_model
+from run_options import SolverOptions
+from conftest import small_input_data, small_scenario
+
+
+@pytest.mark.parametrize("parallelism", [None, {"n_workers": 2, "total_threads": 2}], ids=["serial", "parallel"])
+def test_failing_combination_does_not_abort_run(small_profiles, parallelism):
+    # ESS_2 has an invalid energy capacity, so building its model raises inside solve_combination
+    input_data = small_input_data(small_profiles, [{}, {"max_energy_capacity": "four"}])
+    result = optimization_model(input_data, hourly_demand=pd.DataFrame({"Demand": small_profiles[0]}),
+                                export_excel=False, parallelism=parallelism, **small_scenario())
+    assert list(result) == ["IPP1-Solar_1-ESS_1"]
+
+
+def test_grouped_options_reject_unknown_fields(small_profiles):
+    with pytest.raises(ValueError, match="n_wokers"):
+        optimization_model(small_input_data(small_profiles), hourly_demand=pd.DataFrame({"Demand": small_profiles[0]}),
+                           parallelism={"n_wokers": 2}, **small_scenario())
+    assert SolverOptions(first_order_tolerance=1e-3).first_order_limits()["tolerance"] == 1e-3
+
+
+def test_total_threads_are_shared_by_workers(small_profiles, monkeypatch):
+    solver_threads = {}
+
+    def record_threads(**job):
+        solver_threads[job["ess_name"]] = job["solver_threads"]
+        return None, None
+
+    monkeypatch.setattr(main, "solve_combination", record_threads)
+    monkeypatch.setattr(main, "ProcessPoolExecutor", ThreadPoolExecutor)
+    input_data = small_input_data(small_profiles, [{}, {}])
+    optimization_model(input_data, hourly_demand=pd.DataFrame({"Demand": small_profiles[0]}), export_excel=False,
+                       parallelism={"n_workers": 2, "total_threads": 4}, **small_scenario())
+    assert solver_threads == {"ESS_1": 2, "ESS_2": 2}
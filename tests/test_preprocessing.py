@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from preprocessing import PROFILE_DTYPE, align_profiles, preprocess_multiple_profiles, read_profile_table
+
+
+@pytest.fixture
+def catalogue(tmp_path, small_profiles):
+    demand, solar, wind = small_profiles
+    table = pd.DataFrame({"Time": demand.index, "Solar_IPP1_Project1": solar.to_numpy(),
+                          "Wind_IPP1_Project1": wind.to_numpy(), "Solar_IPP2_Project1": solar.to_numpy() * 0.9,
+                          "Notes": "x"})
+    path = tmp_path / "catalogue.csv"
+    table.to_csv(path, index=False)
+    return path, table
+
+
+def test_csv_is_read_into_one_column_major_block(catalogue):
+    path, table = catalogue
+    values, columns, index = read_profile_table(path, index_col="Time", chunk_rows=7)
+
+    assert values.dtype == PROFILE_DTYPE and values.flags.f_contiguous
+    assert list(columns.index) == ["Solar_IPP1_Project1", "Wind_IPP1_Project1", "Solar_IPP2_Project1"]
+    np.testing.assert_allclose(values, table[list(columns.index)].to_numpy(), rtol=1e-6)
+    assert len(index) == len(table)
+
+
+def test_alignment(catalogue, small_profiles):
+    path, _ = catalogue
+    demand, solar, _ = small_profiles
+    values, _, index = read_profile_table(path, index_col="Time")
+
+    # Rows already in demand order are not copied
+    assert align_profiles(values, index, demand.index) is values
+    shifted = align_profiles(values, index, demand.index + pd.Timedelta(hours=1))
+    assert shifted.dtype == PROFILE_DTYPE and np.isnan(shifted[-1]).all()
+    with pytest.raises(ValueError, match="not unique"):
+        align_profiles(values, np.concatenate([index[:-1], index[:1]]), demand.index)
+
+    input_data = preprocess_multiple_profiles(path, demand.index, index_col="Time")
+    np.testing.assert_allclose(input_data["IPP1"]["Solar"]["Solar_1"]["profile"], solar, rtol=1e-6)
+    assert set(input_data) == {"IPP1", "IPP2"}
@@ -0,0 +1,41 @@
+import pytest
+
+import main
+from setup_Components import fixed_capital_cost
+from conftest import SMALL_BATTERY, SMALL_COSTS, SMALL_POLICY, solve_small
+
+
+def test_failed_coarse_solve_falls_back(small_profiles):
+    demand, solar, _ = small_profiles
+    network_kwargs = dict(SMALL_COSTS, **SMALL_BATTERY, solar_name="Solar_1", ess_name="ESS_1")
+    model_kwargs = dict(SMALL_COSTS, **SMALL_POLICY, ess_name="ESS_1",
+                        Battery_max_energy_capacity=SMALL_BATTERY["Battery_max_energy_capacity"])
+    for name in ("Wind_maxCapacity", "Wind_captialCost", "Wind_marginalCost"):
+        network_kwargs.pop(name)
+    capacities = main.optimize_coarse_capacities(demand, solar, "3h", network_kwargs, model_kwargs,
+                                                 {"solver_name": "highs", "output_flag": False})
+    assert set(capacities) == {"Solar", "Battery"}
+    # A solver error is contained: the caller optimizes at full resolution instead
+    assert main.optimize_coarse_capacities(demand, solar, "3h", network_kwargs, model_kwargs,
+                                           {"solver_name": "no_such_solver"}) is None
+
+
+def test_objective_includes_fixed_capex(small_profiles):
+    network = solve_small(small_profiles, solar=True, wind=False, battery=True)
+    capacities = {"Solar": network.generators.at["Solar", "p_nom_opt"],
+                  "Battery": network.storage_units.at["Battery", "p_nom_opt"]}
+    fixed = solve_small(small_profiles, solar=True, wind=False, battery=True, fixed_capacities=capacities)
+    assert fixed_capital_cost(network) == 0
+    assert fixed.objective + fixed_capital_cost(fixed) == pytest.approx(network.objective, rel=1e-6)
+
+
+def test_coarse_capacities_cover_every_project(small_profiles):
+    demand, solar, wind = small_profiles
+    network_kwargs = dict(SMALL_COSTS, **SMALL_BATTERY, solar_name="Solar_1", ess_name="ESS_1",
+                          renewable_projects={"Wind_2": {"profile": wind, "max_capacity": 500, "capital_cost": 6e7,
+                                                         "marginal_cost": 250}})
+    model_kwargs = dict(SMALL_COSTS, **SMALL_POLICY, ess_name="ESS_1",
+                        Battery_max_energy_capacity=SMALL_BATTERY["Battery_max_energy_capacity"])
+    capacities = main.optimize_coarse_capacities(demand, solar, "3h", network_kwargs, model_kwargs,
+                                                 {"solver_name": "highs", "output_flag": False})
+    assert set(capacities) == {"Solar", "Wind_2", "Battery"}
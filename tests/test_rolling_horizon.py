@@ -0,0 +1,81 @@
+import logging
+
+import highspy
+import numpy as np
+
+from main import optimization_model
+from rolling_horizon import change_row_bounds, policy_budgets, rolling_dispatch, window_bounds
+from conftest import SMALL_BATTERY, SMALL_COSTS, SMALL_POLICY, small_input_data, small_scenario
+
+CAPACITIES = {"Solar": 300, "Battery": 50}
+KEY = "IPP1-Solar_1-ESS_1"
+
+
+def dispatch(profiles, carry_over_limit):
+    demand, solar, _ = profiles
+    network_kwargs = dict(SMALL_COSTS, **SMALL_BATTERY, solar_name="Solar_1", ess_name="ESS_1")
+    # A loose curtailment limit leaves most of every window's allowance unused
+    model_kwargs = dict(SMALL_COSTS, **dict(SMALL_POLICY, annual_curtailment_limit=0.9), ess_name="ESS_1",
+                        Battery_max_energy_capacity=SMALL_BATTERY["Battery_max_energy_capacity"])
+    network, windows = rolling_dispatch(demand, solar, capacities=CAPACITIES, network_kwargs=network_kwargs,
+                                        model_kwargs=model_kwargs, window=6, overlap=3,
+                                        solve_kwargs={"solver_name": "highs"}, carry_over_limit=carry_over_limit)
+    # Pro-rata share of the horizon curtailment budget of every window
+    shares, budgets = policy_budgets(network, model_kwargs)
+    share = shares["curtailment"]
+    pro_rata = np.array([budgets["curtailment"] * share[start:end].sum() / share.sum()
+                         for start, _, end in window_bounds(network.snapshots, 6, 3)])
+    return windows, budgets["curtailment"], pro_rata
+
+
+def test_carry_over_is_capped(small_profiles):
+    capped, budget, pro_rata = dispatch(small_profiles, carry_over_limit=2.0)
+    uncapped, _, _ = dispatch(small_profiles, carry_over_limit=None)
+
+    allowance = capped["Curtailment Allowance (MWh)"].to_numpy()
+    assert (allowance <= 2.0 * pro_rata + 1e-6).all()
+    # Without the cap unused budget piles up: the last window (at night, no generation) is allowed 40%+
+    # of the horizon budget
+    assert uncapped["Curtailment Allowance (MWh)"].iloc[-1] > 0.4 * budget
+    assert (uncapped["Curtailment Allowance (MWh)"].to_numpy() > 2.0 * pro_rata + 1e-6).any()
+    assert capped["Curtailment (MWh)"].sum() <= budget + 1e-6
+
+
+def test_presets_in_rolling_dispatch(small_profiles, caplog):
+    demand, _, _ = small_profiles
+    operational = {"mode": {"operational_capacities": {KEY: CAPACITIES}, "rolling_window": 12,
+                            "rolling_overlap": 6}}
+    result = optimization_model(small_input_data(small_profiles), hourly_demand=demand.to_frame(),
+                                export_excel=False, solver={"preset": "deterministic"}, **operational,
+                                **small_scenario())
+    assert result[KEY]["Solver Preset"] == "deterministic"
+
+    with caplog.at_level(logging.WARNING, logger="debug_logger"):
+        result = optimization_model(small_input_data(small_profiles), hourly_demand=demand.to_frame(),
+                                    export_excel=False, solver={"preset": "large-scale"}, **operational,
+                                    **small_scenario())
+    assert result[KEY]["Solver Preset"] == "default"
+    assert any("large-scale preset not used in rolling dispatch" in record.message for record in caplog.records)
+    assert np.isfinite(result[KEY]["Per Unit Cost"])
+
+
+def test_row_bounds_are_changed_in_one_call():
+    class BatchedHighs(highspy.Highs):
+        batches = 0
+
+        def changeRowsBounds(self, num, indices, lower, upper):
+            self.batches += 1
+            for row, row_lower, row_upper in zip(indices, lower, upper):
+                self.changeRowBounds(int(row), float(row_lower), float(row_upper))
+
+    rows = np.array([0, 2], dtype=np.int32)
+    lower, upper = np.array([1.0, -np.inf]), np.array([3.0, 4.0])
+    for highs in (highspy.Highs(), BatchedHighs()):
+        highs.addVars(3, np.zeros(3), np.full(3, 10.0))
+        highs.addRows(3, np.full(3, -np.inf), np.full(3, 5.0), 3, np.arange(3, dtype=np.int32),
+                      np.arange(3, dtype=np.int32), np.ones(3))
+        change_row_bounds(highs, rows, lower, upper)
+        lp = highs.getLp()
+        assert np.array_equal(lp.row_lower_, [1.0, -np.inf, -np.inf])
+        assert np.array_equal(lp.row_upper_, [3.0, 5.0, 4.0])
+    assert highs.batches == 1
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from sensitivity import _renewable_generation, dual_sensitivity_report
+from conftest import SMALL_POLICY, solve_small
+
+
+@pytest.fixture(scope="module")
+def solved(small_profiles):
+    return solve_small(small_profiles, solar=True, wind=True, battery=True)
+
+
+def test_curtailment_limit_reported_in_mwh(solved):
+    report = dual_sensitivity_report(solved)
+    row = report.loc["annual_curtailment_upper_limit_constraint"]
+    limit = SMALL_POLICY["annual_curtailment_limit"] * _renewable_generation(solved)
+    assert row["RHS"] == pytest.approx(limit, rel=1e-6)
+    assert row["What-if Step"] == pytest.approx(limit / SMALL_POLICY["annual_curtailment_limit"] / 100, rel=1e-6)
+    assert row["RHS Lower"] <= row["RHS"] <= row["RHS Upper"]
+
+
+def test_what_if_checked_against_rhs_range(small_profiles, solved, monkeypatch):
+    report = dual_sensitivity_report(solved)
+    binding = report[report["Binding Rows"] > 0]
+    assert binding["Within RHS Range"].dropna().map(type).eq(bool).all()
+
+    # +1 MWh of peak demand served is inside the valid range, so re-solving must reproduce the what-if value
+    row = report.loc["peak_hour_demand_constraint"]
+    assert row["Within RHS Range"]
+    total_peak_demand = row["RHS"] / (1 - SMALL_POLICY["peak_target"])
+    monkeypatch.setitem(SMALL_POLICY, "peak_target", SMALL_POLICY["peak_target"] - row["What-if Step"] / total_peak_demand)
+    resolved = solve_small(small_profiles, solar=True, wind=True, battery=True)
+    assert resolved.objective - solved.objective == pytest.approx(row["What-if Value"], rel=1e-4)
+
+
+def test_gurobi_ranging(small_profiles):
+    gurobipy = pytest.importorskip("gurobipy")
+    network = solve_small(small_profiles, solar=True, wind=True, battery=True)
+    try:
+        network.optimize.solve_model(solver_name="gurobi", OutputFlag=0)
+    except gurobipy.GurobiError as e:
+        pytest.skip(f"Gurobi not usable: {e}")
+    report = dual_sensitivity_report(network)
+    scalar = report[report["Rows"] == 1]
+    assert scalar[["RHS Lower", "RHS Upper"]].notna().all().all()
+    assert (scalar["RHS Lower"] <= scalar["RHS"] + 1e-6).all() and (scalar["RHS"] <= scalar["RHS Upper"] + 1e-6).all()
+    assert report.loc["demand_offset_constraint", "Within RHS Range"] in (True, False)
@@ -0,0 +1,75 @@
+import json
+import os
+import time
+
+import numpy as np
+import pytest
+
+from warm_start import (INDEX_FILE, find_similar_job, new_job_dir, prune_store, save_solved_job,
+                        warm_start_kwargs)
+from conftest import solve_small
+
+
+def _save_job(store, signature, demand, warm_start_from=None):
+    job_dir = new_job_dir(store)
+    (job_dir / "basis.bas").write_text("basis")
+    save_solved_job(job_dir, signature, demand, "IPP1-Solar_1-ESS_1", warm_start_from)
+    return job_dir.name
+
+
+def test_lookup_uses_index_and_closest_demand(tmp_path):
+    demand = np.full(24, 100.0)
+    _save_job(tmp_path, "a", demand * 1.04)
+    closest = _save_job(tmp_path, "a", demand * 1.01)
+    _save_job(tmp_path, "b", demand)
+
+    job = find_similar_job(tmp_path, "a", demand, tolerance=0.05)
+    assert job["job"] == closest and np.isclose(job["distance"], 0.01 / 1.01)
+    assert find_similar_job(tmp_path, "c", demand) is None
+    assert find_similar_job(tmp_path, "a", demand * 2) is None
+    # Nothing but the basis and the demand profile is written per job
+    assert sorted(p.name for p in (tmp_path / closest).iterdir()) == ["basis.bas", "demand.npy"]
+
+
+def test_prune_evicts_least_recently_used(tmp_path):
+    demand = np.ones(24)
+    used = _save_job(tmp_path, "a", demand)
+    stale = _save_job(tmp_path, "a", demand)
+    time.sleep(0.01)
+    _save_job(tmp_path, "a", demand, warm_start_from=used)
+    orphan = new_job_dir(tmp_path)
+    os.utime(orphan, (time.time() - 7200, time.time() - 7200))
+
+    removed = prune_store(tmp_path, max_jobs=2)
+    assert set(removed) == {stale, orphan.name}
+    assert not (tmp_path / stale).exists() and not orphan.exists()
+    with open(tmp_path / INDEX_FILE) as index:
+        assert stale not in {json.loads(line)["job"] for line in index}
+    assert find_similar_job(tmp_path, "a", demand)["job"] != stale
+
+
+def test_warm_start_respects_preset_algorithm(tmp_path):
+    job = {"job": "x", "job_dir": tmp_path}
+    ipm = warm_start_kwargs(job, tmp_path, "highs", {"solver": "ipm"})
+    assert "warmstart_fn" not in ipm and "solver" not in ipm
+    default = warm_start_kwargs(job, tmp_path, "highs", {})
+    assert default["solver"] == "simplex" and "warmstart_fn" in default
+    assert "solver" not in warm_start_kwargs(job, tmp_path, "gurobi", {"Method": 2})
+
+
+def test_warm_start_lowers_simplex_iterations(small_profiles, tmp_path):
+    demand, solar, wind = small_profiles
+    reference = new_job_dir(tmp_path)
+    solve_small(small_profiles, basis_fn=reference / "basis.bas")
+    job = {"job": reference.name, "job_dir": reference}
+
+    # A 2% demand change is a near match; the cold solve uses the same dual simplex settings
+    shifted = (demand * (1 + 0.02 * np.cos(np.arange(len(demand)))), solar, wind)
+    warm_kwargs = warm_start_kwargs(job, new_job_dir(tmp_path))
+    cold = solve_small(shifted, solver="simplex", simplex_dual_edge_weight_strategy=1)
+    warm = solve_small(shifted, **warm_kwargs)
+
+    cold_iterations = cold.model.solver_model.getInfo().simplex_iteration_count
+    warm_iterations = warm.model.solver_model.getInfo().simplex_iteration_count
+    assert warm_iterations < cold_iterations / 10
+    assert warm.objective == pytest.approx(cold.objective, rel=1e-9)
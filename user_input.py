@@ -1,6 +1,7 @@
 import pandas as pd
 import os
 from main import optimization_model
+from preprocessing import iter_profile_inputs
 
 def get_file_path(prompt):
     while True:
@@ -71,50 +72,67 @@ def main():
     peak_hours = [int(h.strip()) for h in peak_hours_input.split(",") if h.strip().isdigit()] 
 
 
-    # Get user profiles
-    solar_profiles = get_profile_inputs("solar")
-    wind_profiles = get_profile_inputs("wind")
-    battery_systems = get_battery_inputs()
+    # Load demand data; profiles are aligned to its snapshots
+    hourly_demand = pd.read_excel(demand_file)
+    hourly_demand.index = pd.date_range(start='2022-01-01', periods=len(hourly_demand), freq='h')
 
-    # Build input_data dict for optimizer
-    input_data = {'IPP1': {}}
-    if solar_profiles:
-        input_data['IPP1']['Solar'] = {}
-        for idx, s in enumerate(solar_profiles):
-            profile_df = pd.read_excel(s['path'])
-            input_data['IPP1']['Solar'][f'Solar_{idx+1}'] = {
-                'profile': profile_df.squeeze(),
-                'max_capacity': s['max_capacity'],
-                'capital_cost': s['capital_cost'],
-                'marginal_cost': s['marginal_cost']
-            }
-    if wind_profiles:
-        input_data['IPP1']['Wind'] = {}
-        for idx, w in enumerate(wind_profiles):
-            profile_df = pd.read_excel(w['path'])
-            input_data['IPP1']['Wind'][f'Wind_{idx+1}'] = {
-                'profile': profile_df.squeeze(),
-                'max_capacity': w['max_capacity'],
-                'capital_cost': w['capital_cost'],
-                'marginal_cost': w['marginal_cost']
-            }
-    if battery_systems:
-        input_data['IPP1']['ESS'] = {}
-        for idx, b in enumerate(battery_systems):
-            input_data['IPP1']['ESS'][f'ESS_{idx+1}'] = {
-                'capital_cost': b['capital_cost'],
-                'marginal_cost': b['marginal_cost'],
-                'efficiency': b['efficiency'],
-                'DoD': b['DoD'],
-                'max_energy_capacity': b['max_energy_capacity']  # Human-readable, for battery energy cap
-            }
+    # A catalogue holds the profiles of many IPPs in Tech_IPPn_Projectm columns and is read once
+    catalogue_path = get_file_path("Path to a profile catalogue (Excel or CSV with Tech_IPPn_Projectm columns), 0 to enter profiles one by one: ")
+    if catalogue_path is not None:
+        battery_systems = get_battery_inputs()
+        input_data = {}
+        for ipp, ipp_data in iter_profile_inputs(catalogue_path, hourly_demand.index):
+            for technology in ("Solar", "Wind"):
+                for project, details in ipp_data[technology].items():
+                    print(f"Enter details for {ipp} {project}:")
+                    details['max_capacity'] = get_float("  Max capacity (MW): ")
+                    details['capital_cost'] = get_float("  Capital cost: ")
+                    details['marginal_cost'] = get_float("  Marginal cost: ")
+            # The battery systems entered are offered to every IPP
+            ipp_data['ESS'] = {f'ESS_{idx+1}': dict(b) for idx, b in enumerate(battery_systems)}
+            input_data[ipp] = ipp_data
+    else:
+        # Get user profiles
+        solar_profiles = get_profile_inputs("solar")
+        wind_profiles = get_profile_inputs("wind")
+        battery_systems = get_battery_inputs()
 
-    # Load demand data
-    hourly_demand = pd.read_excel(demand_file)
+        # Build input_data dict for optimizer
+        input_data = {'IPP1': {}}
+        if solar_profiles:
+            input_data['IPP1']['Solar'] = {}
+            for idx, s in enumerate(solar_profiles):
+                profile_df = pd.read_excel(s['path'])
+                input_data['IPP1']['Solar'][f'Solar_{idx+1}'] = {
+                    'profile': profile_df.squeeze(),
+                    'max_capacity': s['max_capacity'],
+                    'capital_cost': s['capital_cost'],
+                    'marginal_cost': s['marginal_cost']
+                }
+        if wind_profiles:
+            input_data['IPP1']['Wind'] = {}
+            for idx, w in enumerate(wind_profiles):
+                profile_df = pd.read_excel(w['path'])
+                input_data['IPP1']['Wind'][f'Wind_{idx+1}'] = {
+                    'profile': profile_df.squeeze(),
+                    'max_capacity': w['max_capacity'],
+                    'capital_cost': w['capital_cost'],
+                    'marginal_cost': w['marginal_cost']
+                }
+        if battery_systems:
+            input_data['IPP1']['ESS'] = {}
+            for idx, b in enumerate(battery_systems):
+                input_data['IPP1']['ESS'][f'ESS_{idx+1}'] = {
+                    'capital_cost': b['capital_cost'],
+                    'marginal_cost': b['marginal_cost'],
+                    'efficiency': b['efficiency'],
+                    'DoD': b['DoD'],
+                    'max_energy_capacity': b['max_energy_capacity']  # Human-readable, for battery energy cap
+                }
 
     result = optimization_model(
         input_data=input_data,
-        consumer_demand_path=demand_file,
+        # The demand is already loaded (and indexed) above
         hourly_demand=hourly_demand,
         re_replacement=re_replacement,
         OA_cost=OA_cost,
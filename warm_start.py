@@ -0,0 +1,214 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger('debug_logger')  # Use the new debug logger
+
+# Index of the store: one JSON line per saved job, so lookups do not open every job directory
+INDEX_FILE = "index.jsonl"
+# Jobs kept by prune_store, least recently used evicted first
+MAX_JOBS = 50
+# Unindexed job directories older than this (s) are left over from killed runs
+ORPHAN_AGE_S = 3600
+
+
+def job_signature(profiles=None, **parameters):
+    """
+    Hash everything except the demand that determines the model structure and coefficients.
+
+    Two jobs with the same signature build LPs with identical rows and columns, so the basis of one
+    is a valid starting point for the other.
+
+    Parameters:
+    - profiles (dict, optional): Name -> pd.Series of generation profiles.
+    - **parameters: Scalar inputs of the combination (costs, DO, limits, peak hours, ...).
+
+    Returns:
+    - str: Hex digest of the signature.
+    """
+    digest = hashlib.sha1()
+    for name in sorted(parameters):
+        digest.update(f"{name}={parameters[name]!r};".encode())
+    for name in sorted(profiles or {}):
+        profile = profiles[name]
+        if profile is None:
+            continue
+        digest.update(name.encode())
+        digest.update(np.ascontiguousarray(np.asarray(profile, dtype=float)).tobytes())
+    return digest.hexdigest()
+
+
+def demand_distance(demand, reference):
+    """Relative L1 distance between two demand profiles (inf if their lengths differ)."""
+    demand = np.asarray(demand, dtype=float).reshape(-1)
+    reference = np.asarray(reference, dtype=float).reshape(-1)
+    if len(demand) != len(reference):
+        return np.inf
+    scale = np.abs(reference).sum()
+    return np.abs(demand - reference).sum() / scale if scale > 0 else np.inf
+
+
+def _read_index(store_dir):
+    """Job id -> index record of the store (a JSON line per saved job), skipping corrupt lines."""
+    index_path = Path(store_dir) / INDEX_FILE
+    records = {}
+    if not index_path.exists():
+        return records
+    with open(index_path, encoding="utf-8") as index:
+        for line in index:
+            try:
+                record = json.loads(line)
+                records[record["job"]] = record
+            except (json.JSONDecodeError, KeyError):
+                continue
+    return records
+
+
+def find_similar_job(store_dir=None, signature=None, demand=None, tolerance=0.05):
+    """
+    Find the previously solved job with the same signature and the closest demand profile.
+
+    Only the store index is read for every job; demand profiles are loaded for jobs with a matching
+    signature.
+
+    Parameters:
+    - store_dir (str or Path): Directory of the solved-job store.
+    - signature (str): job_signature of the new combination.
+    - demand (pd.Series or array): New demand profile.
+    - tolerance (float): Maximum relative L1 demand distance that counts as a near match.
+
+    Returns:
+    - dict or None: Index record of the job plus "job_dir" and "distance", or None if no near match.
+    """
+    store_dir = Path(store_dir)
+    best = None
+    for job, record in _read_index(store_dir).items():
+        job_dir = store_dir / job
+        if record["signature"] != signature or not (job_dir / "basis.bas").exists():
+            continue
+        try:
+            reference = np.load(job_dir / "demand.npy")
+        except (OSError, ValueError) as e:
+            logger.debug(f"Skipping unreadable solved job {job_dir}: {e}")
+            continue
+        distance = demand_distance(demand, reference)
+        if distance <= tolerance and (best is None or distance < best["distance"]):
+            best = dict(record, job_dir=job_dir, distance=distance)
+    return best
+
+
+def new_job_dir(store_dir=None):
+    """Create and return a fresh directory for a job in the store."""
+    job_dir = Path(store_dir) / uuid.uuid4().hex
+    job_dir.mkdir(parents=True, exist_ok=True)
+    return job_dir
+
+
+def warm_start_kwargs(similar_job=None, job_dir=None, solver_name="highs", solver_options=None):
+    """
+    solve_model keyword arguments that load the basis of similar_job and write the new basis to job_dir.
+
+    With a starting basis HiGHS skips presolve and goes straight to dual simplex. Initialising exact
+    steepest-edge weights on the unpresolved 8760-hour model costs more than a cold solve, so Devex
+    pricing is used instead; a near-match basis then needs only a few hundred iterations. A preset that
+    picks another HiGHS algorithm (e.g. interior point in fast-screen) is respected and the basis is not
+    loaded. Other solvers only get the basis files and keep their own algorithm settings.
+
+    Parameters:
+    - similar_job (dict, optional): Near-match job from find_similar_job.
+    - job_dir (Path): Directory the new basis is written to.
+    - solver_name (str): "highs" or "gurobi".
+    - solver_options (dict, optional): Options already chosen for the solve (solver preset).
+
+    Returns:
+    - dict: Keyword arguments to merge into the solve_model arguments.
+    """
+    kwargs = {"basis_fn": Path(job_dir) / "basis.bas"}
+    if similar_job is None:
+        return kwargs
+    if solver_name != "highs":
+        kwargs["warmstart_fn"] = Path(similar_job["job_dir"]) / "basis.bas"
+        return kwargs
+    algorithm = (solver_options or {}).get("solver", "choose")
+    if algorithm not in ("choose", "simplex"):
+        logger.info(f"Solver preset uses HiGHS '{algorithm}'; the stored basis of job "
+                    f"{similar_job['job']} is not used as a starting point.")
+        return kwargs
+    if algorithm == "choose":
+        logger.info(f"Warm start from job {similar_job['job']}: HiGHS switched from 'choose' to dual simplex.")
+    kwargs["warmstart_fn"] = Path(similar_job["job_dir"]) / "basis.bas"
+    kwargs["solver"] = "simplex"
+    kwargs["simplex_dual_edge_weight_strategy"] = 1
+    return kwargs
+
+
+def save_solved_job(job_dir=None, signature=None, demand=None, key=None, warm_start_from=None):
+    """
+    Register a solved job in the store: its demand profile next to the basis file and a line in the index.
+
+    Parameters:
+    - job_dir (Path): Directory returned by new_job_dir, already holding basis.bas after the solve.
+    - signature (str): job_signature of the combination.
+    - demand (pd.Series): Demand profile the job was solved for.
+    - key (str): Combination key of the job.
+    - warm_start_from (str, optional): Id of the job whose basis started this solve; counts as a use
+      of that job when the store is pruned.
+    """
+    job_dir = Path(job_dir)
+    np.save(job_dir / "demand.npy", np.asarray(demand, dtype=float).reshape(-1))
+    line = json.dumps({"job": job_dir.name, "signature": signature, "key": key, "saved_at": time.time(),
+                       "warm_start_from": warm_start_from})
+    # One short O_APPEND write per job, so parallel workers do not interleave their records
+    with open(job_dir.parent / INDEX_FILE, "a", encoding="utf-8") as index:
+        index.write(line + "\n")
+
+
+def prune_store(store_dir=None, max_jobs=MAX_JOBS, orphan_age=ORPHAN_AGE_S):
+    """
+    Evict the least recently used jobs beyond max_jobs and rewrite the index.
+
+    A job counts as used when it is saved or when a later job starts from its basis. Directories that
+    are not in the index (a run killed between solve and save) are removed once older than orphan_age.
+    Call it when no other process is writing to the store.
+
+    Parameters:
+    - store_dir (str or Path): Directory of the solved-job store.
+    - max_jobs (int): Number of jobs kept.
+    - orphan_age (float): Age (s) after which unindexed job directories are removed.
+
+    Returns:
+    - list: Ids of the removed jobs.
+    """
+    store_dir = Path(store_dir)
+    records = _read_index(store_dir)
+    last_used = {job: record["saved_at"] for job, record in records.items()}
+    for record in records.values():
+        source = record.get("warm_start_from")
+        if source in last_used:
+            last_used[source] = max(last_used[source], record["saved_at"])
+    keep = set(sorted(last_used, key=last_used.get, reverse=True)[:max_jobs])
+
+    removed = [job for job in records if job not in keep]
+    now = time.time()
+    for job_dir in store_dir.iterdir():
+        if job_dir.is_dir() and job_dir.name not in records and now - job_dir.stat().st_mtime > orphan_age:
+            removed.append(job_dir.name)
+    for job in removed:
+        shutil.rmtree(store_dir / job, ignore_errors=True)
+    if len(keep) < len(records):
+        tmp_path = store_dir / (INDEX_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as index:
+            for job, record in records.items():
+                if job in keep:
+                    index.write(json.dumps(record) + "\n")
+        os.replace(tmp_path, store_dir / INDEX_FILE)
+    if removed:
+        logger.debug(f"Evicted {len(removed)} jobs from warm-start store {store_dir}")
+    return removed